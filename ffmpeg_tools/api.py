@@ -3,12 +3,18 @@
 import os
 import sys
 import json
+import asyncio
 import logging
 import uuid
 import time
-from datetime import datetime, timedelta
-from fastapi import FastAPI, HTTPException
+import functools
+from contextlib import asynccontextmanager
+from datetime import datetime
+import orjson
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
+from arq import create_pool
 from typing import Dict, Any, Union, Optional, List
 
 # Ensure local imports work
@@ -29,7 +35,8 @@ logger = logging.getLogger(__name__)
 class JobSubmissionDetails(BaseModel):
     """Schema for submitting an FFMPEG conversion job."""
     input_file: str
-    ffmpeg_command: str
+    # Either a parameter string (shlex-split by the service) or a ready argv list.
+    ffmpeg_command: Union[List[str], str]
 
 class JobStatusResponse(BaseModel):
     """Schema for returning detailed job status and progress."""
@@ -40,71 +47,210 @@ class JobStatusResponse(BaseModel):
     time_elapsed_seconds: Optional[int]
     notes: str
 
+class JobStatusBatchRequest(BaseModel):
+    """Schema for polling several jobs in one request."""
+    job_ids: List[str]
 
-# --- Core Logic and Initialization (Explicit Global Instantiation) ---
 
-config_manager = ConfigManager()
-db_manager = JobDatabaseManager(config_manager.get("database_path"))
+# --- Dependencies (created lazily, once per process) ---
+# Injected with Depends() so nothing is loaded at import time and tests can swap
+# them via app.dependency_overrides.
 
-# FIX: Ensure JobManager is fully loaded before instantiation
-job_manager_instance = JobManager(config_manager, db_manager)
+@functools.lru_cache(maxsize=1)
+def get_config() -> ConfigManager:
+    """Returns the process-wide ConfigManager."""
+    return ConfigManager.shared()
+
+
+@functools.lru_cache(maxsize=1)
+def get_db() -> JobDatabaseManager:
+    """Returns the process-wide JobDatabaseManager."""
+    return JobDatabaseManager(get_config().get("database_path"))
+
+
+@functools.lru_cache(maxsize=1)
+def get_job_manager() -> JobManager:
+    """Returns the process-wide JobManager."""
+    return JobManager(get_config(), get_db())
 
 
 # --- FastAPI Application ---
-app = FastAPI(title="Cinchro FFMPEG Tools API", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Opens the ARQ Redis pool used to hand jobs off to the worker process."""
+    config_manager = app.dependency_overrides.get(get_config, get_config)()
+    if config_manager.get("task_queue", "arq") == "celery":
+        # Celery manages its own broker connections.
+        yield
+        return
+    # Imported here: the tasks module builds the worker settings at import time.
+    from ffmpeg_tools.tasks import get_redis_settings
+    app.state.arq = await create_pool(get_redis_settings(config_manager))
+    yield
+    await app.state.arq.close()
 
 
-@app.get("/status", response_model=Dict[str, str])
+app = FastAPI(title="Cinchro FFMPEG Tools API", version="0.1.0", lifespan=lifespan)
+
+
+# The healthcheck payload never changes, so it is encoded once at import.
+_STATUS_BYTES = orjson.dumps({"status": "ok", "service": "Cinchro FFMPEG Tools", "machine": "Linux"})
+
+
+@app.get("/status")
 def get_service_status():
     """Returns the operational status of the FFMPEG Tools service."""
-    return {"status": "ok", "service": "Cinchro FFMPEG Tools", "machine": "Linux"}
+    return Response(content=_STATUS_BYTES, media_type="application/json")
 
 
-@app.post("/submit-job", response_model=JobStatusResponse)
-def submit_ffmpeg_job(job_details: JobSubmissionDetails):
+@app.post("/submit-job", response_model=JobStatusResponse, status_code=202)
+async def submit_ffmpeg_job(
+    job_details: JobSubmissionDetails,
+    request: Request,
+    config_manager: ConfigManager = Depends(get_config),
+    job_manager: JobManager = Depends(get_job_manager),
+) -> JobStatusResponse:
     """
-    Receives a conversion job request and kicks off the multi-stage pipeline.
+    Receives a conversion job request, persists it as SUBMITTED and enqueues the
+    multi-stage pipeline on the configured worker queue ("arq" or "celery").
+    Returns immediately with the job ID.
     """
     logger.info(f"API received job request for: {job_details.input_file}")
     
     try:
-        # FIX: Now calls the method that exists in JobManager.py
-        job_id = job_manager_instance.create_new_job(job_details.input_file, job_details.ffmpeg_command)
-        
-        # Retrieve the final status from the database after synchronous execution
-        job_entry = db_manager.get_job(job_id)
+        job_id = job_manager.create_new_job(job_details.input_file, job_details.ffmpeg_command)
         
-        # ... (rest of the response generation logic is correct) ...
+        if config_manager.get("task_queue", "arq") == "celery":
+            # Imported lazily: Celery is only required when selected in config.
+            from ffmpeg_tools.celery_app import run_ffmpeg_task
+            run_ffmpeg_task.delay(job_id)
+        else:
+            await request.app.state.arq.enqueue_job("run_ffmpeg_task", job_id)
 
+        return JobStatusResponse(
+            job_id=job_id,
+            status="SUBMITTED",
+            current_stage="SUBMITTED",
+            progress_percent=0.0,
+            time_elapsed_seconds=0,
+            notes="Job queued for execution."
+        )
+
+    except ValueError as e:
+        # Rejected ffmpeg_command: nothing was persisted or enqueued.
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error submitting job: {e}")
         # Mark as FAILED in case of external exception
         raise HTTPException(status_code=500, detail=f"Failed to submit job: {e}")
 
 
+def _retry_after_seconds(status: str, seconds_since_update: float) -> int:
+    """
+    Suggested delay before the next status poll: short while progress is moving,
+    longer once it stalls, and long for finished jobs whose row no longer changes.
+    Retry-After only carries whole seconds, so 1 is the fastest hint.
+    """
+    if JobDatabaseManager.is_terminal(status):
+        return 30
+    if seconds_since_update < 1:
+        return 1
+    if seconds_since_update < 10:
+        return 2
+    return 5
+
+
+def _seconds_since_update(job_entry: Dict[str, Any]) -> float:
+    """Seconds since the job row was last written (0 if it was never stamped)."""
+    last_updated = job_entry.get('last_updated')
+    if last_updated is None:
+        return 0.0
+    if isinstance(last_updated, str):
+        try:
+            # A unix timestamp read back from a column still declared TEXT.
+            last_updated = float(last_updated)
+        except ValueError:
+            try:
+                # Rows written before the switch to unix timestamps hold ISO-8601 text;
+                # fromisoformat is C-implemented, unlike strptime.
+                last_updated = datetime.fromisoformat(last_updated).timestamp()
+            except ValueError:
+                logger.warning(f"Unparseable last_updated {last_updated!r} for job {job_entry.get('job_id')}")
+                return 0.0
+    return time.time() - last_updated
+
+
+def _build_status_response(job_id: str, job_entry: Dict[str, Any], seconds_since_update: float) -> JobStatusResponse:
+    """Maps a conversion_jobs row onto the API status schema."""
+    status = job_entry['status']
+    return JobStatusResponse(
+        job_id=job_id,
+        status=status,
+        current_stage=status,
+        progress_percent=job_entry.get('progress_percent') or 0.0,
+        time_elapsed_seconds=int(seconds_since_update),
+        # Freshly submitted jobs have no notes yet (NULL column).
+        notes=job_entry.get('notes') or 'Job status retrieved.'
+    )
+
+
+@app.post("/job-status/batch", response_model=Dict[str, JobStatusResponse])
+def get_job_status_batch(
+    batch: JobStatusBatchRequest,
+    db_manager: JobDatabaseManager = Depends(get_db),
+) -> Dict[str, JobStatusResponse]:
+    """
+    Returns the status of many jobs in one round trip, keyed by job ID.
+    Unknown job IDs are omitted from the result.
+    """
+    jobs = db_manager.get_jobs(batch.job_ids)
+    return {
+        job_id: _build_status_response(job_id, job_entry, _seconds_since_update(job_entry))
+        for job_id, job_entry in jobs.items()
+    }
+
+
+# Long-poll limits for /job-status/{job_id}?wait=N: the longest a request is
+# held, and how often the job row is re-read meanwhile.
+MAX_STATUS_WAIT_SECONDS = 60.0
+STATUS_WAIT_POLL_SECONDS = 0.5
+
+
 @app.get("/job-status/{job_id}", response_model=JobStatusResponse)
-def get_job_status(job_id: str):
+async def get_job_status(
+    job_id: str,
+    response: Response,
+    wait: float = Query(0.0, ge=0.0, le=MAX_STATUS_WAIT_SECONDS),
+    db_manager: JobDatabaseManager = Depends(get_db),
+) -> JobStatusResponse:
     """
     Allows the orchestrator to poll for job status, progress, and current stage.
+    The Retry-After header tells pollers how long to wait before asking again.
+
+    With ?wait=N (long-poll) the response is held for up to N seconds until the
+    job's status changes, so a waiting client needs one request per stage
+    instead of one per polling interval. Finished jobs are answered at once.
     """
-    job_entry = db_manager.get_job(job_id)
+    job_entry = await run_in_threadpool(db_manager.get_job, job_id)
     
     if not job_entry:
         raise HTTPException(status_code=404, detail="Job ID not found in database.")
 
-    status = job_entry['status']
-    
-    try:
-        last_updated_ts = time.mktime(datetime.strptime(job_entry['last_updated'], "%Y-%m-%dT%H:%M:%S.%f").timetuple())
-        time_elapsed = int(time.time() - last_updated_ts)
-    except Exception:
-        time_elapsed = 0
+    if wait and not JobDatabaseManager.is_terminal(job_entry['status']):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait
+        initial_status = job_entry['status']
+        while loop.time() < deadline:
+            await asyncio.sleep(min(STATUS_WAIT_POLL_SECONDS, deadline - loop.time()))
+            latest = await run_in_threadpool(db_manager.get_job, job_id)
+            if not latest:
+                break
+            job_entry = latest
+            if job_entry['status'] != initial_status:
+                break
 
-    return JobStatusResponse(
-        job_id=job_id,
-        status=status,
-        current_stage=status,
-        progress_percent=job_entry.get('progress_percent', 0.0),
-        time_elapsed_seconds=time_elapsed,
-        notes=job_entry.get('notes', 'Job status retrieved.')
-    )
\ No newline at end of file
+    seconds_since_update = _seconds_since_update(job_entry)
+    response.headers["Retry-After"] = str(_retry_after_seconds(job_entry['status'], seconds_since_update))
+
+    return _build_status_response(job_id, job_entry, seconds_since_update)
@@ -0,0 +1,59 @@
+# ffmpeg_tools/celery_app.py
+
+import os
+import sys
+import asyncio
+
+from celery import Celery
+
+# Ensure local imports work when the worker is launched from the project root:
+#   celery -A ffmpeg_tools.celery_app worker --concurrency=N
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ffmpeg_tools.config import ConfigManager
+from ffmpeg_tools.database import JobDatabaseManager
+from ffmpeg_tools.job_manager import (JobManager, get_max_concurrent_jobs, start_queue_logging,
+                                      use_pidfd_child_watcher)
+
+
+# --- Celery Application (alternative to the ARQ worker in tasks.py) ---
+
+config_manager = ConfigManager.shared()
+
+celery_app = Celery(
+    "cinchro",
+    broker=config_manager.get("celery_broker_url", "redis://localhost:6379/0"),
+    backend=config_manager.get("celery_result_backend", "redis://localhost:6379/1"),
+)
+
+# One job per worker process at a time, with a bounded number of processes;
+# unacknowledged jobs are redelivered if a worker dies mid-conversion.
+celery_app.conf.worker_concurrency = get_max_concurrent_jobs(config_manager)
+celery_app.conf.worker_prefetch_multiplier = 1
+celery_app.conf.task_acks_late = True
+
+# Created lazily so each forked worker process opens its own SQLite connection.
+_job_manager = None
+
+
+def _get_job_manager() -> JobManager:
+    """Returns the per-process JobManager, creating it on first use."""
+    global _job_manager
+    if _job_manager is None:
+        db_manager = JobDatabaseManager(config_manager.get("database_path"))
+        _job_manager = JobManager(config_manager, db_manager)
+        use_pidfd_child_watcher()
+        # The listener thread lives as long as the worker process.
+        start_queue_logging()
+    return _job_manager
+
+
+@celery_app.task(bind=True, acks_late=True)
+def run_ffmpeg_task(self, job_id: str):
+    """
+    Executes the multi-stage pipeline for a job previously persisted by the API
+    with SUBMITTED status. Detailed progress is tracked in the job database.
+    """
+    self.update_state(state='PROGRESSING', meta={'job_id': job_id})
+    asyncio.run(_get_job_manager().run_job_pipeline(job_id))
+    return job_id
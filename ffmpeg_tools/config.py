@@ -4,21 +4,26 @@ import os
 import json
 from dotenv import load_dotenv
 
+# Sentinel for "environment variable not looked up yet" (None means "not set").
+_MISSING = object()
+
 class ConfigManager:
     """
     Manages the FFMPEG Tools application's configuration by loading settings 
     from a config.json file and environment variables from a .env file.
     """
 
+    # Instances handed out by shared(), keyed by (config_path, env_path).
+    _shared_instances = {}
+
     def __init__(self, config_path="config.json", env_path=".env"):
         """
         Initializes the ConfigManager, loading both config.json and .env files.
         """
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        abs_config_path = os.path.join(base_dir, config_path)
-        abs_env_path = os.path.join(base_dir, env_path)
+        abs_config_path, abs_env_path = self._resolve_paths(config_path, env_path)
         
         load_dotenv(dotenv_path=abs_env_path)
+        self._mtime = self._stat_mtime(abs_config_path)
         
         self.config_data = {}
         try:
@@ -30,35 +35,80 @@ class ConfigManager:
         except json.JSONDecodeError:
             print(f"Error: The configuration file '{abs_config_path}' is not a valid JSON file.")
 
+        self._build_lookups()
+
+    @classmethod
+    def from_dict(cls, config_data):
+        """
+        Builds a ConfigManager from an in-memory dictionary shaped like
+        config.json, without reading any file (e.g. for unit tests). Environment
+        variables still take precedence over its values.
+        """
+        instance = cls.__new__(cls)
+        instance._mtime = None
+        instance.config_data = config_data
+        instance._build_lookups()
+        return instance
+
+    def _build_lookups(self):
+        """Config does not change at runtime: build the lookup tables once."""
+        self._flat_config = self._flatten(self.config_data)
+        self._env_cache = {}
+
+    @classmethod
+    def shared(cls, config_path="config.json", env_path=".env"):
+        """
+        Returns a process-wide ConfigManager for the given files. The files are
+        only re-read when config.json's modification time changes, so repeated
+        callers (API startup, workers, reloads) pay a single stat() instead of a
+        dotenv + JSON load.
+        """
+        key = (config_path, env_path)
+        abs_config_path, _ = cls._resolve_paths(config_path, env_path)
+        instance = cls._shared_instances.get(key)
+        if instance is None or instance._mtime != cls._stat_mtime(abs_config_path):
+            instance = cls._shared_instances[key] = cls(config_path, env_path)
+        return instance
+
+    @staticmethod
+    def _resolve_paths(config_path, env_path):
+        """Resolves config/env paths relative to this package directory."""
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        return os.path.join(base_dir, config_path), os.path.join(base_dir, env_path)
+
+    @staticmethod
+    def _stat_mtime(path):
+        """Returns the file's modification time, or None if it does not exist."""
+        try:
+            return os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
     def get(self, key, default=None):
         """
         Retrieves a configuration value. It first checks environment variables
-        and then falls back to the loaded JSON configuration.
+        and then falls back to the loaded JSON configuration. Nested values are
+        addressed with dotted keys (e.g., "media_machine_config.storage_host").
         """
-        # Prioritize environment variables
-        env_value = os.getenv(key)
+        # Prioritize environment variables (resolved once per key)
+        env_value = self._env_cache.get(key, _MISSING)
+        if env_value is _MISSING:
+            env_value = self._env_cache[key] = os.getenv(key)
         if env_value is not None:
             return env_value
-        
-        # We need to handle nested configuration manually if we don't know the nesting depth.
-        # However, for our known structure, we assume top-level or single-level dictionary access.
-        
-        # Check top level config
-        if key in self.config_data:
-            return self.config_data[key]
-        
-        # Check nested structures explicitly (e.g., "media_machine_config.storage_host")
-        if '.' in key:
-            parts = key.split('.')
-            current_level = self.config_data
-            try:
-                for part in parts:
-                    if isinstance(current_level, dict):
-                        current_level = current_level[part]
-                    else:
-                        return default
-                return current_level
-            except KeyError:
-                pass
 
-        return self.config_data.get(key, default)
\ No newline at end of file
+        return self._flat_config.get(key, default)
+
+    @staticmethod
+    def _flatten(data, prefix=""):
+        """
+        Flattens nested config dictionaries into {dotted_key: value}, keeping the
+        intermediate dictionaries so top-level section lookups still work.
+        """
+        flat = {}
+        for key, value in data.items():
+            dotted_key = f"{prefix}{key}"
+            flat[dotted_key] = value
+            if isinstance(value, dict):
+                flat.update(ConfigManager._flatten(value, f"{dotted_key}."))
+        return flat
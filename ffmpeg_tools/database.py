@@ -2,89 +2,333 @@
 
 import sqlite3
 import json
-from datetime import datetime
-from typing import Dict, Any, List
+import queue
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Any, List, Tuple
+
+_CREATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS conversion_jobs (
+        job_id TEXT PRIMARY KEY,
+        status TEXT NOT NULL,
+        input_file TEXT NOT NULL,
+        output_file TEXT NOT NULL,
+        ffmpeg_command TEXT,
+        rsync_user_host TEXT,
+        progress_percent REAL,
+        last_updated REAL,
+        notes TEXT
+    );
+"""
 
 class JobDatabaseManager:
     """
     Manages the local SQLite database for the FFMPEG Tools Job Manager.
     """
 
-    def __init__(self, db_path: str):
-        """Initializes the database manager and ensures the tables exist."""
-        # FIX: Add check_same_thread=False to allow FastAPI/Uvicorn's thread pool to share connections.
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+    # get_job results are cached briefly to absorb orchestrator poll storms.
+    # Updates made in this process invalidate immediately; updates made by the
+    # worker process become visible once the TTL expires. Terminal rows never
+    # change again, so they are kept much longer.
+    CACHE_TTL_SECONDS = 1.0
+    TERMINAL_CACHE_TTL_SECONDS = 60.0
+    # The API and worker are long-lived: past this many rows the oldest-cached is evicted.
+    CACHE_MAX_ENTRIES = 1024
+
+    def __init__(self, db_path: str, pool_size: int = 8):
+        """
+        Initializes the database manager with a small pool of WAL-mode connections
+        and ensures the tables exist. Each FastAPI/Uvicorn threadpool worker borrows
+        its own connection, so status polls never share (or block on) one handle.
+        """
+        self.db_path = db_path
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        # Every update takes the next write sequence number under _cache_lock and
+        # records it as the job's generation. A get_job that read the row before
+        # a concurrent update must not publish its (now stale) snapshot into the
+        # cache afterwards, so it only publishes if no write is newer than its read.
+        self._cache_lock = threading.Lock()
+        self._write_seq = 0
+        self._generations: Dict[str, int] = {}
+        # Finished jobs are dropped from _generations so it does not grow with
+        # every job ever seen; this floor stands in for their last write.
+        self._forgotten_seq = 0
+        self._pool = queue.Queue()
+        for _ in range(pool_size):
+            self._pool.put(self._connect())
         self.create_tables()
 
+    def _connect(self) -> sqlite3.Connection:
+        """Opens one pooled connection with WAL journaling (readers never block the writer)."""
+        # check_same_thread=False: a pooled connection may be borrowed by any thread,
+        # but only by one at a time. "file:" paths are SQLite URIs, e.g. the shared
+        # in-memory databases used by the tests (journal_mode then stays "memory").
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, uri=self.db_path.startswith("file:"))
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    @contextmanager
+    def _borrow(self):
+        """Borrows a connection from the pool and returns it when done."""
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
     def create_tables(self):
-        """Creates the conversion_jobs table."""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS conversion_jobs (
-                job_id TEXT PRIMARY KEY,
-                status TEXT NOT NULL,
-                input_file TEXT NOT NULL,
-                output_file TEXT NOT NULL,
-                ffmpeg_command TEXT,
-                rsync_user_host TEXT,
-                progress_percent REAL,
-                last_updated TEXT,
-                notes TEXT
-            );
-        """)
-        self.conn.commit()
+        """Creates the conversion_jobs table and its polling indexes."""
+        with self._borrow() as conn:
+            conn.execute(_CREATE_TABLE_SQL)
+            conn.commit()
+            self._migrate_text_timestamps(conn)
+            # Secondary indexes so status-filtered / recently-updated polling
+            # queries use index range scans instead of scanning the table.
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_jobs_status_updated
+                ON conversion_jobs(status, last_updated DESC);
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_jobs_last_updated
+                ON conversion_jobs(last_updated);
+            """)
+            conn.commit()
+
+    @staticmethod
+    def _migrate_text_timestamps(conn: sqlite3.Connection):
+        """
+        Databases created before last_updated held unix timestamps declare it
+        TEXT, which turns every time.time() written since back into a numeric
+        string. Rebuilds such a table once as REAL: numeric strings are cast,
+        legacy local-time ISO-8601 values are converted to unix seconds.
+        """
+        def declared_type():
+            columns = {row['name']: row['type'] for row in conn.execute("PRAGMA table_info(conversion_jobs)")}
+            return columns.get('last_updated', '').upper()
+
+        if declared_type() != 'TEXT':
+            return
+        # Explicit transaction: sqlite3 would otherwise autocommit each DDL statement.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # The API and the worker start side by side; only the first one migrates.
+            if declared_type() != 'TEXT':
+                conn.rollback()
+                return
+            conn.execute("ALTER TABLE conversion_jobs RENAME TO conversion_jobs_old")
+            conn.execute(_CREATE_TABLE_SQL)
+            conn.execute("""
+                INSERT INTO conversion_jobs
+                SELECT job_id, status, input_file, output_file, ffmpeg_command,
+                       rsync_user_host, progress_percent,
+                       CASE WHEN last_updated GLOB '[0-9][0-9][0-9][0-9]-*'
+                            THEN (julianday(last_updated, 'utc') - 2440587.5) * 86400.0
+                            ELSE CAST(last_updated AS REAL)
+                       END,
+                       notes
+                FROM conversion_jobs_old
+            """)
+            # Dropping the old table also drops its indexes; create_tables rebuilds them.
+            conn.execute("DROP TABLE conversion_jobs_old")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
 
     def create_job(self, job_id: str, input_file: str, output_file: str, ffmpeg_command: str):
         """Creates a new job entry with initial SUBMITTED status."""
-        cursor = self.conn.cursor()
-        now = datetime.now().isoformat()
+        now = time.time()
         
-        cursor.execute("""
-            INSERT INTO conversion_jobs 
-            (job_id, status, input_file, output_file, ffmpeg_command, progress_percent, last_updated)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (job_id, 'SUBMITTED', input_file, output_file, ffmpeg_command, 0.0, now))
-        self.conn.commit()
+        with self._borrow() as conn:
+            conn.execute("""
+                INSERT INTO conversion_jobs 
+                (job_id, status, input_file, output_file, ffmpeg_command, progress_percent, last_updated)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (job_id, 'SUBMITTED', input_file, output_file, ffmpeg_command, 0.0, now))
+            conn.commit()
 
     def update_job_status(self, job_id: str, status: str, progress: float = None, notes: str = None):
         """Updates the status and progress of an existing job."""
-        updates = []
-        params = []
-        
-        updates.append("status = ?")
-        params.append(status)
-        
-        if progress is not None:
-            updates.append("progress_percent = ?")
-            params.append(progress)
-            
-        if notes is not None:
-            updates.append("notes = ?")
-            params.append(notes)
-            
-        updates.append("last_updated = ?")
-        params.append(datetime.now().isoformat())
-        
-        params.append(job_id)
-        
-        cursor = self.conn.cursor()
-        query = f"UPDATE conversion_jobs SET {', '.join(updates)} WHERE job_id = ?"
-        cursor.execute(query, params)
-        self.conn.commit()
+        self.update_job_statuses([(job_id, status, progress, notes)])
+
+    def update_job_statuses(self, updates: List[Tuple[str, str, float, str]]):
+        """
+        Applies (job_id, status, progress, notes) updates, in order, within a
+        single BEGIN IMMEDIATE transaction: one commit for the whole batch.
+        A progress or notes value of None leaves that column unchanged.
+        """
+        if not updates:
+            return
+        now = time.time()
+        with self._borrow() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for job_id, status, progress, notes in updates:
+                    updates_sql = ["status = ?"]
+                    params = [status]
+
+                    if progress is not None:
+                        updates_sql.append("progress_percent = ?")
+                        params.append(progress)
+
+                    if notes is not None:
+                        updates_sql.append("notes = ?")
+                        params.append(notes)
+
+                    updates_sql.append("last_updated = ?")
+                    params.append(now)
+
+                    params.append(job_id)
+                    conn.execute(f"UPDATE conversion_jobs SET {', '.join(updates_sql)} WHERE job_id = ?", params)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        self._invalidate(job_id for job_id, _, _, _ in updates)
+        with self._cache_lock:
+            for job_id, status, _, _ in updates:
+                if self.is_terminal(status):
+                    self._forget_generation(job_id)
+
+    def update_job_progress_batch(self, updates: List[Tuple[str, str, float]]):
+        """
+        Writes a batch of (job_id, stage, progress) updates with one executemany
+        and a single commit, instead of one commit (fsync) per progress tick.
+        A row is only updated while the job is still in that stage, so a late
+        progress batch can never roll back a stage transition or terminal status.
+        """
+        if not updates:
+            return
+        now = time.time()
+        rows = [(progress, now, job_id, stage) for job_id, stage, progress in updates]
+        with self._borrow() as conn:
+            conn.executemany("""
+                UPDATE conversion_jobs
+                SET progress_percent = ?, last_updated = ?
+                WHERE job_id = ? AND status = ?
+            """, rows)
+            conn.commit()
+        self._invalidate(job_id for job_id, _, _ in updates)
+
+    def _invalidate(self, job_ids):
+        """Drops cached rows for updated jobs and records their write generation."""
+        with self._cache_lock:
+            for job_id in job_ids:
+                self._write_seq += 1
+                self._generations[job_id] = self._write_seq
+                self._cache.pop(job_id, None)
+
+    def _forget_generation(self, job_id: str):
+        """
+        Drops a finished job's generation (caller holds _cache_lock). Reads that
+        started before this point can no longer tell whether they are stale, so
+        the floor makes them skip publishing; later reads are unaffected.
+        """
+        if self._generations.pop(job_id, None) is not None:
+            self._forgotten_seq = self._write_seq
+
+    def _publish(self, job: Dict[str, Any], read_seq: int):
+        """
+        Caches a row read when the write sequence was read_seq, unless the job
+        was updated since (caller holds _cache_lock).
+        """
+        job_id = job['job_id']
+        if self._generations.get(job_id, self._forgotten_seq) > read_seq:
+            return
+        if self.is_terminal(job['status']):
+            self._cache_put(job_id, (time.monotonic() + self.TERMINAL_CACHE_TTL_SECONDS, job))
+            self._forget_generation(job_id)
+        else:
+            self._cache_put(job_id, (time.monotonic() + self.CACHE_TTL_SECONDS, job))
+
+    def _cached(self, job_id: str, now: float):
+        """A copy of the job's cached row if still fresh; an expired entry is evicted."""
+        entry = self._cache.get(job_id)
+        if entry is None:
+            return None
+        if now < entry[0]:
+            return dict(entry[1])
+        with self._cache_lock:
+            # Unless a concurrent reader already replaced it with a fresh row.
+            if self._cache.get(job_id) is entry:
+                del self._cache[job_id]
+        return None
+
+    def _cache_put(self, job_id: str, entry: tuple):
+        """Stores a cache entry, evicting the oldest past CACHE_MAX_ENTRIES (caller holds _cache_lock)."""
+        self._cache[job_id] = entry
+        self._cache.move_to_end(job_id)
+        if len(self._cache) > self.CACHE_MAX_ENTRIES:
+            self._cache.popitem(last=False)
 
     def get_job(self, job_id: str) -> Dict[str, Any]:
-        """Retrieves a single job record."""
-        self.conn.row_factory = sqlite3.Row
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM conversion_jobs WHERE job_id = ?", (job_id,))
-        row = cursor.fetchone()
+        """Retrieves a single job record, served from the TTL cache when fresh."""
+        cached = self._cached(job_id, time.monotonic())
+        if cached is not None:
+            return cached
+
+        with self._cache_lock:
+            read_seq = self._write_seq
+        with self._borrow() as conn:
+            row = conn.execute("SELECT * FROM conversion_jobs WHERE job_id = ?", (job_id,)).fetchone()
         
         if row:
-            return dict(row)
+            job = dict(row)
+            with self._cache_lock:
+                self._publish(job, read_seq)
+            return dict(job)
         return {}
+
+    def get_jobs(self, job_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Retrieves several job records keyed by job_id. Fresh cache entries are
+        used as-is; the rest are fetched with a single IN-list query.
+        Unknown job IDs are omitted.
+        """
+        jobs = {}
+        misses = []
+        now = time.monotonic()
+        for job_id in dict.fromkeys(job_ids):
+            cached = self._cached(job_id, now)
+            if cached is not None:
+                jobs[job_id] = cached
+            else:
+                misses.append(job_id)
+        if not misses:
+            return jobs
+
+        with self._cache_lock:
+            read_seq = self._write_seq
+        # Chunked to stay under SQLite's bound-parameter limit.
+        rows = []
+        with self._borrow() as conn:
+            for i in range(0, len(misses), 500):
+                chunk = misses[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows.extend(conn.execute(
+                    f"SELECT * FROM conversion_jobs WHERE job_id IN ({placeholders})", chunk
+                ).fetchall())
+
+        with self._cache_lock:
+            for row in rows:
+                job = dict(row)
+                self._publish(job, read_seq)
+                jobs[job['job_id']] = dict(job)
+        return jobs
+
+    @staticmethod
+    def is_terminal(status: str) -> bool:
+        """COMPLETED and any *_FAILED status are final for a job."""
+        return status == "COMPLETED" or status.endswith("FAILED")
     
     def close(self):
-        """Closes the database connection."""
-        self.conn.close()
+        """Closes all pooled database connections."""
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
 
 # --- Example usage block removed to keep the file clean for the package ---
\ No newline at end of file
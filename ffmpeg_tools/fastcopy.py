@@ -0,0 +1,56 @@
+# ffmpeg_tools/fastcopy.py
+
+import errno
+import os
+import shutil
+
+# Bytes asked of each copy_file_range call; the kernel may copy less.
+CHUNK_SIZE = 64 * 1024 * 1024
+
+
+def _copy_contents(src_fd: int, dest_fd: int, size: int):
+    """
+    Copies size bytes between two fds with copy_file_range(2): the data never
+    enters user space, and filesystems that support it (btrfs, XFS, NFS 4.2)
+    share extents or copy server-side instead of moving bytes at all.
+    """
+    remaining = size
+    while remaining > 0:
+        copied = os.copy_file_range(src_fd, dest_fd, min(remaining, CHUNK_SIZE))
+        if copied == 0:
+            break
+        remaining -= copied
+
+
+def copy_file(src: str, dest: str, remove_source: bool = False) -> str:
+    """
+    Local replacement for `rsync -a src dest` (dest may be a directory). With
+    remove_source the file is moved, which is a plain rename on the same
+    filesystem. Returns the destination file path.
+    """
+    if os.path.isdir(dest):
+        dest = os.path.join(dest, os.path.basename(src))
+
+    if remove_source:
+        try:
+            os.replace(src, dest)
+            return dest
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+
+    try:
+        with open(src, 'rb') as fsrc, open(dest, 'wb') as fdest:
+            _copy_contents(fsrc.fileno(), fdest.fileno(), os.fstat(fsrc.fileno()).st_size)
+    except (AttributeError, OSError) as e:
+        # No copy_file_range (non-Linux, old kernel, unsupported filesystem pair):
+        # shutil still avoids user-space buffers where sendfile(2) is available.
+        if isinstance(e, OSError) and e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL,
+                                                      errno.EOPNOTSUPP, errno.EPERM):
+            raise
+        shutil.copyfile(src, dest)
+    shutil.copystat(src, dest)
+
+    if remove_source:
+        os.remove(src)
+    return dest
@@ -1,221 +1,854 @@
 # ffmpeg_tools/job_manager.py
 
 import os
+import re
 import sys
 import uuid
+import shlex
+import shutil
 import subprocess
 import time
 import json
-from typing import Dict, Any, List
-
-# Add path for local imports
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__))))
+import asyncio
+import hashlib
+import logging
+import logging.handlers
+import queue
+from collections import deque
+from typing import IO, Dict, Any, List, Optional, Tuple, Union
 
 from ffmpeg_tools.config import ConfigManager
 from ffmpeg_tools.database import JobDatabaseManager
+from ffmpeg_tools.ringbuf import ProgressRing, ProgressFlusher
+from ffmpeg_tools import fastcopy
+
+logger = logging.getLogger("cinchro.jobs")
+
+
+def start_queue_logging(level: int = logging.INFO) -> logging.handlers.QueueListener:
+    """
+    Routes the pipeline's "cinchro" loggers through a queue: a log call only
+    enqueues the record, and a background listener thread does the formatting
+    and the write to stderr. Call once per worker process; stop the returned
+    listener on shutdown to flush what is left.
+    """
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+
+    cinchro_logger = logging.getLogger("cinchro")
+    cinchro_logger.handlers = [logging.handlers.QueueHandler(log_queue)]
+    cinchro_logger.setLevel(level)
+    cinchro_logger.propagate = False
+    listener.start()
+    return listener
+
+
+def get_max_concurrent_jobs(config_manager: ConfigManager) -> int:
+    """
+    Number of pipelines a worker runs at once. Each one can hold an FFMPEG
+    process that uses several cores, so the default is half the CPU count.
+    """
+    default = max(1, (os.cpu_count() or 2) // 2)
+    return int(config_manager.get("max_concurrent_jobs", default))
+
+
+# Whole-transfer percentage in an rsync --info=progress2 update, e.g.
+# "    524,288,000  45%   98.21MB/s    0:00:05 (xfr#1, to-chk=0/1)".
+_RSYNC_PERCENT = re.compile(rb'\s(\d{1,3})%\s')
+
+# Shell syntax has no meaning in an argv list (no shell is involved), so these
+# only show up when a caller expects shell behaviour that will not happen.
+_SHELL_METACHARACTERS = ('`', '$(', '&&', '||', '\x00')
+# Options the pipeline sets itself: the input is always the pulled temp file.
+_RESERVED_FFMPEG_OPTIONS = {'-i'}
+
+
+def parse_ffmpeg_command(command: Union[str, List[str]]) -> List[str]:
+    """
+    Tokenizes a job's FFMPEG parameters once (shlex, so quoted filter arguments
+    stay whole) and rejects what cannot run, so a bad job fails at submission
+    instead of after PULL. An argv list is taken as already tokenized.
+    Raises ValueError.
+    """
+    if isinstance(command, str):
+        try:
+            tokens = shlex.split(command)
+        except ValueError as e:
+            raise ValueError(f"Invalid ffmpeg_command: {e}")
+    else:
+        tokens = list(command)
+    for token in tokens:
+        if token in _RESERVED_FFMPEG_OPTIONS:
+            raise ValueError(f"Invalid ffmpeg_command: '{token}' is set by the pipeline.")
+        if any(meta in token for meta in _SHELL_METACHARACTERS):
+            raise ValueError(f"Invalid ffmpeg_command: shell syntax is not supported ('{token}').")
+    return tokens
+
+
+# Hardware HEVC encoders that can stand in for libx265, in auto-detection order.
+HW_ENCODERS = {"nvenc": "hevc_nvenc", "qsv": "hevc_qsv", "vaapi": "hevc_vaapi"}
+# Constant-quality option of each hardware encoder (libx265's is -crf).
+_HW_QUALITY_OPTIONS = {"nvenc": "-cq", "qsv": "-global_quality", "vaapi": "-qp"}
+# libx265-only options (each followed by a value), dropped for hardware encoders.
+_X265_ONLY_OPTIONS = frozenset({'-preset', '-tune', '-x265-params'})
+_VIDEO_CODEC_OPTIONS = frozenset({'-c:v', '-vcodec', '-codec:v'})
+
+
+def _video_codec(args: List[str]) -> Optional[str]:
+    """The video encoder selected in FFMPEG output parameters (the last one wins), if any."""
+    codec = None
+    for opt, value in zip(args, args[1:]):
+        if opt in _VIDEO_CODEC_OPTIONS:
+            codec = value
+    return codec
+
+
+def apply_hw_encoder(args: List[str], backend: str,
+                     vaapi_device: str = "/dev/dri/renderD128") -> Tuple[List[str], List[str]]:
+    """
+    Rewrites FFMPEG output parameters that select libx265 for a hardware
+    backend ("nvenc", "qsv" or "vaapi"). Returns (input_options, output_args):
+    input_options go before -i. Parameters that do not use libx265 are
+    returned unchanged. Frames are decoded in software and uploaded to the
+    encoder, so user scaling/filters keep working; VAAPI needs them folded
+    into one filter chain that ends with the upload.
+    """
+    if _video_codec(args) != 'libx265':
+        return [], list(args)
+    rewritten, size, video_filter = [], None, None
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        value = args[i + 1] if i + 1 < len(args) else None
+        if value is None:
+            rewritten.append(arg)
+        elif arg in _VIDEO_CODEC_OPTIONS and value == 'libx265':
+            rewritten += [arg, HW_ENCODERS[backend]]
+        elif arg == '-crf':
+            rewritten += [_HW_QUALITY_OPTIONS[backend], value]
+        elif arg in _X265_ONLY_OPTIONS:
+            pass
+        elif backend == 'vaapi' and arg == '-s':
+            size = value
+        elif backend == 'vaapi' and arg in ('-vf', '-filter:v'):
+            video_filter = value
+        else:
+            rewritten.append(arg)
+            i += 1
+            continue
+        i += 2
+    if backend != 'vaapi':
+        return [], rewritten
+    filters = [f for f in (video_filter, f"scale={size.replace('x', ':')}" if size else None) if f]
+    filters += ['format=nv12', 'hwupload']
+    return ['-vaapi_device', vaapi_device], rewritten + ['-vf', ','.join(filters)]
+
+
+def resolve_executable(name: str) -> str:
+    """
+    Resolves a configured tool ("ffmpeg", "rsync", ...) to an absolute path once,
+    so each spawn is a single execve instead of a search through every PATH entry.
+    A name that cannot be resolved is returned unchanged and fails at spawn time.
+    """
+    return shutil.which(name) or name
+
+
+def use_pidfd_child_watcher() -> bool:
+    """
+    Makes asyncio wait for subprocesses through a pidfd (Linux >= 5.3), so a
+    multi-hour FFMPEG run costs no wakeups or watcher thread until it exits.
+    Python 3.12+ already does this by default; elsewhere the stock watcher is kept.
+    Safe to call from inside a running loop (ARQ's startup hook): the watcher is
+    attached to that loop. Returns True when the pidfd watcher is in use.
+    """
+    if sys.version_info >= (3, 12):
+        return hasattr(os, "pidfd_open")
+    if not hasattr(os, "pidfd_open") or not hasattr(asyncio, "PidfdChildWatcher"):
+        return False
+    try:
+        os.close(os.pidfd_open(os.getpid()))
+    except OSError:
+        # Kernel older than 5.3 (or pidfd_open blocked by a seccomp profile).
+        return False
+    watcher = asyncio.PidfdChildWatcher()
+    asyncio.set_child_watcher(watcher)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # No loop yet: the policy attaches the watcher when asyncio.run() starts one.
+        return True
+    # The policy only attaches watchers to loops it creates afterwards.
+    watcher.attach_loop(loop)
+    return True
 
 
 # --- Core FFMPEG Job Manager ---
 
 class JobManager:
+    # Lines of subprocess stderr kept for failure notes (the rest is discarded).
+    STDERR_TAIL_LINES = 200
+
     # ... (rest of __init__ remains the same) ...
     def __init__(self, config_manager: ConfigManager, db_manager: JobDatabaseManager):
         self.config = config_manager
         self.db = db_manager
         
         # --- Constants from Config ---
-        self.FFMPEG_PATH = self.config.get("ffmpeg_path", "ffmpeg")
-        self.RSYNC_PATH = self.config.get("rsync_path", "rsync")
+        # Resolved once here rather than by a PATH search on every spawn.
+        self.FFMPEG_PATH = resolve_executable(self.config.get("ffmpeg_path", "ffmpeg"))
+        self.FFPROBE_PATH = resolve_executable(self.config.get("ffprobe_path", "ffprobe"))
+        self.RSYNC_PATH = resolve_executable(self.config.get("rsync_path", "rsync"))
+        self.FFMPEG_THREADS = self._ffmpeg_threads_per_invocation()
+        # libx265 jobs can be moved to a hardware HEVC encoder: "none" (default),
+        # "auto" (detected once, on first use) or one of HW_ENCODERS.
+        self.HW_ENCODER = str(self.config.get("CINCHRO_HWACCEL") or self.config.get("hw_encoder", "none")).lower()
+        self.VAAPI_DEVICE = self.config.get("vaapi_device", "/dev/dri/renderD128")
+        self._hw_backend: Optional[str] = None
+        self._hw_backend_resolved = False
         
         # --- SSH/Transfer Config ---
         self.RSYNC_USER = self.config.get("media_machine_config.rsync_user") 
         self.STORAGE_HOST = self.config.get("media_machine_config.storage_host")
+        # Storage on this machine (unset host, or a loopback one) needs no SSH:
+        # transfers become in-kernel copies and the backup runs locally.
+        self.STORAGE_IS_LOCAL = self.STORAGE_HOST in (None, "", "localhost", "127.0.0.1", "::1")
         self.ARCHIVE_ROOT_DIR = self.config.get("media_machine_config.archive_root_dir")
         self.SSH_KEY_PATH = self.config.get("SSH_KEY_PATH", os.getenv("SSH_KEY_PATH"))
+        # PULL, BACKUP and PUSH multiplex over one persistent SSH connection, so
+        # only the first of them pays for the TCP handshake and key exchange.
+        # AES-GCM is hardware-accelerated (AES-NI) on the machines we run on.
+        self._ssh_opts = [
+            "-o", "ControlMaster=auto",
+            "-o", f"ControlPath=/tmp/cinchro-ssh-%r@%h:%p-{os.getpid()}",
+            "-o", "ControlPersist=60s",
+            "-o", "Compression=no",
+            "-o", f"Ciphers={self.config.get('ssh_cipher', 'aes128-gcm@openssh.com')}",
+        ]
+        # Media is already compressed, so rsync -z only burns CPU; opt in if needed.
+        self.RSYNC_COMPRESS = str(self.config.get("rsync_compress", False)).lower() in ("1", "true", "yes")
+        self.RSYNC_BWLIMIT = self.config.get("rsync_bwlimit")
+        # One rsync stream is bound by a single TCP connection and a single cipher
+        # core. Files above the threshold can be split across N ssh streams instead
+        # (1 = off). Not used with rsync_bwlimit, which N streams would multiply.
+        self.PARALLEL_STREAMS = max(1, int(self.config.get("parallel_transfer_streams", 1)))
+        self.PARALLEL_THRESHOLD_BYTES = int(self.config.get("parallel_transfer_threshold_mb", 1024)) * 1024 * 1024
+        extra_flags = self.config.get("rsync_extra_flags", [])
+        self.RSYNC_EXTRA_FLAGS = shlex.split(extra_flags) if isinstance(extra_flags, str) else list(extra_flags)
+        # Hash source and archive after the backup cp (sha256sum uses SHA-NI where present).
+        self.VERIFY_BACKUP = str(self.config.get("verify_backup", True)).lower() in ("1", "true", "yes")
+        # Stream PULL through tee(1) on the storage host so one read of the source
+        # also writes the archive copy (no separate BACKUP cp, no resumable rsync).
+        self.FUSE_PULL_AND_BACKUP = str(self.config.get("fuse_pull_and_backup", False)).lower() in ("1", "true", "yes")
         
         # --- Local/Remote Paths ---
         self.LOCAL_TEMP_DIR = self.config.get("transfer_paths.local_temp_dir", "/tmp/cinchro_linux_jobs/temp")
         self.LOCAL_OUTPUT_DIR = self.config.get("transfer_paths.local_output_dir", "/tmp/cinchro_linux_jobs/output")
 
+        # Directory prefixes for per-job paths, built by concatenation.
+        self._temp_dir_slash = self.LOCAL_TEMP_DIR.rstrip('/') + '/'
+        self._out_dir_slash = self.LOCAL_OUTPUT_DIR.rstrip('/') + '/'
+
         # Ensure local directories exist
         os.makedirs(self.LOCAL_TEMP_DIR, exist_ok=True)
         os.makedirs(self.LOCAL_OUTPUT_DIR, exist_ok=True)
 
-        print(f"JobManager initialized. Storage Host: {self.STORAGE_HOST}")
+        # --- Progress Channel ---
+        # Fine-grained progress from running stages goes through a lock-free ring
+        # and is written to the DB in batches by a single flusher thread.
+        self.progress_ring = ProgressRing()
+        self._progress_flusher = None
+
+        # Stage-completion writes that are immediately followed by another status
+        # change are held per job and committed in the same transaction.
+        self._pending_status: Dict[str, List[tuple]] = {}
 
-    def create_new_job(self, input_file: str, ffmpeg_command: str) -> str:
+    def _ffmpeg_threads_per_invocation(self) -> int:
         """
-        Generates a job ID, creates the database entry, and executes the pipeline.
-        This is the method the API must call.
+        Threads given to each FFMPEG process. Left alone, every concurrent FFMPEG
+        starts ~one thread per core, so N jobs oversubscribe the CPU N times.
+        Defaults to an even share of the cores across max_concurrent_jobs; can be
+        set with CINCHRO_FFMPEG_THREADS or ffmpeg_threads_per_invocation.
+        """
+        threads = (self.config.get("CINCHRO_FFMPEG_THREADS")
+                   or self.config.get("ffmpeg_threads_per_invocation"))
+        if threads is None:
+            threads = (os.cpu_count() or 1) // get_max_concurrent_jobs(self.config)
+        return min(max(int(threads), 1), 64)
+
+    def create_new_job(self, input_file: str, ffmpeg_command: Union[str, List[str]]) -> str:
+        """
+        Generates a job ID and creates the database entry (SUBMITTED status).
+        Raises ValueError if ffmpeg_command is rejected by parse_ffmpeg_command.
+        The pipeline itself is executed out of band by the ARQ worker
+        (see ffmpeg_tools/tasks.py), which calls run_job_pipeline.
         """
         job_id = str(uuid.uuid4())
         
-        # Determine unique local file names based on job ID
-        base_name = os.path.basename(input_file)
-        # 1. Strip the original extension cleanly (e.g., Trials720.mp4 -> Trials720)
-        file_root, _ = os.path.splitext(base_name)
-        # 2. Add the target extension (.mp4, as assumed for output)
-        local_output_file = os.path.join(self.LOCAL_OUTPUT_DIR, f"{job_id}_{file_root}.mp4")
+        # Determine the final local output name (FFMPEG writes it directly)
+        # 1. Strip the original extension cleanly (e.g., Trials720.mkv -> Trials720)
+        _, file_root = self._split_base(input_file)
+        # 2. Add the target extension (.mp4, as assumed for output). The per-job
+        # directory keeps same-named sources (or a resubmitted file) from sharing
+        # one local output; the PUSH still delivers the clean <name>.mp4.
+        local_output_file = f"{self._out_dir_slash}{job_id}/{file_root}.mp4"
         
+        # Parsed once here; stored as a JSON argv list so execution just splats it.
+        ffmpeg_args = parse_ffmpeg_command(ffmpeg_command)
+
         # Create initial DB record (SUBMITTED status)
-        self.db.create_job(job_id, input_file, local_output_file, ffmpeg_command)
-        
-        # Immediately kick off the pipeline (synchronously for this MVP)
-        self.run_job_pipeline(job_id)
+        self.db.create_job(job_id, input_file, local_output_file, json.dumps(ffmpeg_args))
         
         return job_id
 
-    # ... (_build_rsync_cmd and _run_rsync_transfer methods remain the same) ...
-    
-    def _build_rsync_cmd(self, src: str, dest: str) -> List[str]:
-        """Constructs the base rsync command for either pull or push."""
+    @staticmethod
+    def _split_base(path: str) -> Tuple[str, str]:
+        """
+        Returns (basename, basename without extension) for a POSIX path using
+        str.rpartition, with os.path.basename/splitext semantics (dotfiles keep
+        their name).
+        """
+        base_name = path.rpartition('/')[2]
+        root, dot, _ = base_name.rpartition('.')
+        return base_name, (root if dot and root.strip('.') else base_name)
+
+    def report_progress(self, job_id: str, stage: str, progress: float):
+        """
+        Publishes a progress update for a running stage. Updates are batched and
+        coalesced (latest per job) by the flusher thread, started on first use.
+        """
+        if self._progress_flusher is None:
+            self._progress_flusher = ProgressFlusher(self.progress_ring, self.db)
+            self._progress_flusher.start()
+        self.progress_ring.push(job_id, stage, progress)
+
+    def _queue_status(self, job_id: str, status: str, progress: float = None, notes: str = None):
+        """Holds a status update until the job's next _update_status / _flush_status."""
+        self._pending_status.setdefault(job_id, []).append((job_id, status, progress, notes))
+
+    async def _update_status(self, job_id: str, status: str, progress: float = None, notes: str = None):
+        """
+        Writes a stage transition, together with any queued updates for the job,
+        in one transaction without blocking the event loop on SQLite.
+        """
+        updates = self._pending_status.pop(job_id, [])
+        updates.append((job_id, status, progress, notes))
+        await asyncio.to_thread(self.db.update_job_statuses, updates)
+
+    async def _flush_status(self, job_id: str):
+        """Writes any queued status updates for the job."""
+        updates = self._pending_status.pop(job_id, None)
+        if updates:
+            await asyncio.to_thread(self.db.update_job_statuses, updates)
+
+    async def _run_subprocess(self, cmd: List[str], capture_stdout: bool = False,
+                              stdout_file: Optional[IO[bytes]] = None,
+                              stdin_file: Optional[IO[bytes]] = None) -> Tuple[str, str]:
+        """
+        Runs a command (no shell) as an asyncio subprocess. stderr is read as it is
+        written and only its last lines are kept for error notes; stdout is
+        discarded unless capture_stdout is set, or written straight into
+        stdout_file by the child. stdin_file, if given, is read by the child from
+        its current offset. Returns decoded (stdout, stderr) and raises
+        CalledProcessError on a non-zero exit code.
+        """
+        if stdout_file is not None:
+            stdout_target = stdout_file
+        else:
+            stdout_target = asyncio.subprocess.PIPE if capture_stdout else asyncio.subprocess.DEVNULL
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=stdin_file if stdin_file is not None else asyncio.subprocess.DEVNULL,
+            stdout=stdout_target,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stderr_tail = deque(maxlen=self.STDERR_TAIL_LINES)
+
+        async def drain_stderr():
+            async for line in process.stderr:
+                stderr_tail.append(line.decode(errors='replace'))
+
+        if capture_stdout and stdout_file is None:
+            # Both pipes are drained concurrently so neither can fill up and stall the child.
+            stdout, _ = await asyncio.gather(process.stdout.read(), drain_stderr())
+        else:
+            stdout = b""
+            await drain_stderr()
+        returncode = await process.wait()
+
+        stdout = stdout.decode(errors='replace')
+        stderr = ''.join(stderr_tail)
+        if returncode:
+            raise subprocess.CalledProcessError(returncode, cmd, output=stdout, stderr=stderr)
+        return stdout, stderr
+
+    async def _run_rsync(self, job_id: str, stage_status: str, rsync_cmd: List[str]):
+        """
+        Runs rsync and publishes each new whole-transfer percentage from its
+        --info=progress2 output as the stage's progress. rsync redraws that line
+        with carriage returns, so stdout is split on them as it is read and only
+        the unfinished fragment is kept. Raises CalledProcessError on failure.
+        """
+        process = await asyncio.create_subprocess_exec(
+            *rsync_cmd,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stderr_tail = deque(maxlen=self.STDERR_TAIL_LINES)
+
+        async def drain_stderr():
+            async for line in process.stderr:
+                stderr_tail.append(line.decode(errors='replace'))
+
+        async def read_progress():
+            pending, last_percent = b"", None
+            while chunk := await process.stdout.read(4096):
+                *updates, pending = re.split(rb'[\r\n]', pending + chunk)
+                for update in updates:
+                    match = _RSYNC_PERCENT.search(update)
+                    if match and match.group(1) != last_percent:
+                        last_percent = match.group(1)
+                        self.report_progress(job_id, stage_status, float(last_percent))
+
+        await asyncio.gather(read_progress(), drain_stderr())
+        returncode = await process.wait()
+        if returncode:
+            raise subprocess.CalledProcessError(returncode, rsync_cmd, stderr=''.join(stderr_tail))
+
+    def _build_ssh_cmd(self, share_connection: bool = True) -> List[str]:
+        """
+        Constructs the ssh invocation (identity + connection sharing) used by every
+        stage. share_connection=False opens a dedicated TCP connection instead.
+        """
+        ssh_cmd = ['ssh']
+        if self.SSH_KEY_PATH:
+            # Use -i to specify the identity file for SSH
+            ssh_cmd.extend(['-i', self.SSH_KEY_PATH])
+        if share_connection:
+            ssh_cmd.extend(self._ssh_opts)
+        else:
+            # ssh keeps the first value given for an option, so leave the control ones out.
+            ssh_cmd.extend(["-o", "ControlMaster=no", "-o", "ControlPath=none"])
+            for flag, value in zip(self._ssh_opts[::2], self._ssh_opts[1::2]):
+                if not value.startswith("Control"):
+                    ssh_cmd.extend([flag, value])
+        return ssh_cmd
+
+    def _build_rsync_cmd(self, src: str, dest: str, remove_source_files: bool = False) -> List[str]:
+        """
+        Constructs the base rsync command for either pull or push. With
+        remove_source_files, rsync deletes each local file once it is transferred.
+        """
         rsync_cmd = [
             self.RSYNC_PATH,
-            "-az",  # Archive mode, compress
+            "-a",  # Archive mode
             "--partial",  # Allow resuming
-            "--progress", # Show progress (for future parsing)
+            "--inplace",  # Write straight into the destination file, no temp copy
+            "--whole-file",  # No delta checksums: the destination never has an older copy
+            "--info=progress2",  # One whole-transfer progress line on stdout (see _run_rsync)
         ]
-        if self.SSH_KEY_PATH:
-            # Use -i to specify the identity file for SSH
-            rsync_cmd.extend(["-e", f"ssh -i {self.SSH_KEY_PATH}"])
+        if self.RSYNC_COMPRESS:
+            rsync_cmd.append("-z")
+        if self.RSYNC_BWLIMIT:
+            rsync_cmd.append(f"--bwlimit={self.RSYNC_BWLIMIT}")
+        rsync_cmd.extend(self.RSYNC_EXTRA_FLAGS)
+        if remove_source_files:
+            rsync_cmd.append("--remove-source-files")
+        # rsync splits the -e value into argv itself, so quote it as a shell line.
+        rsync_cmd.extend(["-e", shlex.join(self._build_ssh_cmd())])
             
         rsync_cmd.extend([src, dest])
         return rsync_cmd
 
-    def _run_rsync_transfer(self, job_id: str, src_path: str, dest_path: str, stage_status: str) -> bool:
+    @staticmethod
+    def _is_local_path(path: str) -> bool:
+        """True for plain paths; rsync remote targets are written HOST:PATH."""
+        return ':' not in path
+
+    def _storage_target(self, path: str) -> str:
+        """
+        Rsync target for a path on the storage machine. When the storage is on
+        this machine the plain path is used, which selects the local copy path.
+        """
+        if self.STORAGE_IS_LOCAL:
+            return path
+        return f"{self.RSYNC_USER}@{self.STORAGE_HOST}:{path}"
+
+    async def _run_rsync_transfer(self, job_id: str, src_path: str, dest_path: str, stage_status: str,
+                                  remove_source_files: bool = False) -> bool:
         """Handles PULL (from remote) or PUSH (to remote) using rsync."""
         
-        self.db.update_job_status(job_id, stage_status, notes=f"Starting {stage_status} transfer.")
-        print(f"Job {job_id}: {stage_status} in progress. Destination: {dest_path}")
+        await self._update_status(job_id, stage_status, notes=f"Starting {stage_status} transfer.")
+        logger.info("Job %s: %s in progress. Destination: %s", job_id, stage_status, dest_path)
 
         try:
-            rsync_cmd = self._build_rsync_cmd(src_path, dest_path)
-            
-            # Execute rsync (synchronous execution for this MVP)
-            result = subprocess.run(
-                rsync_cmd,
-                capture_output=True, 
-                text=True, 
-                check=True # Raise CalledProcessError if rsync fails
-            )
+            if self._is_local_path(src_path) and self._is_local_path(dest_path):
+                # Both ends on this machine: copy in-kernel instead of forking rsync.
+                await asyncio.to_thread(fastcopy.copy_file, src_path, dest_path, remove_source_files)
+            elif not await self._try_parallel_transfer(src_path, dest_path, remove_source_files):
+                rsync_cmd = self._build_rsync_cmd(src_path, dest_path, remove_source_files)
+
+                # Raises CalledProcessError if rsync fails
+                await self._run_rsync(job_id, stage_status, rsync_cmd)
             
-            print(f"Job {job_id} {stage_status} complete. Output:\n{result.stdout}")
-            self.db.update_job_status(job_id, stage_status + "_COMPLETE", 
-                                      notes=f"{stage_status} successful.")
+            logger.info("Job %s %s complete.", job_id, stage_status)
+            self._queue_status(job_id, stage_status + "_COMPLETE",
+                               notes=f"{stage_status} successful.")
             return True
 
         except subprocess.CalledProcessError as e:
             error_note = f"RSYNC {stage_status} FAILED. Command: {' '.join(e.cmd)}. Error: {e.stderr}"
-            print(error_note)
-            self.db.update_job_status(job_id, stage_status + "_FAILED", notes=error_note)
+            logger.error(error_note)
+            await self._update_status(job_id, stage_status + "_FAILED", notes=error_note)
             return False
         except Exception as e:
             error_note = f"Transfer failed due to unexpected error: {e}"
-            self.db.update_job_status(job_id, stage_status + "_FAILED", notes=error_note)
+            await self._update_status(job_id, stage_status + "_FAILED", notes=error_note)
             return False
 
-    def _run_remote_backup(self, job_id: str, remote_file: str) -> bool:
+    async def _try_parallel_transfer(self, src_path: str, dest_path: str, remove_source_files: bool) -> bool:
         """
-        Executes a remote SSH command on the Unix machine to copy the source file
-        to the archive path on the same machine.
+        Moves one large file between here and the storage host over several
+        concurrent ssh streams, each carrying a contiguous 1 MiB-aligned range
+        read/written in place with dd. Returns False, having done nothing, when
+        the transfer should use rsync instead (disabled, bwlimit set, small file).
+        Raises CalledProcessError if a stream fails.
         """
-        self.db.update_job_status(job_id, "BACKUP_SOURCE", notes="Executing remote copy command.")
-        print(f"Job {job_id}: BACKUP_SOURCE in progress. Source: {remote_file}")
+        if self.PARALLEL_STREAMS < 2 or self.RSYNC_BWLIMIT:
+            return False
+        pull = not self._is_local_path(src_path)
+        login, _, remote_path = (src_path if pull else dest_path).partition(':')
+        ssh_cmd = self._build_ssh_cmd() + [login]
+        # Multiplexed channels would share one TCP connection and cipher context,
+        # the very limit being worked around, so each range gets its own connection.
+        stream_cmd = self._build_ssh_cmd(share_connection=False) + [login]
+
+        if pull:
+            stdout, _ = await self._run_subprocess(ssh_cmd + ["wc -c < " + shlex.quote(remote_path)],
+                                                   capture_stdout=True)
+            size = int(stdout.strip())
+            local_file = dest_path
+            if os.path.isdir(local_file):
+                local_file = os.path.join(local_file, self._split_base(remote_path)[0])
+        else:
+            size = os.stat(src_path).st_size
+            local_file = src_path
+            # PUSH targets the destination directory, like rsync.
+            remote_path = remote_path.rstrip('/') + '/' + self._split_base(src_path)[0]
+        if size < self.PARALLEL_THRESHOLD_BYTES:
+            return False
 
-        # Command: ssh user@host "cp source_file archive_dir/"
-        remote_command = (
-            f"cp -f '{remote_file}' '{self.ARCHIVE_ROOT_DIR}/'"
-        )
+        block = 1024 * 1024
+        chunk_blocks = -(-size // (self.PARALLEL_STREAMS * block))
+        offsets = range(0, size, chunk_blocks * block)
+        quoted = shlex.quote(remote_path)
 
-        ssh_cmd = [
-            'ssh', 
-            '-i', self.SSH_KEY_PATH, 
-            f"{self.RSYNC_USER}@{self.STORAGE_HOST}",
-            remote_command
-        ]
+        if pull:
+            with open(local_file, 'wb') as f:
+                f.truncate(size)
+        else:
+            # dd conv=notrunc keeps stale bytes past the new end, so empty it first.
+            await self._run_subprocess(ssh_cmd + [": > " + quoted])
+
+        async def transfer_range(index: int, offset: int):
+            if pull:
+                with open(local_file, 'r+b') as out:
+                    out.seek(offset)
+                    await self._run_subprocess(stream_cmd + [
+                        f"dd if={quoted} bs={block} skip={index * chunk_blocks} count={chunk_blocks}"
+                    ], stdout_file=out)
+            else:
+                length = min(chunk_blocks * block, size - offset)
+                with open(local_file, 'rb') as source:
+                    source.seek(offset)
+                    # head bounds the range; dd writes it at its offset.
+                    await self._run_subprocess(stream_cmd + [
+                        f"head -c {length} | dd of={quoted} bs={block} seek={index * chunk_blocks} conv=notrunc"
+                    ], stdin_file=source)
+
+        await asyncio.gather(*(transfer_range(i, offset) for i, offset in enumerate(offsets)))
+        if remove_source_files:
+            os.remove(src_path)
+        return True
+
+    async def _run_remote_backup(self, job_id: str, remote_file: str) -> Optional[str]:
+        """
+        Executes a remote SSH command on the Unix machine to copy the source file
+        to the archive path on the same machine, then hashes both copies in the
+        same invocation to prove the archive matches. A mismatched copy is redone
+        once. Runs concurrently with the FFMPEG conversion, so it does not write
+        job status itself: returns None on success or an error note.
+        """
+        logger.info("Job %s: BACKUP_SOURCE in progress. Source: %s", job_id, remote_file)
+
+        archive_file = f"{self.ARCHIVE_ROOT_DIR}/{self._split_base(remote_file)[0]}"
+        # Command: ssh user@host "cp source_file archive_dir/ && sha256sum source archive"
+        # The remote side runs this through a shell, so quote both paths.
+        remote_command = shlex.join(["cp", "-f", remote_file, f"{self.ARCHIVE_ROOT_DIR}/"])
+        if self.VERIFY_BACKUP:
+            remote_command += " && " + shlex.join(["sha256sum", "--", remote_file, archive_file])
+
+        if not self.STORAGE_IS_LOCAL:
+            ssh_cmd = self._build_ssh_cmd() + [
+                f"{self.RSYNC_USER}@{self.STORAGE_HOST}",
+                remote_command
+            ]
+        else:
+            # Storage on this machine: run the same command without SSH.
+            ssh_cmd = ["sh", "-c", remote_command]
 
         try:
-            # Execute SSH command (synchronous)
-            result = subprocess.run(
-                ssh_cmd,
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            
-            if result.stderr:
-                # Cp errors often appear on stderr even with check=True
-                raise subprocess.CalledProcessError(1, ssh_cmd, stderr=result.stderr)
+            for attempt in range(2):
+                stdout, stderr = await self._run_subprocess(ssh_cmd, capture_stdout=self.VERIFY_BACKUP)
 
-            print(f"Job {job_id} BACKUP_SOURCE complete. Output:\n{result.stdout}")
-            self.db.update_job_status(job_id, "BACKUP_SOURCE_COMPLETE", progress=100.0, 
-                                      notes="Remote backup successful (SSH cp).")
-            return True
+                if stderr:
+                    # Cp errors often appear on stderr even with a zero exit code
+                    raise subprocess.CalledProcessError(1, ssh_cmd, stderr=stderr)
+
+                if not self.VERIFY_BACKUP or self._hashes_match(stdout):
+                    logger.info("Job %s BACKUP_SOURCE complete.", job_id)
+                    return None
+                logger.warning("Job %s: archive checksum mismatch (attempt %d).", job_id, attempt + 1)
+
+            return f"REMOTE BACKUP FAILED: archive copy {archive_file} does not match the source checksum."
 
         except subprocess.CalledProcessError as e:
             error_note = f"REMOTE BACKUP FAILED (SSH). Command: {' '.join(e.cmd)}. Error: {e.stderr}"
-            print(error_note)
-            self.db.update_job_status(job_id, "BACKUP_SOURCE_FAILED", notes=error_note)
-            return False
+            logger.error(error_note)
+            return error_note
         except Exception as e:
-            error_note = f"Remote backup failed due to unexpected error: {e}"
-            self.db.update_job_status(job_id, "BACKUP_SOURCE_FAILED", notes=error_note)
-            return False
+            return f"Remote backup failed due to unexpected error: {e}"
+
+    @staticmethod
+    def _hashes_match(sha256sum_output: str) -> bool:
+        """True if `sha256sum a b` printed the same digest for both files."""
+        # Names needing escapes are reported with a leading backslash on the digest.
+        digests = [line.split(maxsplit=1)[0].lstrip('\\')
+                   for line in sha256sum_output.splitlines() if line.strip()]
+        return len(digests) == 2 and digests[0] == digests[1]
+
+    async def _run_fused_pull_backup(self, job_id: str, remote_file: str,
+                                     local_file: str) -> Tuple[bool, Optional[str]]:
+        """
+        PULL and BACKUP in a single pass: the storage host reads the source once
+        and tee(1) writes the archive copy while the same bytes stream over SSH
+        into local_file. Records the PULL status itself and returns
+        (pulled, backup_error) where backup_error is None or an error note.
+        """
+        await self._update_status(job_id, "TRANSFERRING_IN", notes="Starting TRANSFERRING_IN transfer (with backup).")
+        logger.info("Job %s: TRANSFERRING_IN with BACKUP_SOURCE in progress. Destination: %s", job_id, local_file)
+
+        archive_file = f"{self.ARCHIVE_ROOT_DIR}/{self._split_base(remote_file)[0]}"
+        remote_command = shlex.join(["tee", "--", archive_file]) + " < " + shlex.quote(remote_file)
+        ssh_cmd = self._build_ssh_cmd() + [f"{self.RSYNC_USER}@{self.STORAGE_HOST}", remote_command]
+
+        try:
+            with open(local_file, 'wb') as out:
+                await self._run_subprocess(ssh_cmd, stdout_file=out)
+        except subprocess.CalledProcessError as e:
+            error_note = f"SSH TRANSFERRING_IN FAILED. Command: {' '.join(e.cmd)}. Error: {e.stderr}"
+            logger.error(error_note)
+            await self._update_status(job_id, "TRANSFERRING_IN_FAILED", notes=error_note)
+            return False, None
+        except Exception as e:
+            error_note = f"Transfer failed due to unexpected error: {e}"
+            await self._update_status(job_id, "TRANSFERRING_IN_FAILED", notes=error_note)
+            return False, None
+
+        logger.info("Job %s TRANSFERRING_IN complete.", job_id)
+        self._queue_status(job_id, "TRANSFERRING_IN_COMPLETE", notes="TRANSFERRING_IN successful.")
+        if not self.VERIFY_BACKUP:
+            return True, None
 
-    def _run_ffmpeg_conversion(self, job_id: str, local_input: str, local_output: str, command: str) -> bool:
+        # Both copies came from one stream, so the archive must hash like the local file.
+        try:
+            (stdout, _), local_digest = await asyncio.gather(
+                self._run_subprocess(
+                    self._build_ssh_cmd() + [f"{self.RSYNC_USER}@{self.STORAGE_HOST}",
+                                             shlex.join(["sha256sum", "--", archive_file])],
+                    capture_stdout=True),
+                asyncio.to_thread(self._sha256_file, local_file),
+            )
+        except subprocess.CalledProcessError as e:
+            return True, f"REMOTE BACKUP FAILED (SSH). Command: {' '.join(e.cmd)}. Error: {e.stderr}"
+        except Exception as e:
+            return True, f"Remote backup failed due to unexpected error: {e}"
+        if not stdout.strip() or stdout.split(maxsplit=1)[0].lstrip('\\') != local_digest:
+            return True, f"REMOTE BACKUP FAILED: archive copy {archive_file} does not match the pulled file."
+        logger.info("Job %s BACKUP_SOURCE complete.", job_id)
+        return True, None
+
+    @staticmethod
+    def _sha256_file(path: str) -> str:
+        """Hex SHA-256 of a local file, read in 1 MiB chunks."""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            while chunk := f.read(1024 * 1024):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    async def _probe_duration_us(self, local_input: str) -> Optional[float]:
+        """Returns the input's duration in microseconds via ffprobe, or None if unknown."""
+        try:
+            stdout, _ = await self._run_subprocess([
+                self.FFPROBE_PATH, '-v', 'error', '-show_entries', 'format=duration',
+                '-of', 'default=noprint_wrappers=1:nokey=1', local_input
+            ], capture_stdout=True)
+            return float(stdout.strip()) * 1_000_000
+        except (subprocess.CalledProcessError, OSError, ValueError):
+            return None
+
+    async def _select_hw_backend(self) -> Optional[str]:
+        """The hardware backend used in place of libx265, or None for software encoding."""
+        if not self._hw_backend_resolved:
+            if self.HW_ENCODER in HW_ENCODERS:
+                self._hw_backend = self.HW_ENCODER
+            elif self.HW_ENCODER == "auto":
+                self._hw_backend = await self._detect_hw_backend()
+            self._hw_backend_resolved = True
+        return self._hw_backend
+
+    async def _detect_hw_backend(self) -> Optional[str]:
+        """
+        Picks the first hardware HEVC encoder this FFMPEG build lists that can
+        actually encode a test frame here (builds often list encoders whose
+        device or driver is missing).
         """
-        Executes the FFMPEG conversion process using subprocess.
+        try:
+            encoders, _ = await self._run_subprocess([self.FFMPEG_PATH, '-hide_banner', '-encoders'],
+                                                     capture_stdout=True)
+        except (subprocess.CalledProcessError, OSError):
+            return None
+        for backend, encoder in HW_ENCODERS.items():
+            if encoder not in encoders:
+                continue
+            input_options, output_args = apply_hw_encoder(['-c:v', 'libx265'], backend, self.VAAPI_DEVICE)
+            try:
+                await self._run_subprocess([
+                    self.FFMPEG_PATH, '-hide_banner', '-loglevel', 'error', *input_options,
+                    '-f', 'lavfi', '-i', 'color=size=256x256:duration=0.1', '-frames:v', '1',
+                    *output_args, '-f', 'null', '-'
+                ])
+            except (subprocess.CalledProcessError, OSError):
+                continue
+            logger.info("Hardware encoder %s selected for libx265 jobs.", encoder)
+            return backend
+        logger.info("No usable hardware HEVC encoder found; libx265 jobs stay on the CPU.")
+        return None
+
+    @staticmethod
+    def _stored_ffmpeg_args(command: str) -> List[str]:
+        """
+        Returns the argv list saved by create_new_job. Rows written before the
+        command was stored pre-parsed hold the raw string, which is split here.
+        """
+        if command.startswith('['):
+            try:
+                return json.loads(command)
+            except ValueError:
+                pass
+        return shlex.split(command)
+
+    async def _run_ffmpeg_conversion(self, job_id: str, local_input: str, local_output: str, command: str) -> bool:
+        """
+        Executes the FFMPEG conversion process using subprocess, reporting live
+        progress parsed from FFMPEG's `-progress` key=value stream. FFMPEG writes
+        to a `.part` file that is renamed to local_output only on success.
         """
         
-        self.db.update_job_status(job_id, "PROCESSING", progress=0.0, notes="Starting FFMPEG conversion.")
-        print(f"Job {job_id}: FFMPEG conversion started. Local input: {local_input} - Output target: {local_output}") # Print correct local paths
+        await self._update_status(job_id, "PROCESSING", progress=0.0, notes="Starting FFMPEG conversion.")
+        logger.info("Job %s: FFMPEG conversion started. Local input: %s - Output target: %s", job_id, local_input, local_output)
 
         # 1. Construct the FFMPEG Command
         # The 'command' string must NOW only contain parameters like "-c:v libx265 -crf 28"
         
-        ffmpeg_cmd = [self.FFMPEG_PATH, '-i', local_input] # Use local_input here
-        ffmpeg_cmd.extend(command.split())
+        # Keep the real extension last so FFMPEG still picks the muxer from it.
+        output_root, output_ext = os.path.splitext(local_output)
+        partial_output = f"{output_root}.part{output_ext}"
+        os.makedirs(os.path.dirname(local_output), exist_ok=True)
+
+        ffmpeg_args = self._stored_ffmpeg_args(command)
+        input_options = []
+        hw_backend = await self._select_hw_backend()
+        if hw_backend:
+            input_options, ffmpeg_args = apply_hw_encoder(ffmpeg_args, hw_backend, self.VAAPI_DEVICE)
+
+        # argv list (no shell). Errors only on the log side: progress comes from -progress, not the log.
+        threads = str(self.FFMPEG_THREADS)
+        ffmpeg_cmd = [self.FFMPEG_PATH, '-hide_banner', '-loglevel', 'error',
+                      '-threads', threads, *input_options, '-i', local_input] # Use local_input here
+        # Encoder thread cap goes before the user parameters so they can override it.
+        ffmpeg_cmd.extend(['-threads', threads])
+        if _video_codec(ffmpeg_args) == 'libx265' and '-x265-params' not in ffmpeg_args:
+            # libx265 sizes its own thread pool from all cores and ignores -threads;
+            # pools=N gives it this job's share (WPP and frame threads scale with it).
+            ffmpeg_cmd.extend(['-x265-params', f'pools={threads}'])
+        ffmpeg_cmd.extend(ffmpeg_args)
+        # Machine-readable progress on stderr instead of the human stats line.
+        ffmpeg_cmd.extend(['-progress', 'pipe:2', '-nostats'])
         ffmpeg_cmd.append('-y') # Force overwrite for testing
-        ffmpeg_cmd.append(local_output)
+        ffmpeg_cmd.append(partial_output)
         
-        print(f"DEBUG: FFMPEG Command Array: {ffmpeg_cmd}") # Confirm final command array
+        logger.debug("FFMPEG Command: %s", ffmpeg_cmd)
+
+        duration_us = await self._probe_duration_us(local_input)
 
         try:
-            # 2. Execute the FFMPEG process LIVE
-            result = subprocess.run(
-                ffmpeg_cmd,
-                capture_output=True,
-                text=True,
-                check=True 
+            # 2. Execute the FFMPEG process LIVE, reading progress as it is written.
+            # Awaiting the pipe leaves the event loop free for other jobs meanwhile.
+            process = await asyncio.create_subprocess_exec(
+                *ffmpeg_cmd,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE
             )
+            # Progress and log lines share stderr; keep the log tail for error notes.
+            stderr_tail = deque(maxlen=self.STDERR_TAIL_LINES)
+            async for raw_line in process.stderr:
+                line = raw_line.decode(errors='replace')
+                key, sep, value = line.strip().partition('=')
+                if key in ('out_time_us', 'out_time_ms'):
+                    # out_time_ms is also in microseconds (a long-standing FFMPEG quirk).
+                    if duration_us and value.isdigit():
+                        percent = min(int(value) / duration_us * 100.0, 99.9)
+                        self.report_progress(job_id, "PROCESSING", round(percent, 1))
+                elif not sep or ' ' in key:
+                    # Ordinary log line (progress keys never contain spaces).
+                    stderr_tail.append(line)
+            returncode = await process.wait()
+            stderr_output = ''.join(stderr_tail)
+
+            if returncode != 0:
+                raise subprocess.CalledProcessError(returncode, ffmpeg_cmd, stderr=stderr_output)
             
-            # The synchronous call is complete. Update DB.
-            self.db.update_job_status(job_id, "PROCESSING_COMPLETE", progress=100.0, notes="FFMPEG finished successfully.")
+            # The process is complete. Update DB.
+            self._queue_status(job_id, "PROCESSING_COMPLETE", progress=100.0, notes="FFMPEG finished successfully.")
             
-            # Print FFMPEG output for debugging purposes
-            print(f"FFMPEG STDOUT:\n{result.stdout}")
-            print(f"FFMPEG STDERR (Errors/Warnings):\n{result.stderr}")
+            # FFMPEG output for debugging purposes (formatted only if DEBUG is enabled)
+            logger.debug("FFMPEG STDERR (Errors/Warnings):\n%s", stderr_output)
             
-            # 3. Final verification that the file exists on disk
-            if not os.path.exists(local_output):
-                raise FileNotFoundError(f"FFMPEG reported success, but file was not found at {local_output}")
+            # 3. Final verification that the file exists on disk, then publish it atomically
+            if not os.path.exists(partial_output):
+                raise FileNotFoundError(f"FFMPEG reported success, but file was not found at {partial_output}")
+            os.replace(partial_output, local_output)
 
             return True
 
         except subprocess.CalledProcessError as e:
             error_note = f"FFMPEG EXECUTION FAILED. Command exited with code {e.returncode}. STDERR: {e.stderr}"
-            print(error_note)
-            self.db.update_job_status(job_id, "PROCESSING_FAILED", notes=error_note)
+            logger.error(error_note)
+            await self._update_status(job_id, "PROCESSING_FAILED", notes=error_note)
             return False
         except FileNotFoundError as e:
             error_note = f"FFMPEG failed to create output file: {e}"
-            print(error_note)
-            self.db.update_job_status(job_id, "PROCESSING_FAILED", notes=error_note)
+            logger.error(error_note)
+            await self._update_status(job_id, "PROCESSING_FAILED", notes=error_note)
             return False
         except Exception as e:
             error_note = f"Unexpected error during FFMPEG process: {e}"
-            print(error_note)
-            self.db.update_job_status(job_id, "PROCESSING_FAILED", notes=error_note)
+            logger.error(error_note)
+            await self._update_status(job_id, "PROCESSING_FAILED", notes=error_note)
             return False
 
     def _get_final_remote_path(self, job_id: str, remote_push_destination: str, local_output_file: str) -> str:
@@ -236,70 +869,100 @@ class JobManager:
         
         return remote_final_path
 
-    def run_job_pipeline(self, job_id: str, skip_cleanup: bool = False): # ADDED skip_cleanup flag
-        """Orchestrates the 4-stage job pipeline."""
+    async def run_job_pipeline(self, job_id: str, skip_cleanup: bool = False): # ADDED skip_cleanup flag
+        """
+        Orchestrates the 4-stage job pipeline (backup and conversion overlap).
+        A coroutine: every stage runs as an asyncio subprocess, so one event loop
+        can drive many jobs (and keep answering) while transfers and encodes run.
+        """
+        try:
+            await self._run_job_stages(job_id, skip_cleanup)
+        finally:
+            # Whatever path the pipeline took, no queued status may be lost.
+            await self._flush_status(job_id)
+
+    async def _run_job_stages(self, job_id: str, skip_cleanup: bool):
+        """Runs the pipeline stages; see run_job_pipeline."""
         
-        job_data = self.db.get_job(job_id)
+        job_data = await asyncio.to_thread(self.db.get_job, job_id)
         if not job_data:
-            print(f"Error: Job {job_id} not found.")
+            logger.error("Job %s not found.", job_id)
             return
 
         # 1. --- Define Paths ---
         remote_source_file = job_data['input_file']
-        base_filename = os.path.basename(remote_source_file)
+        base_filename, _ = self._split_base(remote_source_file)
         
         # Local paths
-        local_temp_file = os.path.join(self.LOCAL_TEMP_DIR, base_filename)
-        local_output_file_uuid = job_data['output_file'] # Original file with UUID prefix
-        
-        # Final desired local output path (without UUID)
-        local_output_file_final = os.path.join(self.LOCAL_OUTPUT_DIR, base_filename)
+        local_temp_file = self._temp_dir_slash + base_filename
+        local_output_file = job_data['output_file'] # Final name; FFMPEG writes it directly
 
 
         # Remote/Rsync Targets (USER@HOST:PATH)
-        remote_pull_source = f"{self.RSYNC_USER}@{self.STORAGE_HOST}:{remote_source_file}"
-        remote_push_destination_root = f"{self.RSYNC_USER}@{self.STORAGE_HOST}:{os.path.dirname(remote_source_file)}"
+        remote_pull_source = self._storage_target(remote_source_file)
+        remote_push_destination_root = self._storage_target(os.path.dirname(remote_source_file))
         
-        print(f"Job {job_id} starting pipeline. Source: {remote_source_file}")
-
-        # --- STAGE 1: PULL (Transfer to Linux Temp) ---
-        if not self._run_rsync_transfer(job_id, remote_pull_source, self.LOCAL_TEMP_DIR, "TRANSFERRING_IN"):
-            return 
+        logger.info("Job %s starting pipeline. Source: %s", job_id, remote_source_file)
+
+        # --- STAGE 2: BACKUP (Remote SSH Copy), overlapped with STAGES 1 + 3 ---
+        # The backup runs entirely on the Unix machine and shares no data with the
+        # local PULL -> PROCESS path, so it starts right away. It only has to
+        # finish before STAGE 4, whose push can overwrite the source file (same
+        # name for .mp4 sources). Wall time becomes max(PULL + PROCESS, BACKUP) + PUSH.
+        if self.FUSE_PULL_AND_BACKUP and not self.STORAGE_IS_LOCAL:
+            # --- STAGES 1 + 2 fused: one read of the source feeds both copies ---
+            pulled, fused_backup_error = await self._run_fused_pull_backup(job_id, remote_source_file, local_temp_file)
+            backup_task = asyncio.get_running_loop().create_future()
+            backup_task.set_result(fused_backup_error)
+        else:
+            backup_task = asyncio.create_task(self._run_remote_backup(job_id, remote_source_file))
 
-        # --- STAGE 2: BACKUP (Remote SSH Copy on Unix Machine) ---
-        if not self._run_remote_backup(job_id, remote_source_file):
+            # --- STAGE 1: PULL (Transfer to Linux Temp) ---
+            pulled = await self._run_rsync_transfer(job_id, remote_pull_source, self.LOCAL_TEMP_DIR, "TRANSFERRING_IN")
+        if not pulled:
+            # The backup writes no status, so letting it finish cannot mask this failure.
+            await asyncio.gather(backup_task, return_exceptions=True)
             return 
 
         # --- STAGE 3: PROCESS (FFMPEG Conversion) ---
         # The input file MUST be the local temp file, which was pulled in Stage 1.
-        if not self._run_ffmpeg_conversion(job_id, local_temp_file, local_output_file_uuid, job_data['ffmpeg_command']):
-            return
+        processed = await self._run_ffmpeg_conversion(job_id, local_temp_file, local_output_file, job_data['ffmpeg_command'])
+        backup_error, = await asyncio.gather(backup_task, return_exceptions=True)
+        if isinstance(backup_error, BaseException):
+            backup_error = f"Remote backup failed due to unexpected error: {backup_error}"
 
-        # --- INTERMEDIATE STEP: Rename Local Output to Final Name (No UUID) ---
-        if os.path.exists(local_output_file_uuid):
-            os.rename(local_output_file_uuid, local_output_file_final)
-            print(f"Job {job_id}: Renamed local output to final name: {local_output_file_final}")
-        else:
-            self.db.update_job_status(job_id, "PROCESSING_FAILED", notes="FFMPEG did not create output file for rename.")
+        if not processed:
             return
-
-        # --- STAGE 4: PUSH (Transfer Renamed File back to Unix Source Location) ---
-        # Source is now the file with the clean name. Destination is the directory root.
-        if not self._run_rsync_transfer(job_id, local_output_file_final, remote_push_destination_root, "TRANSFERRING_OUT"):
+        if backup_error:
+            # The converted output is kept locally so the job can be pushed by hand.
+            await self._update_status(job_id, "BACKUP_SOURCE_FAILED",
+                                      notes=f"{backup_error} Converted output kept at {local_output_file}.")
+            return
+        self._queue_status(job_id, "BACKUP_SOURCE_COMPLETE", progress=100.0,
+                           notes="Remote backup successful (SSH cp).")
+
+        # --- STAGE 4: PUSH (Transfer Output back to Unix Source Location) ---
+        # Destination is the directory root. Unless cleanup is skipped, rsync removes
+        # the local output once it has been transferred.
+        if not await self._run_rsync_transfer(job_id, local_output_file, remote_push_destination_root, "TRANSFERRING_OUT",
+                                              remove_source_files=not skip_cleanup):
             return 
 
         # --- STAGE 5: Cleanup and Finalization ---
         if not skip_cleanup: # Only run cleanup if the flag is False
-            # Final cleanup: Remove local working files
-            local_temp_file = os.path.join(self.LOCAL_TEMP_DIR, base_filename) # Need local paths again
-            local_output_file_final = os.path.join(self.LOCAL_OUTPUT_DIR, base_filename)
-            
+            # Final cleanup: Remove the pulled input (the output went with the PUSH)
             if os.path.exists(local_temp_file): os.remove(local_temp_file)
-            if os.path.exists(local_output_file_final): os.remove(local_output_file_final)
-            print("Cleanup complete.")
+            # rsync removes the pushed file but leaves its per-job directory.
+            job_output_dir = self._out_dir_slash + job_id
+            if os.path.dirname(local_output_file) == job_output_dir:
+                try:
+                    os.rmdir(job_output_dir)
+                except OSError:
+                    pass
+            logger.info("Job %s cleanup complete.", job_id)
         else:
-            print("Cleanup skipped for testing purposes.")
+            logger.info("Job %s cleanup skipped for testing purposes.", job_id)
 
 
-        self.db.update_job_status(job_id, "COMPLETED", notes="All stages successful.")
-        print(f"Job {job_id} pipeline fully completed and archived.")
\ No newline at end of file
+        await self._update_status(job_id, "COMPLETED", notes="All stages successful.")
+        logger.info("Job %s pipeline fully completed and archived.", job_id)
\ No newline at end of file
@@ -8,7 +8,6 @@ from typing import Optional
 # Add the parent directory to the path for local module imports
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from ffmpeg_tools.api import app
 from ffmpeg_tools.config import ConfigManager
 
 if __name__ == "__main__":
@@ -30,6 +29,9 @@ if __name__ == "__main__":
         
         HOST: str = config_manager.get("api_host", "0.0.0.0")
         PORT: int = int(config_manager.get("api_port", 5001))
+        WORKERS: int = int(config_manager.get("api_workers", os.cpu_count() or 1))
+        # "warning" drops the per-request access log line written to stdout.
+        LOG_LEVEL: str = config_manager.get("api_log_level", "warning")
 
         print("Configuration loaded successfully.")
     except Exception as e:
@@ -38,8 +40,11 @@ if __name__ == "__main__":
 
     # 2. Start Uvicorn Server
     try:
-        print(f"Service starting on {HOST}:{PORT}")
-        uvicorn.run(app, host=HOST, port=PORT, log_level="info")
+        print(f"Service starting on {HOST}:{PORT} with {WORKERS} worker(s)")
+        # Multiple workers need the app as an import string so each process loads
+        # its own copy. uvloop/httptools come with uvicorn[standard].
+        uvicorn.run("ffmpeg_tools.api:app", host=HOST, port=PORT, workers=WORKERS,
+                    loop="uvloop", http="httptools", log_level=LOG_LEVEL)
     except Exception as e:
         print(f"Uvicorn server failed to start: {e}")
         sys.exit(1)
\ No newline at end of file
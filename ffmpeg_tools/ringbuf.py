@@ -0,0 +1,88 @@
+# ffmpeg_tools/ringbuf.py
+
+import itertools
+import threading
+from typing import Dict, List, Tuple
+
+
+class ProgressRing:
+    """
+    Bounded multi-producer / single-consumer ring of (job_id, stage, progress)
+    updates. Producers (progress parsers, one per running job) reserve a slot with
+    a fetch-and-add on the tail ticket counter and never take a lock; the single
+    consumer drains published slots in order.
+
+    Progress is "latest value wins", so when producers lap a slow consumer the
+    overwritten (older) updates are simply skipped.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        if capacity <= 0 or capacity & (capacity - 1):
+            raise ValueError("ProgressRing capacity must be a power of two.")
+        self._mask = capacity - 1
+        self._slots: List[Tuple[str, str, float]] = [None] * capacity
+        # Ticket of the update currently stored in each slot (-1 = never written).
+        self._published = [-1] * capacity
+        # next() on itertools.count is atomic under the GIL: a lock-free fetch-and-add.
+        self._tail = itertools.count()
+        self._head = 0
+
+    def push(self, job_id: str, stage: str, progress: float):
+        """Producer side: publishes one progress update."""
+        ticket = next(self._tail)
+        index = ticket & self._mask
+        self._slots[index] = (job_id, stage, progress)
+        self._published[index] = ticket
+
+    def drain(self) -> List[Tuple[str, str, float]]:
+        """Consumer side: returns every update published since the last drain, in order."""
+        batch = []
+        while True:
+            index = self._head & self._mask
+            ticket = self._published[index]
+            if ticket < self._head:
+                # Slot not yet (re)written for this lap: nothing more to read.
+                break
+            if ticket == self._head:
+                batch.append(self._slots[index])
+            # ticket > head: the slot was overwritten by a newer lap; skip the lost update.
+            self._head += 1
+        return batch
+
+
+class ProgressFlusher:
+    """
+    Single consumer thread that drains a ProgressRing every `interval` seconds and
+    writes the batch in one transaction, one row per job (the latest progress wins).
+    """
+
+    def __init__(self, ring: ProgressRing, db_manager, interval: float = 0.5):
+        self.ring = ring
+        self.db = db_manager
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="progress-flusher", daemon=True)
+
+    def start(self):
+        """Starts the background flush loop."""
+        self._thread.start()
+
+    def stop(self):
+        """Stops the flush loop after writing any remaining updates."""
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+
+    def flush(self):
+        """Drains the ring and writes the latest update per job in a single batch."""
+        latest: Dict[str, Tuple[str, float]] = {}
+        for job_id, stage, progress in self.ring.drain():
+            latest[job_id] = (stage, progress)
+        if latest:
+            self.db.update_job_progress_batch(
+                [(job_id, stage, progress) for job_id, (stage, progress) in latest.items()]
+            )
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
@@ -0,0 +1,67 @@
+# ffmpeg_tools/tasks.py
+
+import os
+import sys
+from typing import Dict, Any
+
+from arq.connections import RedisSettings
+
+# Ensure local imports work when the worker is launched from the project root:
+#   arq ffmpeg_tools.tasks.WorkerSettings
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ffmpeg_tools.config import ConfigManager
+from ffmpeg_tools.database import JobDatabaseManager
+from ffmpeg_tools.job_manager import (JobManager, get_max_concurrent_jobs, start_queue_logging,
+                                      use_pidfd_child_watcher)
+
+
+def get_redis_settings(config_manager: ConfigManager) -> RedisSettings:
+    """Builds the ARQ Redis connection settings shared by the API and the worker."""
+    return RedisSettings(
+        host=config_manager.get("redis_host", "localhost"),
+        port=int(config_manager.get("redis_port", 6379)),
+    )
+
+
+# --- Worker Lifecycle ---
+
+async def startup(ctx: Dict[str, Any]):
+    """Creates one ConfigManager/DB/JobManager set per worker process."""
+    use_pidfd_child_watcher()
+    ctx['log_listener'] = start_queue_logging()
+    config_manager = ConfigManager.shared()
+    db_manager = JobDatabaseManager(config_manager.get("database_path"))
+    ctx['db_manager'] = db_manager
+    ctx['job_manager'] = JobManager(config_manager, db_manager)
+
+
+async def shutdown(ctx: Dict[str, Any]):
+    """Closes the worker's database connection and flushes queued log records."""
+    ctx['db_manager'].close()
+    ctx['log_listener'].stop()
+
+
+# --- Tasks ---
+
+async def run_ffmpeg_task(ctx: Dict[str, Any], job_id: str):
+    """
+    Executes the multi-stage pipeline for a job previously persisted by the API
+    with SUBMITTED status. The pipeline is a coroutine, so concurrent jobs share
+    the worker's event loop.
+    """
+    await ctx['job_manager'].run_job_pipeline(job_id)
+
+
+class WorkerSettings:
+    """
+    ARQ worker configuration. Run with: arq ffmpeg_tools.tasks.WorkerSettings
+    Jobs beyond max_jobs wait in the Redis queue, which provides the backpressure.
+    """
+    functions = [run_ffmpeg_task]
+    on_startup = startup
+    on_shutdown = shutdown
+    redis_settings = get_redis_settings(ConfigManager.shared())
+    max_jobs = get_max_concurrent_jobs(ConfigManager.shared())
+    # ARQ's 5 minute default would cancel any real transcode.
+    job_timeout = int(ConfigManager.shared().get("job_timeout_seconds", 6 * 60 * 60))
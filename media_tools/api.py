@@ -2,15 +2,19 @@
 
 import os
 import json
+import asyncio
 import logging
-import subprocess
 import re
-from fastapi import FastAPI, HTTPException
+from collections import OrderedDict
+import orjson
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 
 # Import the local config manager
 from .config import ConfigManager
+from . import fastprobe
 
 # --- Logging Setup ---
 logging.basicConfig(level=logging.INFO)
@@ -21,77 +25,232 @@ class FilePath(BaseModel):
     """Schema for requesting metadata for a specific file."""
     file_path: str
 
+class FilePathBatch(BaseModel):
+    """Schema for requesting metadata for several files in one call."""
+    file_paths: List[str]
+
 
 # --- Core Logic and Utilities ---
 # Initialize Configuration
-config_manager = ConfigManager()
+config_manager = ConfigManager.shared()
+
+# Line-delimited alternative to the JSON array, chosen via the Accept header.
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Common media extensions picked up by /scan-files.
+MEDIA_EXTENSIONS = frozenset({'.mkv', '.mp4', '.mov'})
+
+# ffprobe read limits: bytes read and microseconds of media analyzed.
+FFPROBE_PROBESIZE = int(config_manager.get("ffprobe_probesize", 5_000_000))
+FFPROBE_ANALYZEDURATION_US = int(config_manager.get("ffprobe_analyzeduration_us", 5_000_000))
+# Files up to this size are first read by the pure-Python header parser
+# (media_tools/fastprobe.py), which saves the ffprobe fork/exec.
+FASTPROBE_MAX_BYTES = int(config_manager.get("fastprobe_max_bytes", 2 * 1024 ** 3))
+
+# Everything but the file path is fixed, so the argv prefix is built once.
+# Only the fields _parse_ffprobe_output reads; format=bit_rate is the fallback
+# for the overall bitrate. Probing is capped to the first ~5 MB / 5 s, which
+# is enough for MP4/MKV headers and keeps large files from being read far.
+_FFPROBE_CMD_PREFIX = (
+    'ffprobe',
+    '-v', 'error',
+    '-probesize', str(FFPROBE_PROBESIZE),
+    '-analyzeduration', str(FFPROBE_ANALYZEDURATION_US),
+    '-threads', '0',
+    '-select_streams', 'v:0,a:0',
+    '-show_entries', 'stream=codec_name,codec_type,width,height,channels,bit_rate:format=bit_rate',
+    '-of', 'json',
+)
 
-def _get_live_ffprobe_metadata(file_path: str) -> Dict[str, Any]:
+async def _get_live_ffprobe_metadata(file_path: str) -> Dict[str, Any]:
     """
     Executes the ffprobe command to get REAL structured media metadata,
-    using robust parsing logic for the returned JSON structure.
+    using robust parsing logic for the returned JSON structure. Awaits the
+    subprocess, so concurrent probes only cost the event loop a pipe read.
     """
-    logger.info(f"Executing ffprobe for file: {file_path}")
-    
-    # We add '-show_format' to get the overall bitrate (bit_rate) and duration
-    command = [
-        'ffprobe',
-        '-v', 'error',
-        '-select_streams', 'v:0,a:0',
-        '-show_entries', 'stream=codec_name,width,height,channels,bit_rate',
-        '-show_format',  # Request overall format info for total bitrate
-        '-of', 'json',
-        file_path
-    ]
+    logger.debug("Executing ffprobe for file: %s", file_path)
 
     try:
-        result = subprocess.run(command, capture_output=True, text=True, check=True)
-        
-        # DEBUGGING: Log the raw JSON output for inspection
-        logger.info(f"FFPROBE RAW OUTPUT: {result.stdout.strip()}")
+        process = await asyncio.create_subprocess_exec(
+            *_FFPROBE_CMD_PREFIX, file_path, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate()
+        stderr = stderr.decode(errors='replace')
+        if process.returncode != 0:
+            logger.error("ffprobe failed for %s. Error: %s", file_path, stderr.strip())
+            if "command not found" in stderr.lower() or "no such file or directory" in stderr.lower():
+                raise HTTPException(status_code=500, detail="FFPROBE_NOT_FOUND: ffprobe utility is not installed or not in PATH.")
+            return {}
 
-        data = json.loads(result.stdout)
-        
-        metadata = {
-            "file_path": file_path,
-            "video_codec": None,
-            "resolution": None,
-            "audio_channels": 0,
-            "bitrate_kbps": 0
-        }
-
-        # 1. Iterate through streams to extract video and audio data
-        for stream in data.get('streams', []):
-            # Check for Video Stream: If it has width/height, it's video
-            if stream.get('width') and stream.get('height'):
-                metadata['video_codec'] = stream.get('codec_name', '').upper()
-                metadata['resolution'] = f"{stream['width']}x{stream['height']}"
-            
-            # Check for Audio Stream: If it has channels, it's audio (and not already identified as video)
-            elif stream.get('channels'):
-                channels = stream.get('channels', 0)
-                # Keep the max channel count if multiple audio streams are found
-                if channels > metadata['audio_channels']:
-                    metadata['audio_channels'] = channels
-            
-            # Use stream bit_rate if present, preferring it over overall format bitrate
-            if 'bit_rate' in stream and stream['bit_rate']:
-                metadata['bitrate_kbps'] = max(metadata['bitrate_kbps'], int(stream['bit_rate']) // 1000)
-
-        # 2. Fallback: Use overall format bitrate if individual stream bitrates are missing
-        if metadata['bitrate_kbps'] == 0 and data.get('format', {}).get('bit_rate'):
-            metadata['bitrate_kbps'] = int(data['format']['bit_rate']) // 1000
-            
-        return metadata
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("FFPROBE RAW OUTPUT: %s", stdout.decode(errors='replace'))
+        # Parsed straight from the raw bytes; no text decode of the payload.
+        return _parse_ffprobe_output(file_path, orjson.loads(stdout))
 
-    except subprocess.CalledProcessError as e:
-        logger.error(f"ffprobe failed for {file_path}. Error: {e.stderr.strip()}")
-        if "command not found" in e.stderr.lower() or "no such file or directory" in e.stderr.lower():
-             raise HTTPException(status_code=500, detail="FFPROBE_NOT_FOUND: ffprobe utility is not installed or not in PATH.")
-        return {}
+    except HTTPException:
+        raise
+    except FileNotFoundError:
+        raise HTTPException(status_code=500, detail="FFPROBE_NOT_FOUND: ffprobe utility is not installed or not in PATH.")
     except Exception as e:
-        logger.error(f"Unexpected error during ffprobe parsing: {e}")
+        logger.error("Unexpected error during ffprobe parsing: %s", e)
+        return {}
+
+
+def _parse_ffprobe_output(file_path: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduces ffprobe's JSON output to the metadata fields the orchestrator uses."""
+    metadata = {
+        "file_path": file_path,
+        "video_codec": None,
+        "resolution": None,
+        "audio_channels": 0,
+        "bitrate_kbps": 0
+    }
+
+    max_bit_rate = 0
+
+    # 1. Iterate through streams to extract video and audio data
+    for stream in data.get('streams', []):
+        # Check for Video Stream: If it has width/height, it's video
+        if stream.get('width') and stream.get('height'):
+            metadata['video_codec'] = stream.get('codec_name', '').upper()
+            metadata['resolution'] = f"{stream['width']}x{stream['height']}"
+        
+        # Check for Audio Stream: If it has channels, it's audio (and not already identified as video)
+        elif stream.get('channels'):
+            channels = stream.get('channels', 0)
+            # Keep the max channel count if multiple audio streams are found
+            if channels > metadata['audio_channels']:
+                metadata['audio_channels'] = channels
+        
+        # Use stream bit_rate if present, preferring it over overall format bitrate
+        bit_rate = stream.get('bit_rate')
+        if bit_rate:
+            max_bit_rate = max(max_bit_rate, int(bit_rate))
+
+    # 2. Fallback: Use overall format bitrate if individual stream bitrates are missing
+    if max_bit_rate < 1000:  # i.e. 0 kbps
+        max_bit_rate = int(data.get('format', {}).get('bit_rate') or 0)
+
+    # Kept in bits/s above; converted once.
+    metadata['bitrate_kbps'] = max_bit_rate // 1000
+    return metadata
+
+
+class _ProbeCache:
+    """
+    LRU of probe results keyed on the file's identity (path, mtime_ns, size): a
+    changed file is a new key, so stale entries simply age out. Values are
+    stored as immutable tuples of items so callers cannot mutate a shared entry.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, int, int], Tuple[Tuple[str, Any], ...]]" = OrderedDict()
+
+    def get(self, key: Tuple[str, int, int]) -> Optional[Dict[str, Any]]:
+        items = self._entries.get(key)
+        if items is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return dict(items)
+
+    def put(self, key: Tuple[str, int, int], metadata: Dict[str, Any]):
+        self._entries[key] = tuple(metadata.items())
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+    def info(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses,
+                "maxsize": self.maxsize, "currsize": len(self._entries)}
+
+
+_probe_cache = _ProbeCache(maxsize=4096)
+# Concurrent ffprobe processes are capped at the core count; created per event loop.
+_probe_semaphore: Optional[asyncio.Semaphore] = None
+_probe_semaphore_loop = None
+
+
+def _get_probe_semaphore() -> asyncio.Semaphore:
+    """Returns the probe semaphore for the running event loop."""
+    global _probe_semaphore, _probe_semaphore_loop
+    loop = asyncio.get_running_loop()
+    if _probe_semaphore is None or _probe_semaphore_loop is not loop:
+        _probe_semaphore = asyncio.Semaphore(os.cpu_count() or 1)
+        _probe_semaphore_loop = loop
+    return _probe_semaphore
+
+
+def _sidecar_path(file_path: str) -> str:
+    """Hidden per-file probe cache next to the media file: dir/.name.cinchro-probe.json"""
+    head, sep, name = file_path.rpartition('/')
+    return f"{head}{sep}.{name}.cinchro-probe.json"
+
+
+def _read_sidecar(file_path: str, mtime_ns: int, size: int) -> Optional[Dict[str, Any]]:
+    """Returns the persisted probe result if it was taken from this exact file version."""
+    try:
+        with open(_sidecar_path(file_path), 'r') as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if entry.get("mtime_ns") == mtime_ns and entry.get("size") == size:
+        return entry.get("metadata") or None
+    return None
+
+
+def _write_sidecar(file_path: str, mtime_ns: int, size: int, metadata: Dict[str, Any]):
+    """Persists a probe result; best effort, since media directories may be read-only."""
+    sidecar = _sidecar_path(file_path)
+    try:
+        with open(sidecar + ".tmp", 'w') as f:
+            json.dump({"mtime_ns": mtime_ns, "size": size, "metadata": metadata}, f)
+        os.replace(sidecar + ".tmp", sidecar)
+    except OSError as e:
+        logger.warning("Could not write probe sidecar %s: %s", sidecar, e)
+
+
+async def get_ffprobe_metadata(file_path: str) -> Dict[str, Any]:
+    """
+    Returns ffprobe metadata for file_path, reusing the result until the file
+    changes. With probe_sidecar_cache enabled, results also survive restarts in
+    a sidecar file next to the media.
+    """
+    try:
+        st = await asyncio.to_thread(os.stat, file_path)
+    except OSError as e:
+        logger.error("Cannot stat %s: %s", file_path, e)
         return {}
+    key = (file_path, st.st_mtime_ns, st.st_size)
+    metadata = _probe_cache.get(key)
+    if metadata is not None:
+        return metadata
+
+    use_sidecar = str(config_manager.get("probe_sidecar_cache", False)).lower() in ("1", "true", "yes")
+    if use_sidecar:
+        metadata = await asyncio.to_thread(_read_sidecar, *key)
+    if metadata is None and st.st_size <= FASTPROBE_MAX_BYTES:
+        try:
+            metadata = await asyncio.to_thread(fastprobe.probe, file_path)
+        except Exception as e:
+            logger.debug("Fast path unavailable for %s, using ffprobe: %s", file_path, e)
+    if metadata is None:
+        async with _get_probe_semaphore():
+            metadata = await _get_live_ffprobe_metadata(file_path)
+        # Failed probes are not cached, so a transient failure is retried next time.
+        if metadata and use_sidecar:
+            await asyncio.to_thread(_write_sidecar, *key, metadata)
+    if metadata:
+        _probe_cache.put(key, metadata)
+    return metadata
 
 
 # --- FastAPI Application ---
@@ -105,49 +264,118 @@ def get_service_status():
     return {"status": "ok", "service": "Cinchro Media Tools", "machine": "Unix"}
 
 
+def _has_media_extension(name: str) -> bool:
+    """
+    Set lookup on the lower-cased suffix only, not the whole file name. Hidden
+    entries are rejected up front: macOS AppleDouble files ("._Film.mkv") carry
+    a media extension but are metadata, not media.
+    """
+    if name[0] == '.':
+        return False
+    dot = name.rfind('.')
+    return dot != -1 and name[dot:].lower() in MEDIA_EXTENSIONS
+
+
+def _list_media_files(path: str) -> List[str]:
+    """
+    Media files directly under one monitored path. os.scandir reuses the
+    directory entry's cached file type, so no stat() per entry; the cheap
+    name check runs first so non-media entries never reach is_file().
+    """
+    try:
+        with os.scandir(path) as entries:
+            return [entry.path for entry in entries
+                    if _has_media_extension(entry.name) and entry.is_file()]
+    except FileNotFoundError:
+        logger.warning(f"Monitored path does not exist or is inaccessible: {path}")
+    except PermissionError:
+        logger.error(f"Permission denied accessing path: {path}")
+    except Exception as e:
+        logger.error(f"Error during scan of {path}: {e}")
+    return []
+
+
+async def _iter_media_files(monitored_paths: List[str]) -> AsyncIterator[str]:
+    """
+    Scans every monitored path concurrently on worker threads and yields each
+    directory's files as soon as that directory is done.
+    """
+    scans = [asyncio.create_task(asyncio.to_thread(_list_media_files, path)) for path in monitored_paths]
+    for scan in asyncio.as_completed(scans):
+        for file_path in await scan:
+            yield file_path
+
+
+async def _stream_json_array(items: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    """Encodes an async iterator of strings as a JSON array, one element at a time."""
+    separator = b"["
+    count = 0
+    async for item in items:
+        # orjson encodes straight to bytes; Starlette would otherwise re-encode each str chunk.
+        yield separator + orjson.dumps(item)
+        separator = b","
+        count += 1
+    yield b"[]" if count == 0 else b"]"
+    logger.info(f"Scan complete. Found {count} files.")
+
+
+async def _stream_ndjson(items: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    """Encodes an async iterator of strings as NDJSON: one JSON string per line."""
+    count = 0
+    async for item in items:
+        yield orjson.dumps(item) + b"\n"
+        count += 1
+    logger.info(f"Scan complete. Found {count} files.")
+
+
 @app.get("/scan-files", response_model=List[str])
-def scan_media_paths() -> List[str]:
-    # ... (scan_media_paths function remains the same, it is already live) ...
+async def scan_media_paths(request: Request) -> StreamingResponse:
+    """
+    Streams the media files found under the monitored paths as a JSON array,
+    or as NDJSON (one path per line) when the client accepts
+    application/x-ndjson. Directories are scanned in parallel off the event
+    loop, and clients start receiving paths before the whole scan finishes.
+    """
     monitored_paths = config_manager.get("monitored_paths", [])
-    all_found_files = [] 
-    
     logger.info(f"Executing REAL file system scan for: {monitored_paths}")
-
-    for path in monitored_paths:
-        try:
-            if not os.path.isdir(path):
-                logger.warning(f"Monitored path does not exist or is inaccessible: {path}")
-                continue
-
-            for item in os.listdir(path):
-                full_path = os.path.join(path, item)
-                
-                if os.path.isfile(full_path):
-                    # Filter for common media extensions
-                    if item.lower().endswith(('.mkv', '.mp4', '.mov')):
-                        all_found_files.append(full_path)
-
-        except PermissionError:
-            logger.error(f"Permission denied accessing path: {path}")
-        except Exception as e:
-            logger.error(f"Error during scan of {path}: {e}")
-    
-    logger.info(f"Scan complete. Found {len(all_found_files)} files.")
-    return all_found_files 
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        return StreamingResponse(_stream_ndjson(_iter_media_files(monitored_paths)), media_type=NDJSON_MEDIA_TYPE)
+    return StreamingResponse(
+        _stream_json_array(_iter_media_files(monitored_paths)),
+        media_type="application/json",
+    )
 
 
 @app.post("/get-metadata", response_model=Dict[str, Any])
-def get_file_metadata_endpoint(file_info: FilePath) -> Dict[str, Any]:
+async def get_file_metadata_endpoint(file_info: FilePath) -> Dict[str, Any]:
     """
     Retrieves detailed metadata for a single file using the real ffprobe utility.
     """
     file_path = file_info.file_path
     
-    # *** Live ffprobe call ***
-    metadata = _get_live_ffprobe_metadata(file_path)
+    # *** Live ffprobe call (memoized per file version) ***
+    metadata = await get_ffprobe_metadata(file_path)
     
     if not metadata:
         # If metadata processing fails, still return a 404 or 500
         raise HTTPException(status_code=500, detail=f"Failed to process metadata for file: {file_path}")
     
-    return metadata
\ No newline at end of file
+    return metadata
+
+
+@app.post("/get-metadata-batch", response_model=Dict[str, Dict[str, Any]])
+async def get_file_metadata_batch_endpoint(batch: FilePathBatch) -> Dict[str, Dict[str, Any]]:
+    """
+    Retrieves metadata for several files in one request, keyed by file path.
+    Cached files are answered immediately; the remaining ffprobe processes run
+    concurrently, at most one per core. Files that cannot be probed map to {}.
+    """
+    file_paths = list(dict.fromkeys(batch.file_paths))
+    results = await asyncio.gather(*(get_ffprobe_metadata(path) for path in file_paths))
+    return dict(zip(file_paths, results))
+
+
+@app.get("/debug/cache", response_model=Dict[str, Any])
+def get_probe_cache_info() -> Dict[str, Any]:
+    """Exposes the ffprobe cache statistics so the hit rate is observable."""
+    return _probe_cache.info()
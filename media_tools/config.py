@@ -2,33 +2,36 @@
 
 import os
 import json
+import logging
 from dotenv import load_dotenv
 
+logger = logging.getLogger(__name__)
+
+# Sentinel for "environment variable not looked up yet" (None means "not set").
+_MISSING = object()
+
 class ConfigManager:
     """
     Manages the Media Tools application's configuration by loading settings 
     from a config.json file and environment variables from a .env file.
     """
 
+    # Instances handed out by shared(), keyed by (config_path, env_path).
+    _shared_instances = {}
+
     def __init__(self, config_path="config.json", env_path=".env"):
         """
         Initializes the ConfigManager, loading both config.json and .env files.
         """
         
-        # --- FIX: Determine the absolute directory of the configuration file ---
-        # Get the directory of the currently executing script (config.py)
-        base_dir = os.path.dirname(os.path.abspath(__file__))
+        abs_config_path, abs_env_path = self._resolve_paths(config_path, env_path)
         
-        # Re-resolve paths relative to the base_dir
-        abs_config_path = os.path.join(base_dir, config_path)
-        abs_env_path = os.path.join(base_dir, env_path)
-        
-        print(f"DEBUG: Attempting to load config from: {abs_config_path}")
-        print(f"DEBUG: Attempting to load .env from: {abs_env_path}")
-        # ----------------------------------------------------------------------
+        logger.debug("Attempting to load config from: %s", abs_config_path)
+        logger.debug("Attempting to load .env from: %s", abs_env_path)
         
         # Load environment variables from the .env file
         load_dotenv(dotenv_path=abs_env_path)
+        self._mtime = self._stat_mtime(abs_config_path)
         
         self.config_data = {}
         # Load configuration from the config.json file
@@ -42,13 +45,45 @@ class ConfigManager:
         except json.JSONDecodeError:
             print(f"Error: The configuration file '{abs_config_path}' is not a valid JSON file.")
 
+        # Environment lookups are resolved once per key and reused.
+        self._env_cache = {}
+
+    @classmethod
+    def shared(cls, config_path="config.json", env_path=".env"):
+        """
+        Returns a process-wide ConfigManager for the given files. The files are
+        only re-read when config.json's modification time changes.
+        """
+        key = (config_path, env_path)
+        abs_config_path, _ = cls._resolve_paths(config_path, env_path)
+        instance = cls._shared_instances.get(key)
+        if instance is None or instance._mtime != cls._stat_mtime(abs_config_path):
+            instance = cls._shared_instances[key] = cls(config_path, env_path)
+        return instance
+
+    @staticmethod
+    def _resolve_paths(config_path, env_path):
+        """Resolves config/env paths relative to this package directory."""
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        return os.path.join(base_dir, config_path), os.path.join(base_dir, env_path)
+
+    @staticmethod
+    def _stat_mtime(path):
+        """Returns the file's modification time, or None if it does not exist."""
+        try:
+            return os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
     def get(self, key, default=None):
         """
         Retrieves a configuration value. It first checks environment variables
         and then falls back to the loaded JSON configuration.
         """
-        # Prioritize environment variables
-        env_value = os.getenv(key)
+        # Prioritize environment variables (resolved once per key)
+        env_value = self._env_cache.get(key, _MISSING)
+        if env_value is _MISSING:
+            env_value = self._env_cache[key] = os.getenv(key)
         if env_value is not None:
             return env_value
 
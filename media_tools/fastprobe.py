@@ -0,0 +1,274 @@
+# media_tools/fastprobe.py
+
+import os
+import struct
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple
+
+
+class FastProbeError(ValueError):
+    """The file could not be read by the fast path; callers fall back to ffprobe."""
+
+
+# Codec names as ffprobe reports them (upper-cased, like _parse_ffprobe_output).
+_MP4_VIDEO_CODECS = {
+    b'avc1': 'H264', b'avc3': 'H264', b'hvc1': 'HEVC', b'hev1': 'HEVC',
+    b'av01': 'AV1', b'vp09': 'VP9', b'mp4v': 'MPEG4',
+}
+_MKV_VIDEO_CODECS = {
+    'V_MPEG4/ISO/AVC': 'H264', 'V_MPEGH/ISO/HEVC': 'HEVC', 'V_AV1': 'AV1',
+    'V_VP9': 'VP9', 'V_VP8': 'VP8', 'V_MPEG2': 'MPEG2VIDEO', 'V_MPEG4/ISO/ASP': 'MPEG4',
+}
+
+# The moov box is read whole; anything larger than this is left to ffprobe.
+_MAX_MOOV_BYTES = 64 * 1024 * 1024
+
+
+def probe(file_path: str) -> Dict[str, Any]:
+    """
+    Reads codec, resolution, audio channels and overall bitrate from the
+    container headers, in the same schema as the ffprobe path. Raises
+    FastProbeError for unsupported containers or anything it cannot decode.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension in ('.mp4', '.m4v', '.mov'):
+        parser = probe_mp4
+    elif extension in ('.mkv', '.webm'):
+        parser = probe_mkv
+    else:
+        raise FastProbeError(f"No fast path for '{extension}' files.")
+    try:
+        return parser(file_path)
+    except (struct.error, IndexError, KeyError) as e:
+        # Headers that end early or lack a mandatory field.
+        raise FastProbeError(f"Malformed container headers in {file_path}: {e}")
+
+
+def _metadata(file_path: str, video_codec: Optional[str], width: int, height: int,
+              audio_channels: int, duration_s: float, file_size: int) -> Dict[str, Any]:
+    if not video_codec or not width or not height:
+        raise FastProbeError(f"No decodable video track in {file_path}.")
+    return {
+        "file_path": file_path,
+        "video_codec": video_codec,
+        "resolution": f"{width}x{height}",
+        "audio_channels": audio_channels,
+        "bitrate_kbps": int(file_size * 8 / duration_s) // 1000 if duration_s > 0 else 0,
+    }
+
+
+# --- MP4 / QuickTime ---
+
+def _iter_boxes(data: bytes, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[bytes, int, int]]:
+    """Yields (type, payload_start, payload_end) for the boxes laid out in data[start:end]."""
+    end = len(data) if end is None else end
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from('>I4s', data, offset)
+        header = 8
+        if size == 1:
+            size, = struct.unpack_from('>Q', data, offset + 8)
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header or offset + size > end:
+            raise FastProbeError("Truncated MP4 box.")
+        yield box_type, offset + header, offset + size
+        offset += size
+
+
+def _find_box(data: bytes, start: int, end: int, *path: bytes) -> Optional[Tuple[int, int]]:
+    """Follows a box path (e.g. b'mdia', b'hdlr') and returns its payload bounds."""
+    for wanted in path:
+        for box_type, payload_start, payload_end in _iter_boxes(data, start, end):
+            if box_type == wanted:
+                start, end = payload_start, payload_end
+                break
+        else:
+            return None
+    return start, end
+
+
+def _read_moov(f: BinaryIO, file_size: int) -> bytes:
+    """Skips from top-level box to top-level box (no data reads) until moov."""
+    offset = 0
+    while offset + 8 <= file_size:
+        f.seek(offset)
+        header = f.read(16)
+        size, box_type = struct.unpack_from('>I4s', header)
+        header_size = 8
+        if size == 1:
+            size, = struct.unpack_from('>Q', header, 8)
+            header_size = 16
+        elif size == 0:
+            size = file_size - offset
+        if size < header_size:
+            raise FastProbeError("Corrupt MP4 top-level box.")
+        if box_type == b'moov':
+            if size > _MAX_MOOV_BYTES:
+                raise FastProbeError("moov box too large for the fast path.")
+            f.seek(offset + header_size)
+            return f.read(size - header_size)
+        offset += size
+    raise FastProbeError("No moov box found.")
+
+
+def probe_mp4(file_path: str) -> Dict[str, Any]:
+    """Walks the top-level boxes to moov, then mvhd and each trak's hdlr/stsd."""
+    with open(file_path, 'rb') as f:
+        file_size = os.fstat(f.fileno()).st_size
+        moov = _read_moov(f, file_size)
+
+    mvhd = _find_box(moov, 0, len(moov), b'mvhd')
+    if mvhd is None:
+        raise FastProbeError("No mvhd box.")
+    version = moov[mvhd[0]]
+    if version == 1:
+        timescale, duration = struct.unpack_from('>IQ', moov, mvhd[0] + 20)
+    else:
+        timescale, duration = struct.unpack_from('>II', moov, mvhd[0] + 12)
+    duration_s = duration / timescale if timescale else 0.0
+
+    video_codec, width, height, audio_channels = None, 0, 0, 0
+    for box_type, trak_start, trak_end in _iter_boxes(moov):
+        if box_type != b'trak':
+            continue
+        hdlr = _find_box(moov, trak_start, trak_end, b'mdia', b'hdlr')
+        stsd = _find_box(moov, trak_start, trak_end, b'mdia', b'minf', b'stbl', b'stsd')
+        if hdlr is None or stsd is None:
+            continue
+        handler = moov[hdlr[0] + 8:hdlr[0] + 12]
+        # stsd: version/flags (4) + entry count (4), then the first sample entry box.
+        entry = stsd[0] + 8
+        if entry + 8 > stsd[1]:
+            continue
+        entry_format = moov[entry + 4:entry + 8]
+        fields = entry + 8 + 8  # sample entry header + reserved(6) + data_reference_index(2)
+        if handler == b'vide' and video_codec is None:
+            if entry_format not in _MP4_VIDEO_CODECS:
+                raise FastProbeError(f"Unknown MP4 video codec {entry_format!r}.")
+            video_codec = _MP4_VIDEO_CODECS[entry_format]
+            width, height = struct.unpack_from('>HH', moov, fields + 16)
+        elif handler == b'soun':
+            channels, = struct.unpack_from('>H', moov, fields + 8)
+            audio_channels = max(audio_channels, channels)
+
+    return _metadata(file_path, video_codec, width, height, audio_channels, duration_s, file_size)
+
+
+# --- Matroska / WebM (EBML) ---
+
+_EBML_HEADER, _SEGMENT, _INFO, _TRACKS, _CLUSTER = 0x1A45DFA3, 0x18538067, 0x1549A966, 0x1654AE6B, 0x1F43B675
+_TIMECODE_SCALE, _DURATION = 0x2AD7B1, 0x4489
+_TRACK_ENTRY, _TRACK_TYPE, _CODEC_ID, _VIDEO, _AUDIO = 0xAE, 0x83, 0x86, 0xE0, 0xE1
+_PIXEL_WIDTH, _PIXEL_HEIGHT, _CHANNELS = 0xB0, 0xBA, 0x9F
+
+
+def _read_vint(f: BinaryIO, keep_marker: bool) -> Tuple[int, int]:
+    """Reads an EBML variable-length integer; returns (value, length in bytes)."""
+    first = f.read(1)
+    if not first:
+        raise EOFError
+    first = first[0]
+    length = 1
+    while length <= 8 and not first & (0x80 >> (length - 1)):
+        length += 1
+    if length > 8:
+        raise FastProbeError("Invalid EBML variable-length integer.")
+    value = first if keep_marker else first & (0xFF >> length)
+    for byte in f.read(length - 1):
+        value = (value << 8) | byte
+    return value, length
+
+
+def _iter_elements(f: BinaryIO, end: int) -> Iterator[Tuple[int, int, int]]:
+    """Yields (id, data_start, data_size) for the elements up to byte offset end."""
+    while f.tell() < end:
+        try:
+            element_id, _ = _read_vint(f, keep_marker=True)
+            size, size_length = _read_vint(f, keep_marker=False)
+        except EOFError:
+            return
+        if size == (1 << (7 * size_length)) - 1:
+            # Unknown size (live-written file): only the Segment may be left open.
+            if element_id != _SEGMENT:
+                raise FastProbeError("Unknown-size EBML element.")
+            size = end - f.tell()
+        start = f.tell()
+        yield element_id, start, size
+        f.seek(start + size)
+
+
+def _read_children(f: BinaryIO, start: int, size: int) -> Dict[int, Any]:
+    """Collects the raw payloads of a master element's direct children (first wins)."""
+    children: Dict[int, Any] = {}
+    f.seek(start)
+    for element_id, data_start, data_size in _iter_elements(f, start + size):
+        if element_id not in children:
+            position = f.tell()
+            f.seek(data_start)
+            children[element_id] = (data_start, data_size, f.read(min(data_size, 256)))
+            f.seek(position)
+    return children
+
+
+def _uint(payload: Tuple[int, int, bytes]) -> int:
+    return int.from_bytes(payload[2][:payload[1]], 'big')
+
+
+def probe_mkv(file_path: str) -> Dict[str, Any]:
+    """Reads Segment/Info for the duration and Segment/Tracks for the track details."""
+    with open(file_path, 'rb') as f:
+        file_size = os.fstat(f.fileno()).st_size
+        top = _iter_elements(f, file_size)
+        if next(top, (None,))[0] != _EBML_HEADER:
+            raise FastProbeError("Not an EBML file.")
+        for element_id, segment_start, segment_size in top:
+            if element_id == _SEGMENT:
+                break
+        else:
+            raise FastProbeError("No Matroska Segment.")
+
+        info = tracks = None
+        f.seek(segment_start)
+        for element_id, data_start, data_size in _iter_elements(f, segment_start + segment_size):
+            if element_id == _INFO:
+                info = (data_start, data_size)
+            elif element_id == _TRACKS:
+                tracks = (data_start, data_size)
+            elif element_id == _CLUSTER:
+                break  # Media data; the headers come before it in practice.
+            if info and tracks:
+                break
+        if tracks is None:
+            raise FastProbeError("No Tracks element before the first Cluster.")
+
+        duration_s = 0.0
+        if info:
+            info_children = _read_children(f, *info)
+            scale = _uint(info_children[_TIMECODE_SCALE]) if _TIMECODE_SCALE in info_children else 1_000_000
+            if _DURATION in info_children:
+                _, size, raw = info_children[_DURATION]
+                duration, = struct.unpack('>f' if size == 4 else '>d', raw[:size])
+                duration_s = duration * scale / 1e9
+
+        video_codec, width, height, audio_channels = None, 0, 0, 0
+        f.seek(tracks[0])
+        entries = [(start, size) for element_id, start, size in _iter_elements(f, sum(tracks))
+                   if element_id == _TRACK_ENTRY]
+        for entry in entries:
+            track = _read_children(f, *entry)
+            track_type = _uint(track[_TRACK_TYPE]) if _TRACK_TYPE in track else 0
+            codec_id = track[_CODEC_ID][2][:track[_CODEC_ID][1]].decode('ascii', 'replace') if _CODEC_ID in track else ''
+            if track_type == 1 and video_codec is None and _VIDEO in track:
+                if codec_id not in _MKV_VIDEO_CODECS:
+                    raise FastProbeError(f"Unknown Matroska video codec {codec_id!r}.")
+                video_codec = _MKV_VIDEO_CODECS[codec_id]
+                video = _read_children(f, *track[_VIDEO][:2])
+                width = _uint(video[_PIXEL_WIDTH]) if _PIXEL_WIDTH in video else 0
+                height = _uint(video[_PIXEL_HEIGHT]) if _PIXEL_HEIGHT in video else 0
+            elif track_type == 2:
+                # Channels defaults to 1 when the Audio element omits it.
+                audio = _read_children(f, *track[_AUDIO][:2]) if _AUDIO in track else {}
+                audio_channels = max(audio_channels, _uint(audio[_CHANNELS]) if _CHANNELS in audio else 1)
+
+    return _metadata(file_path, video_codec, width, height, audio_channels, duration_s, file_size)
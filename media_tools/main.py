@@ -8,7 +8,6 @@ import json
 # Ensure local imports work by setting up the path (standard practice)
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__))))
 
-from media_tools.api import app
 from media_tools.config import ConfigManager
 
 if __name__ == "__main__":
@@ -19,26 +18,25 @@ if __name__ == "__main__":
     
     print("--- Cinchro Media Tools Service: Starting Up ---")
     
-    # Define file paths for configuration
-    service_dir = os.path.dirname(os.path.abspath(__file__))
-    config_path = os.path.join(service_dir, 'config.json')
-    env_path = os.path.join(service_dir, '.env')
-    
     # 1. Initialize Configuration
     try:
-        config_manager = ConfigManager(config_path=config_path, env_path=env_path)
+        config_manager = ConfigManager.shared()
         
         HOST = config_manager.get("api_host", "0.0.0.0")
         PORT = int(config_manager.get("api_port", 5000))
+        WORKERS = int(config_manager.get("api_workers", max(2, (os.cpu_count() or 1) // 2)))
 
-        print(f"Configuration loaded. Service starting on {HOST}:{PORT}")
+        print(f"Configuration loaded. Service starting on {HOST}:{PORT} with {WORKERS} worker(s)")
     except Exception as e:
         print(f"Error loading configuration: {e}")
         sys.exit(1)
 
     # 2. Start Uvicorn Server
     try:
-        uvicorn.run(app, host=HOST, port=PORT, log_level="info")
+        # Multiple workers need the app as an import string so each process loads
+        # its own copy. uvloop/httptools come with uvicorn[standard].
+        uvicorn.run("media_tools.api:app", host=HOST, port=PORT, workers=WORKERS,
+                    loop="uvloop", http="httptools", log_level="info")
     except Exception as e:
         print(f"Uvicorn server failed to start: {e}")
         sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,6 @@
+# orchestrator/__main__.py
+
+# Launcher for `python -m orchestrator` (run from the project root).
+from orchestrator.main import main
+
+main()
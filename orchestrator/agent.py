@@ -2,12 +2,9 @@
 
 import json
 import os
-import sys
 from typing import TypedDict, Annotated, List, Dict
 from datetime import datetime
-
-# Add the parent directory to the path to import sibling modules
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from pathlib import PurePosixPath
 
 # Cinchro Modules
 from orchestrator.config import ConfigManager
@@ -34,6 +31,7 @@ class GraphState(TypedDict):
     files_to_scan: List[str]
     current_file: str
     metadata: dict
+    metadata_by_path: Dict[str, dict]
     status: str
     notes: str
     user_input: str
@@ -44,13 +42,51 @@ class GraphState(TypedDict):
 config = ConfigManager(config_path=os.path.join(os.path.dirname(__file__), 'config.json'))
 media_tools_instance = MediaTools(
     api_base_url=config.get("media_api_url"),
-    use_dummy_data=config.get("use_dummy_tools")
+    use_dummy_data=config.get("use_dummy_tools"),
+    deadline_s=config.get("request_deadline_seconds")
 )
 ffmpeg_tools_instance = FFMPEGGTools(
     api_base_url=config.get("ffmpeg_api_url"),
-    use_dummy_data=config.get("use_dummy_tools")
+    use_dummy_data=config.get("use_dummy_tools"),
+    deadline_s=config.get("request_deadline_seconds")
 )
 
+# Container remapping for processed output; other extensions are kept as-is.
+_OUTPUT_SUFFIXES = {'.mkv': '.mp4', '.avi': '.mp4'}
+
+# --- Local Evaluation ---
+# Mirrors the standards in EVALUATION_PROMPT; config "evaluation_rules" overrides any key.
+DEFAULT_EVALUATION_RULES = {
+    "min_height": 1080,
+    "video_codecs": ["HEVC", "H265"],
+    "min_audio_channels": 6,
+}
+
+
+def _evaluate_local(metadata: dict, rules: dict):
+    """
+    Applies the evaluation standards to a file's metadata without the LLM.
+    Returns True/False for a clear verdict, or None when the metadata is
+    incomplete and the decision should go to the LLM.
+    """
+    resolution = metadata.get('resolution', '')
+    codec = metadata.get('video_codec')
+    channels = metadata.get('audio_channels')
+    try:
+        height = int(resolution.split('x')[1])
+        channels = int(channels)
+    except (AttributeError, IndexError, TypeError, ValueError):
+        return None
+    if not codec:
+        return None
+
+    return (
+        height >= rules["min_height"]
+        and codec.upper() in rules["video_codecs"]
+        and channels >= rules["min_audio_channels"]
+    )
+
+
 @tool
 def list_media_files(location: str):
     """
@@ -67,6 +103,14 @@ def get_file_metadata(file_path: str):
     """
     return media_tools_instance.get_file_metadata(file_path)
 
+@tool
+def get_metadata_batch(file_paths: List[str]):
+    """
+    Tool to retrieve metadata for a list of files in a single request.
+    The Cinchro agent must use this tool instead of calling get_file_metadata per file.
+    """
+    return media_tools_instance.get_metadata_batch(file_paths)
+
 @tool
 def run_ffmpeg_command(command: str, input_file: str, output_file: str):
     """
@@ -75,7 +119,7 @@ def run_ffmpeg_command(command: str, input_file: str, output_file: str):
     """
     return ffmpeg_tools_instance.run_ffmpeg_command(command, input_file, output_file)
 
-tools = [list_media_files, get_file_metadata, run_ffmpeg_command]
+tools = [list_media_files, get_file_metadata, get_metadata_batch, run_ffmpeg_command]
 
 
 class CinchroAgent:
@@ -86,8 +130,12 @@ class CinchroAgent:
 
     def __init__(self):
         self.config_manager = config
-        self.db_manager = DatabaseManager(self.config_manager.get("DATABASE_PATH"))
+        self.db_manager = DatabaseManager(
+            self.config_manager.get("DATABASE_PATH"),
+            pragmas=self.config_manager.get("sqlite_pragmas"),
+        )
         self.prompt_manager = PromptManager()
+        self.evaluation_rules = {**DEFAULT_EVALUATION_RULES, **(self.config_manager.get("evaluation_rules") or {})}
         
         # Initialize LLM with tool use capabilities
         llm = ChatOllama(model=self.config_manager.get("LLM_MODEL")).bind_tools(tools)
@@ -151,8 +199,11 @@ class CinchroAgent:
         files_found = agent_response.get('tool_outputs', [])
         
         # Add files to the database and update state
-        new_files = [f for f in files_found if self.db_manager.add_file(f)]
+        new_files = self.db_manager.add_files_bulk(files_found)
         state['files_to_scan'] = new_files
+
+        # Probe every new file in one round-trip; evaluation then only looks results up.
+        state['metadata_by_path'] = media_tools_instance.get_metadata_batch(new_files) if new_files else {}
         
         print(f"Found {len(new_files)} new files to process.")
         return state
@@ -170,15 +221,17 @@ class CinchroAgent:
         state['current_file'] = current_file
         state['files_to_scan'] = files
         
-        # Use the get_file_metadata tool
-        metadata = self.agent.invoke(HumanMessage(content=f"Get metadata for file {current_file}"))
-        state['metadata'] = metadata.get('tool_outputs', [{}])[0]
+        # Metadata was fetched in bulk by scan_media_node
+        state['metadata'] = state.get('metadata_by_path', {}).get(current_file, {})
         
-        # Use LLM to decide based on metadata
-        prompt = self.prompt_manager.get("EVALUATION_PROMPT") + f"\nMetadata: {json.dumps(state['metadata'])}"
-        llm_decision = self.agent.invoke(HumanMessage(content=prompt))
+        # Decide locally when the metadata is complete; only ambiguous files go to the LLM
+        passed = _evaluate_local(state['metadata'], self.evaluation_rules)
+        if passed is None:
+            prompt = self.prompt_manager.get("EVALUATION_PROMPT") + f"\nMetadata: {json.dumps(state['metadata'])}"
+            llm_decision = self.agent.invoke(HumanMessage(content=prompt))
+            passed = "YES" in str(llm_decision).upper()
         
-        if "YES" in str(llm_decision).upper():
+        if passed:
             print(f"File {current_file} nominated for processing.")
             state['status'] = "evaluation_passed"
         else:
@@ -212,7 +265,9 @@ class CinchroAgent:
         metadata = state.get('metadata')
         
         # Example processing command
-        output_file = file_to_process.replace(".mkv", ".mp4")
+        # Only the real extension is swapped; ".mkv" elsewhere in the path is left alone
+        path = PurePosixPath(file_to_process)
+        output_file = str(path.with_suffix(_OUTPUT_SUFFIXES.get(path.suffix.lower(), path.suffix)))
         command = f"-c:v copy -c:a aac -b:a 192k"
         
         # Use the run_ffmpeg_command tool
@@ -255,6 +310,7 @@ class CinchroAgent:
             "files_to_scan": [],
             "current_file": "",
             "metadata": {},
+            "metadata_by_path": {},
             "status": "",
             "notes": "",
             "user_input": "",
@@ -4,6 +4,15 @@ import os
 import json
 from dotenv import load_dotenv
 
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # orjson is optional; the stdlib parser reads the same files
+    _loads = json.loads
+
+# Sentinel for "environment variable not looked up yet" (None means "not set").
+_MISSING = object()
+
 class ConfigManager:
     """
     Manages the application's configuration by loading settings from a
@@ -20,21 +29,27 @@ class ConfigManager:
         self.config_data = {}
         # Load configuration from the config.json file
         try:
-            with open(config_path, 'r') as f:
-                self.config_data = json.load(f)
+            with open(config_path, 'rb') as f:
+                self.config_data = _loads(f.read())
         except FileNotFoundError:
             print(f"Warning: The configuration file '{config_path}' was not found. "
                   "Continuing with default and environment variables only.")
-        except json.JSONDecodeError:
+        except ValueError:
+            # json.JSONDecodeError and orjson.JSONDecodeError are both ValueErrors
             print(f"Error: The configuration file '{config_path}' is not a valid JSON file.")
 
+        # Environment lookups are resolved once per key and reused.
+        self._env_cache = {}
+
     def get(self, key, default=None):
         """
         Retrieves a configuration value. It first checks environment variables
         and then falls back to the loaded JSON configuration.
         """
-        # Prioritize environment variables
-        env_value = os.getenv(key)
+        # Prioritize environment variables (resolved once per key)
+        env_value = self._env_cache.get(key, _MISSING)
+        if env_value is _MISSING:
+            env_value = self._env_cache[key] = os.getenv(key)
         if env_value is not None:
             return env_value
 
@@ -3,99 +3,267 @@
 import os
 import sqlite3
 import json
+import time
+from contextlib import contextmanager
 from datetime import datetime
 
+try:
+    import orjson
+
+    def _dumps(value):
+        return orjson.dumps(value).decode()
+    _loads = orjson.loads
+except ImportError:  # orjson is optional
+    _dumps = json.dumps
+    _loads = json.loads
+
+# Decodes columns selected as "name [JSON]" (see _SELECT_COLUMNS), so readers
+# get output_files back as a list instead of re-parsing the stored string.
+sqlite3.register_converter("JSON", _loads)
+
+_CREATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS media_files (
+        file_path TEXT PRIMARY KEY,
+        status TEXT NOT NULL,
+        last_processed_date INTEGER,
+        processing_file_path TEXT,
+        output_files TEXT,
+        notes TEXT
+    );
+"""
+
+# Hot-path SQL kept as module constants: sqlite3 caches prepared statements per
+# connection keyed by SQL text, so every call with the same string skips the
+# parse/compile step.
+_INSERT_FILE_SQL = """
+    INSERT INTO media_files (file_path, status, last_processed_date)
+    VALUES (?, ?, ?)
+"""
+_INSERT_FILE_IF_NEW_SQL = """
+    INSERT OR IGNORE INTO media_files (file_path, status, last_processed_date)
+    VALUES (?, ?, ?)
+"""
+_UPDATE_STATUS_SQL = """
+    UPDATE media_files
+    SET status = ?, 
+        last_processed_date = ?,
+        processing_file_path = ?,
+        output_files = ?,
+        notes = ?
+    WHERE file_path = ?
+"""
+_SELECT_BY_STATUS_SQL = "SELECT file_path FROM media_files WHERE status = ?"
+# The converter is keyed on the column alias rather than the declared type, so
+# tables created with "output_files TEXT" decode the same way without a migration.
+_SELECT_COLUMNS = """
+    file_path, status, last_processed_date, processing_file_path,
+    output_files AS "output_files [JSON]", notes
+"""
+_SELECT_FILE_SQL = f"SELECT {_SELECT_COLUMNS} FROM media_files WHERE file_path = ?"
+_SELECT_ALL_SQL = f"SELECT {_SELECT_COLUMNS} FROM media_files"
+
+# Size of the per-connection prepared statement cache (LRU, evicts the oldest).
+STATEMENT_CACHE_SIZE = 32
+
+# Applied when the connection opens. WAL lets readers run alongside the writer
+# and, with synchronous=NORMAL, a commit is an appended WAL frame without an
+# fsync. Overridable per key through the "sqlite_pragmas" config entry.
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "temp_store": "MEMORY",
+    "cache_size": -20000,       # KiB (negative) -> ~20 MB page cache
+    "mmap_size": 268435456,     # 256 MB
+}
+
+def _now_ms():
+    """Current time as integer epoch milliseconds (the last_processed_date format)."""
+    return time.time_ns() // 1_000_000
+
+
+def format_timestamp(timestamp_ms):
+    """Renders a stored last_processed_date as local ISO-8601 for display."""
+    if timestamp_ms is None:
+        return None
+    return datetime.fromtimestamp(timestamp_ms / 1000).isoformat()
+
+
 class DatabaseManager:
     """
     Manages the central SQLite database for the Cinchro orchestrator.
     This database tracks the state of every media file.
     """
 
-    def __init__(self, db_path):
-        """Initializes the DatabaseManager and ensures the tables exist."""
-        self.conn = sqlite3.connect(db_path)
+    def __init__(self, db_path, pragmas=None):
+        """
+        Initializes the DatabaseManager, applies the connection PRAGMAs
+        (DEFAULT_PRAGMAS updated with `pragmas`) and ensures the tables exist.
+        """
+        # "file:" paths are SQLite URIs, e.g. the shared in-memory databases the tests use.
+        self.conn = sqlite3.connect(db_path, cached_statements=STATEMENT_CACHE_SIZE,
+                                    uri=str(db_path).startswith("file:"),
+                                    detect_types=sqlite3.PARSE_COLNAMES)
+        # Rows index by column name in C; dict(row) replaces zipping cursor.description.
+        self.conn.row_factory = sqlite3.Row
+        # True inside transaction(): single-row writers then leave the commit to it.
+        self._in_transaction = False
+        for name, value in {**DEFAULT_PRAGMAS, **(pragmas or {})}.items():
+            self.conn.execute(f"PRAGMA {name}={value}")
         self.create_tables()
 
     def create_tables(self):
-        """Creates the media_files table if it doesn't already exist."""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS media_files (
-                file_path TEXT PRIMARY KEY,
-                status TEXT NOT NULL,
-                last_processed_date TEXT,
-                processing_file_path TEXT,
-                output_files TEXT,
-                notes TEXT
-            );
-        """)
+        """
+        Creates the media_files table and its status index if they don't already
+        exist. last_processed_date holds integer epoch milliseconds (see format_timestamp).
+        """
+        self.conn.execute(_CREATE_TABLE_SQL)
+        self.conn.commit()
+        self._migrate_iso_timestamps()
+        # Covering index: get_files_by_status is answered from the index b-tree
+        # alone, without a table scan or a lookup into the main table.
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_media_files_status ON media_files(status, file_path)"
+        )
         self.conn.commit()
 
+    def _migrate_iso_timestamps(self):
+        """
+        Databases created before timestamps were stored as integers declare
+        last_processed_date as TEXT, which would turn new integer values back
+        into strings. Rebuilds such a table once, converting the local-time
+        ISO strings to epoch milliseconds.
+        """
+        columns = {row['name']: row['type'] for row in self.conn.execute("PRAGMA table_info(media_files)")}
+        if columns.get('last_processed_date', '').upper() != 'TEXT':
+            return
+        # Explicit transaction: sqlite3 would otherwise autocommit each DDL statement.
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute("ALTER TABLE media_files RENAME TO media_files_old")
+            self.conn.execute(_CREATE_TABLE_SQL)
+            self.conn.execute("""
+                INSERT INTO media_files
+                SELECT file_path, status,
+                       CAST(strftime('%s', last_processed_date, 'utc') AS INTEGER) * 1000,
+                       processing_file_path, output_files, notes
+                FROM media_files_old
+            """)
+            self.conn.execute("DROP TABLE media_files_old")
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+
+    @contextmanager
+    def transaction(self):
+        """
+        Groups several add_file / update_file_status calls into one transaction:
+        a single commit at the end, or a rollback if the block raises.
+        """
+        self._in_transaction = True
+        try:
+            with self.conn:
+                yield self
+        finally:
+            self._in_transaction = False
+
+    def _commit(self):
+        """Commits a single-row write unless a transaction() block owns the commit."""
+        if not self._in_transaction:
+            self.conn.commit()
+
     def add_file(self, file_path):
         """Adds a new file to the database with a 'pending_scan' status."""
-        cursor = self.conn.cursor()
         try:
-            cursor.execute("""
-                INSERT INTO media_files (file_path, status, last_processed_date)
-                VALUES (?, ?, ?)
-            """, (file_path, 'pending_scan', datetime.now().isoformat()))
-            self.conn.commit()
+            self.conn.execute(_INSERT_FILE_SQL, (file_path, 'pending_scan', _now_ms()))
+            self._commit()
             return True
         except sqlite3.IntegrityError:
             # File already exists, no need to add
             return False
 
+    def add_files_bulk(self, file_paths):
+        """
+        Adds many files with a 'pending_scan' status in a single transaction
+        (one commit instead of one per file). Paths already in the database are
+        ignored. Returns the paths that were newly added, in input order.
+        """
+        now = _now_ms()
+        added = []
+        # IMMEDIATE takes the write lock up front instead of upgrading mid-batch.
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            for file_path in file_paths:
+                if self.conn.execute(_INSERT_FILE_IF_NEW_SQL, (file_path, 'pending_scan', now)).rowcount:
+                    added.append(file_path)
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+        return added
+
     def update_file_status(self, file_path, status, processing_path=None, output_files=None, notes=None):
         """
         Updates the status and other information for a given file.
-        Output files are stored as a JSON string.
+        Output files are stored as a JSON string and decoded again on read.
         """
-        cursor = self.conn.cursor()
-        output_files_json = json.dumps(output_files) if output_files is not None else None
+        output_files_json = _dumps(output_files) if output_files is not None else None
         
-        cursor.execute("""
-            UPDATE media_files
-            SET status = ?, 
-                last_processed_date = ?,
-                processing_file_path = ?,
-                output_files = ?,
-                notes = ?
-            WHERE file_path = ?
-        """, (status, datetime.now().isoformat(), processing_path, output_files_json, notes, file_path))
-        self.conn.commit()
+        self.conn.execute(
+            _UPDATE_STATUS_SQL,
+            (status, _now_ms(), processing_path, output_files_json, notes, file_path),
+        )
+        self._commit()
+
+    def update_file_statuses_bulk(self, updates):
+        """
+        Applies many (file_path, status, notes) updates in one transaction.
+        Like update_file_status, the processing path and output files are cleared.
+        """
+        now = _now_ms()
+        with self.conn:
+            self.conn.executemany(
+                _UPDATE_STATUS_SQL,
+                [(status, now, None, None, notes, file_path) for file_path, status, notes in updates],
+            )
 
     def get_files_by_status(self, status):
         """Retrieves a list of file paths that match a given status."""
+        return list(self.iter_files_by_status(status))
+
+    def iter_files_by_status(self, status):
+        """
+        Yields the file paths that match a given status, streaming rows from the
+        cursor instead of materializing the whole result first.
+        """
+        # Plain tuples: only the first column is read, no need for Row objects
         cursor = self.conn.cursor()
-        cursor.execute("SELECT file_path FROM media_files WHERE status = ?", (status,))
-        return [row[0] for row in cursor.fetchall()]
+        cursor.row_factory = None
+        for (file_path,) in cursor.execute(_SELECT_BY_STATUS_SQL, (status,)):
+            yield file_path
 
     def get_file_info(self, file_path):
         """Retrieves all stored information about a single file."""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM media_files WHERE file_path = ?", (file_path,))
-        row = cursor.fetchone()
-        if row:
-            # Convert row to a dictionary for easier access
-            columns = [desc[0] for desc in cursor.description]
-            return dict(zip(columns, row))
-        return None
+        row = self.conn.execute(_SELECT_FILE_SQL, (file_path,)).fetchone()
+        return dict(row) if row else None
 
     def list_all_files(self):
         """
         Retrieves all records from the media_files table.
         Returns a list of dictionaries, one for each file.
         """
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM media_files")
-        rows = cursor.fetchall()
-        columns = [desc[0] for desc in cursor.description]
-        return [dict(zip(columns, row)) for row in rows]
+        return [dict(row) for row in self.conn.execute(_SELECT_ALL_SQL)]
 
     def close(self):
         """Closes the database connection."""
         self.conn.close()
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
 if __name__ == "__main__":
     # --- Example Usage ---
     
@@ -122,8 +290,6 @@ if __name__ == "__main__":
     print("\nInfo for /media/video1.mkv after processing:")
     info = db_manager.get_file_info("/media/video1.mkv")
     if info:
-        # The output_files will be a JSON string, so we need to parse it back
-        info['output_files'] = json.loads(info['output_files'])
         for key, value in info.items():
             print(f"- {key}: {value}")
             
@@ -1,19 +1,31 @@
 # orchestrator/engine.py
 
 import os
+import re
 import json
-import sys
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
-# Add the parent directory to the path to import sibling modules
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
 # Cinchro Modules
 from orchestrator.config import ConfigManager
 from orchestrator.database import DatabaseManager
 from orchestrator.tools.media_tools import MediaTools
 from orchestrator.tools.ffmpeg_tools import FFMPEGGTools
 
+# Conversion parameters as an argv list: sent as JSON, so file names and
+# filter arguments never need quoting. Input/output are set by the FFMPEG service.
+CONVERSION_ARGS = ["-c:v", "libx265", "-crf", "28", "-s", "640x360"]  # Simplified for MVP
+
+# Evaluation helpers, compiled once: "1920x1080" -> (width, height).
+_RESOLUTION_RE = re.compile(r'(\d+)x(\d+)')
+_TARGET_CODECS = frozenset({'HEVC', 'H265'})
+
+# Job submissions in flight at once; stays below the session's HTTP_POOL_SIZE
+# so every concurrent request reuses a kept-alive connection.
+SUBMISSION_CONCURRENCY = 8
+# run_ffmpeg_command statuses for a job that never reached the service's queue.
+_NOT_SUBMITTED = frozenset({'FAILED', 'REJECTED'})
+
 class CinchroEngine:
     """
     The core, non-LLM orchestrator engine for Cinchro.
@@ -23,18 +35,35 @@ class CinchroEngine:
     def __init__(self, config_manager: ConfigManager):
         """Initializes the engine with its core components."""
         self.config_manager = config_manager
-        self.db_manager = DatabaseManager(self.config_manager.get("DATABASE_PATH"))
+        self.db_manager = DatabaseManager(
+            self.config_manager.get("DATABASE_PATH"),
+            pragmas=self.config_manager.get("sqlite_pragmas"),
+        )
         
         # Instantiate the tool wrappers
         self.media_tools = MediaTools(
             api_base_url=self.config_manager.get("media_api_url"),
-            use_dummy_data=self.config_manager.get("use_dummy_tools")
+            use_dummy_data=self.config_manager.get("use_dummy_tools"),
+            deadline_s=self.config_manager.get("request_deadline_seconds")
         )
         self.ffmpeg_tools = FFMPEGGTools(
             api_base_url=self.config_manager.get("ffmpeg_api_url"),
-            use_dummy_data=self.config_manager.get("use_dummy_tools")
+            use_dummy_data=self.config_manager.get("use_dummy_tools"),
+            deadline_s=self.config_manager.get("request_deadline_seconds")
         )
 
+    def close(self):
+        """Closes the engine's database connection and API client sessions."""
+        self.db_manager.close()
+        self.media_tools.close()
+        self.ffmpeg_tools.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
     def scan_and_add_files(self):
         """
         Calls the media tools API to get a list of files to monitor,
@@ -44,10 +73,9 @@ class CinchroEngine:
         # In a future version, this would be a new API endpoint on the media tools component.
         found_files = self.media_tools.list_media_files(location=self.config_manager.get("media_location"))
         
-        for file_path in found_files:
-            was_added = self.db_manager.add_file(file_path)
-            if was_added:
-                print(f"Discovered and added new file: {file_path}")
+        # One transaction for the whole scan rather than a commit per file
+        for file_path in self.db_manager.add_files_bulk(found_files):
+            print(f"Discovered and added new file: {file_path}")
     
     def evaluate_files(self):
         """
@@ -57,27 +85,28 @@ class CinchroEngine:
         print("--- Evaluating pending files ---")
         
         pending_files = self.db_manager.get_files_by_status('pending_scan')
+        if not pending_files:
+            return
+
+        # One batch request for all pending files instead of a round-trip per file
+        metadata_by_path = self.media_tools.get_metadata_batch(pending_files)
+        updates = []
         
         for file_path in pending_files:
-            # Call metadata API (now works live)
-            metadata = self.media_tools.get_file_metadata(file_path) 
+            metadata = metadata_by_path.get(file_path, {})
             
             # --- UPDATED CINCHRO CRITERIA ---
-            resolution_str = metadata.get('resolution', '0x0')
-            height = 0
+            resolution_str = metadata.get('resolution') or '0x0'
             
-            # Safely extract height (the second number in WxH format)
-            try:
-                if 'x' in resolution_str:
-                    height = int(resolution_str.split('x')[1])
-            except (ValueError, IndexError):
-                pass # If parsing fails, height remains 0
+            # Height is the second number in WxH format; 0 if it does not parse
+            match = _RESOLUTION_RE.match(resolution_str)
+            height = int(match.group(2)) if match else 0
 
             # Cinchro New Standard: Must be greater than 480p
             is_good_resolution = height > 480
             
             # The target output codec is always H265/HEVC, so we look for files that are *not* already H265
-            is_already_target_codec = metadata.get('video_codec', '').upper() in ('HEVC', 'H265')
+            is_already_target_codec = (metadata.get('video_codec') or '').upper() in _TARGET_CODECS
             
             if is_good_resolution and not is_already_target_codec:
                 new_status = 'ready_for_conversion'
@@ -96,10 +125,10 @@ class CinchroEngine:
                 notes = f"Skipped: {' '.join(reason)}"
                 print(f"File {file_path} skipped.")
 
-            self.db_manager.update_file_status(file_path, new_status, notes=notes)
-
-
+            updates.append((file_path, new_status, notes))
 
+        # All status changes are written in a single transaction
+        self.db_manager.update_file_statuses_bulk(updates)
 
     def process_ready_files(self):
         """
@@ -107,36 +136,66 @@ class CinchroEngine:
         """
         print("--- Starting automated conversion process ---")
         ready_files = self.db_manager.get_files_by_status('ready_for_conversion')
+        self._record_submissions(self._submit_conversions(ready_files))
+
+    def _submit_conversions(self, file_paths):
+        """
+        Submits one conversion job per file to the FFMPEG Tools API and returns
+        [(file_path, job_info)] in input order. Up to SUBMISSION_CONCURRENCY
+        requests are in flight at once. Makes HTTP calls only (no database
+        access), so it can run on a worker thread.
+        """
+        file_paths = list(file_paths)
+        if not file_paths:
+            return []
+        with ThreadPoolExecutor(max_workers=min(len(file_paths), SUBMISSION_CONCURRENCY)) as executor:
+            return list(zip(file_paths, executor.map(self._submit_conversion, file_paths)))
+
+    def _submit_conversion(self, file_path):
+        """Submits a single conversion job and returns the API's job info."""
+        # Only the conversion parameters (CONVERSION_ARGS) are sent;
+        # the input/output paths are handled by the FFMPEG Tools API.
+        print(f"Initiating conversion for: {file_path}")
         
-        for file_path in ready_files:
-            # Example conversion logic and command
-            
-            # FIX: Send ONLY the conversion parameters (codec, resolution, etc.)
-            # The input/output paths are handled by the FFMPEG Tools API.
-            conversion_parameters = "-c:v libx265 -crf 28 -s 640x360" # Simplified for MVP
-            
-            # We no longer need to calculate output_file here
-            print(f"Initiating conversion for: {file_path}")
-            
-            # Use the corrected API call signature
-            job_info = self.ffmpeg_tools.run_ffmpeg_command(
-                command=conversion_parameters, 
-                input_file=file_path,
-                output_file="ignored" # This is a legacy argument but remains for compatibility
-            )
-            
-            # Update database status
-            self.db_manager.update_file_status(
-                file_path, 
-                'processing', 
-                processing_path=job_info.get('output_file'),
-                notes=f"Job submitted: {job_info.get('job_id')}"
-            )
+        # Use the corrected API call signature
+        return self.ffmpeg_tools.run_ffmpeg_command(
+            command=CONVERSION_ARGS,
+            input_file=file_path,
+            output_file="ignored" # This is a legacy argument but remains for compatibility
+        )
+
+    def _record_submissions(self, submissions):
+        """
+        Marks submitted files as 'processing' with their job details, in one
+        transaction. Submissions the service did not accept (FAILED/REJECTED)
+        leave the file 'ready_for_conversion' for the next run.
+        """
+        with self.db_manager.transaction():
+            for file_path, job_info in submissions:
+                if job_info.get('status') in _NOT_SUBMITTED:
+                    print(f"Conversion not submitted for {file_path}: {job_info.get('notes')}")
+                    continue
+                self.db_manager.update_file_status(
+                    file_path, 
+                    'processing', 
+                    processing_path=job_info.get('output_file'),
+                    notes=f"Job submitted: {job_info.get('job_id')}"
+                )
 
     def run_full_workflow(self):
-        """Runs the entire Cinchro workflow in sequence."""
-        self.scan_and_add_files()
-        self.evaluate_files()
+        """
+        Runs the entire Cinchro workflow. Files left 'ready_for_conversion' by an
+        earlier run are submitted to the FFMPEG API on a worker thread while this
+        run scans and evaluates (the two phases use different services); files
+        nominated by this run are processed afterwards.
+        """
+        backlog = self.db_manager.get_files_by_status('ready_for_conversion')
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            backlog_submissions = executor.submit(self._submit_conversions, backlog)
+            self.scan_and_add_files()
+            self.evaluate_files()
+            # The SQLite connection stays on this thread: results are recorded here.
+            self._record_submissions(backlog_submissions.result())
         self.process_ready_files()
         print("\n--- Workflow finished. ---")
 
@@ -7,14 +7,16 @@ import errno
 import json
 from datetime import datetime
 
-# Add the parent directory to the path to import sibling modules
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# Only needed when launched as a script (python orchestrator/main.py); with
+# `python -m orchestrator` the project root is already on the path.
+if __name__ == "__main__" and __package__ in (None, ""):
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from orchestrator.config import ConfigManager
 from orchestrator.engine import CinchroEngine
-from orchestrator.database import DatabaseManager
+from orchestrator.database import DatabaseManager, format_timestamp
 
-if __name__ == "__main__":
+def main():
     """
     Main entry point for the Cinchro Orchestrator application.
     This version includes a file-based lock for single-instance control
@@ -32,11 +34,15 @@ if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "list":
         try:
             config_manager = ConfigManager(config_path=config_path, env_path=env_path)
-            db_manager = DatabaseManager(config_manager.get("DATABASE_PATH"))
-            all_files = db_manager.list_all_files()
+            with DatabaseManager(
+                config_manager.get("DATABASE_PATH"),
+                pragmas=config_manager.get("sqlite_pragmas"),
+            ) as db_manager:
+                all_files = db_manager.list_all_files()
+            for record in all_files:
+                record['last_processed_date'] = format_timestamp(record['last_processed_date'])
             print("\n--- Cinchro Database Contents ---")
             print(json.dumps(all_files, indent=2))
-            db_manager.close()
             sys.exit(0)
         except Exception as e:
             print(f"Error listing database contents: {e}")
@@ -66,10 +72,10 @@ if __name__ == "__main__":
         
     # 3. Instantiate and Run the Engine
     try:
-        cinchro_engine = CinchroEngine(config_manager)
-        print("Cinchro Engine initialized. Starting automated workflow...")
-        
-        cinchro_engine.run_full_workflow()
+        with CinchroEngine(config_manager) as cinchro_engine:
+            print("Cinchro Engine initialized. Starting automated workflow...")
+            
+            cinchro_engine.run_full_workflow()
         
         print("\n--- Cinchro Orchestrator: Workflow Completed ---")
         
@@ -82,4 +88,8 @@ if __name__ == "__main__":
         lock_file.close()
         os.remove(lock_path)
 
-    print(f"Cinchro Orchestrator shutdown at: {datetime.now().isoformat()}")
\ No newline at end of file
+    print(f"Cinchro Orchestrator shutdown at: {datetime.now().isoformat()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,12 @@
 # orchestrator/prompts.py
 
-class PromptManager:
-    """
-    Manages all the prompts for the Cinchro Agent, centralizing the
-    LLM's instructions and persona.
-    """
+from types import MappingProxyType
 
-    def __init__(self):
-        """Initializes the PromptManager with a set of predefined prompts."""
-        self.prompts = {
-            "SYSTEM_PROMPT": self.get_system_prompt(),
-            "EVALUATION_PROMPT": self.get_evaluation_prompt(),
-            "USER_INPUT_PROMPT": self.get_user_input_prompt(),
-        }
+# Prompt texts are fixed, so they are built once at import time and shared by
+# every PromptManager (and importable directly).
 
-    def get_system_prompt(self):
-        """Defines the core instructions and role of the Cinchro agent."""
-        return """
+# Defines the core instructions and role of the Cinchro agent.
+SYSTEM_PROMPT = """
         You are "Cinchro," an intelligent media manager and chronicler. Your primary goal is to
         identify, evaluate, and process media files to meet predefined quality standards and
         ensure they are well-organized. You operate in a distributed environment and must
@@ -35,12 +25,8 @@ class PromptManager:
         Do not assume the state of a file; always check the database or use a tool to verify.
         """
 
-    def get_evaluation_prompt(self):
-        """
-        A prompt to guide the LLM's decision on whether to process a file
-        based on its metadata.
-        """
-        return """
+# Guides the LLM's decision on whether to process a file based on its metadata.
+EVALUATION_PROMPT = """
         Given the following metadata for a media file, analyze its video and audio streams
         and determine if it meets the following quality standards:
         
@@ -51,15 +37,44 @@ class PromptManager:
         Respond with either "YES" or "NO" and a brief reason.
         """
 
-    def get_user_input_prompt(self):
-        """
-        A prompt to be used when user confirmation is required.
-        """
-        return """
+# Used when user confirmation is required.
+USER_INPUT_PROMPT = """
         The agent has nominated a file for processing. This action may be resource-intensive.
         Please provide user confirmation to proceed with the processing of the file.
         Respond with 'YES' to proceed or 'NO' to skip.
         """
+
+_PROMPTS = MappingProxyType({
+    "SYSTEM_PROMPT": SYSTEM_PROMPT,
+    "EVALUATION_PROMPT": EVALUATION_PROMPT,
+    "USER_INPUT_PROMPT": USER_INPUT_PROMPT,
+})
+
+class PromptManager:
+    """
+    Manages all the prompts for the Cinchro Agent, centralizing the
+    LLM's instructions and persona.
+    """
+
+    # Read-only view shared by all instances.
+    prompts = _PROMPTS
+
+    def get_system_prompt(self):
+        """Defines the core instructions and role of the Cinchro agent."""
+        return SYSTEM_PROMPT
+
+    def get_evaluation_prompt(self):
+        """
+        A prompt to guide the LLM's decision on whether to process a file
+        based on its metadata.
+        """
+        return EVALUATION_PROMPT
+
+    def get_user_input_prompt(self):
+        """
+        A prompt to be used when user confirmation is required.
+        """
+        return USER_INPUT_PROMPT
         
     def get(self, prompt_name):
         """Retrieves a specific prompt string by its name."""
@@ -0,0 +1,80 @@
+# orchestrator/tools/circuit_breaker.py
+
+import threading
+import time
+from typing import Dict
+
+import requests
+
+# Consecutive failed calls that open a breaker, and how long it stays open
+# before a single probe request is let through.
+FAILURE_THRESHOLD = 5
+RECOVERY_SECONDS = 30.0
+
+CLOSED, OPEN, HALF_OPEN = "CLOSED", "OPEN", "HALF_OPEN"
+
+
+class CircuitBreaker:
+    """
+    CLOSED -> OPEN -> HALF_OPEN breaker for one backend. While OPEN, calls fail
+    fast without touching the network; after recovery_seconds one probe call
+    is allowed, and its outcome closes or re-opens the breaker. Thread-safe,
+    since the API clients issue requests from worker threads.
+    """
+
+    def __init__(self, failure_threshold: int = FAILURE_THRESHOLD, recovery_seconds: float = RECOVERY_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """True if a call may go to the backend now."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.recovery_seconds:
+                # Cooldown over: this caller becomes the single probe.
+                self.state = HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        """The backend answered: close the breaker."""
+        with self._lock:
+            self.state = CLOSED
+            self.consecutive_failures = 0
+
+    def record_failure(self):
+        """The backend failed: open the breaker at the threshold, or after a failed probe."""
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def record_error(self, error: requests.exceptions.RequestException):
+        """
+        Records a failed request. A 4xx response means the backend is up and
+        rejected the input, so it counts as a success for the breaker.
+        """
+        response = getattr(error, "response", None)
+        if response is not None and response.status_code < 500:
+            self.record_success()
+        else:
+            self.record_failure()
+
+
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def get_breaker(api_base_url: str) -> CircuitBreaker:
+    """Returns the process-wide breaker for a backend, so clients of the same URL share it."""
+    with _BREAKERS_LOCK:
+        breaker = _BREAKERS.get(api_base_url)
+        if breaker is None:
+            breaker = _BREAKERS[api_base_url] = CircuitBreaker()
+        return breaker
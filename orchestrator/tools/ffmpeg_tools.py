@@ -1,8 +1,42 @@
 # orchestrator/tools/ffmpeg_tools.py
 
+import hashlib
 import json
+import threading
+import time
 import requests
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Union
+
+from orchestrator.tools.circuit_breaker import get_breaker
+from orchestrator.tools.http_session import DEFAULT_DEADLINE_SECONDS, create_session, decode_json, request_with_retry
+
+# Long-poll window per /job-status request in wait_for_completion (the service
+# holds each request until the job's status changes or this many seconds pass).
+STATUS_LONG_POLL_SECONDS = 30.0
+# Slack on top of the long-poll window for the read timeout of each request.
+STATUS_LONG_POLL_GRACE_SECONDS = 5.0
+
+# Bulkhead defaults: submissions in flight at once, and callers allowed to wait
+# for a slot before further ones are rejected outright.
+MAX_CONCURRENT_SUBMISSIONS = 8
+MAX_QUEUED_SUBMISSIONS = 32
+
+def submission_key(command: Union[str, List[str]], input_file: str) -> str:
+    """
+    Stable identifier of a (command, input_file) submission. Unlike hash(),
+    it is the same in every process, whatever PYTHONHASHSEED is.
+    """
+    return hashlib.blake2b(json.dumps([command, input_file]).encode(), digest_size=8).hexdigest()
+
+
+class _InFlightSubmission:
+    """A submission being sent; identical concurrent calls wait for its result."""
+    __slots__ = ("done", "result")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = {"status": "FAILED", "job_id": "none", "notes": "Submission did not complete."}
+
 
 class FFMPEGGTools:
     """
@@ -10,22 +44,55 @@ class FFMPEGGTools:
     remote FFMPEG processing service (Linux Machine) via REST API calls.
     """
 
-    def __init__(self, api_base_url, use_dummy_data=False):
+    def __init__(self, api_base_url, use_dummy_data=False, deadline_s=None,
+                 max_concurrent_jobs=MAX_CONCURRENT_SUBMISSIONS, max_queued_jobs=MAX_QUEUED_SUBMISSIONS):
         """Initializes the tool client with the base URL of the remote API."""
         self.api_base_url = api_base_url
         self.use_dummy_data = use_dummy_data
+        # Default time limit for each API call, retries included; per-call deadline_s overrides it
+        self.deadline_s = float(deadline_s) if deadline_s else DEFAULT_DEADLINE_SECONDS
+        # One keep-alive session per client (see http_session.create_session)
+        self.session = create_session()
+        # Shared by every client of this URL: fails fast while the service is down
+        self.breaker = get_breaker(api_base_url)
+        # Bulkhead: at most max_concurrent_jobs submissions in flight and
+        # max_queued_jobs waiting; anything beyond that is rejected immediately.
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.max_queued_jobs = max_queued_jobs
+        self._slots = threading.BoundedSemaphore(max_concurrent_jobs)
+        self._admitted = 0
+        self._admission_lock = threading.Lock()
+        # Single-flight: identical submissions in progress, by submission_key
+        self._in_flight: Dict[str, _InFlightSubmission] = {}
+        self._in_flight_lock = threading.Lock()
         print(f"FFMPEGGTools initialized. Use dummy data: {self.use_dummy_data}")
 
-    def run_ffmpeg_command(self, command: str, input_file: str, output_file: str) -> Dict[str, Any]:
+    def close(self):
+        """Closes the pooled HTTP connections."""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def run_ffmpeg_command(self, command: Union[str, List[str]], input_file: str, output_file: str,
+                           deadline_s: Optional[float] = None) -> Dict[str, Any]:
         """
         Tool: Executes an FFMPEG job on the remote Linux machine via the /submit-job endpoint.
+        The command is either a parameter string or an argv list; a list is sent
+        as a JSON array and used by the service without any shell-style parsing.
         The output_file parameter is technically ignored as the Linux service determines it, 
         but we pass the required inputs.
+        A call made while an identical submission (same command and input file)
+        is still in progress does not submit again: it returns that call's result.
         """
         if self.use_dummy_data:
             print(f"MOCK: Submitting dummy job for: {input_file}")
-            # Simulating a successful job submission with dummy data
-            job_id = "job_" + str(hash(input_file))
+            # Simulating a successful job submission with dummy data; the ID is
+            # stable across runs (see submission_key).
+            job_id = "job_" + submission_key(command, input_file)
             return {
                 "status": "COMPLETED",
                 "job_id": job_id,
@@ -43,14 +110,99 @@ class FFMPEGGTools:
                 "ffmpeg_command": command
             }
             
+            key = submission_key(command, input_file)
+            with self._in_flight_lock:
+                flight = self._in_flight.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._in_flight[key] = _InFlightSubmission()
+            if not leader:
+                flight.done.wait()
+                return dict(flight.result)
+            try:
+                flight.result = self._admit_and_submit(endpoint, payload, input_file, deadline_s or self.deadline_s)
+                return dict(flight.result)
+            finally:
+                with self._in_flight_lock:
+                    del self._in_flight[key]
+                flight.done.set()
+
+    def _admit_and_submit(self, endpoint: str, payload: Dict[str, Any], input_file: str,
+                          deadline_s: float) -> Dict[str, Any]:
+        """Submits through the bulkhead: waits for a slot, or rejects when the queue is full."""
+        with self._admission_lock:
+            if self._admitted >= self.max_concurrent_jobs + self.max_queued_jobs:
+                print(f"ERROR: Too many pending submissions to {self.api_base_url}; rejecting {input_file}.")
+                return {"status": "REJECTED", "job_id": "none", "notes": "bulkhead full"}
+            self._admitted += 1
+        try:
+            with self._slots:
+                return self._submit_job(endpoint, payload, deadline_s)
+        finally:
+            with self._admission_lock:
+                self._admitted -= 1
+
+    def _submit_job(self, endpoint: str, payload: Dict[str, Any], deadline_s: float) -> Dict[str, Any]:
+        """Sends one /submit-job request through the circuit breaker."""
+        if not self.breaker.allow_request():
+            print(f"CRITICAL ERROR: FFMPEG API at {self.api_base_url} is unavailable (circuit open).")
+            return {"status": "FAILED", "job_id": "none", "notes": "circuit open"}
+        try:
+            # Use POST to submit the job; not idempotent, so it is only
+            # retried on responses that mean the job was not accepted.
+            response = request_with_retry(self.session.post, endpoint, idempotent=False,
+                                          deadline_s=deadline_s, json=payload)
+            response.raise_for_status() # Raise an HTTPError for bad status codes
+            job_info = decode_json(response.content)
+            self.breaker.record_success()
+            return job_info
+        except requests.exceptions.RequestException as e:
+            self.breaker.record_error(e)
+            print(f"CRITICAL ERROR: Failed to connect to FFMPEG API at {endpoint}. Error: {e}")
+            return {"status": "FAILED", "job_id": "none", "notes": str(e)}
+
+    def wait_for_completion(self, job_id: str, deadline_s: float = 600.0) -> Dict[str, Any]:
+        """
+        Tool: Waits for a submitted job to finish, using long-poll requests to
+        /job-status/{job_id}?wait=... so each request returns as soon as the job
+        changes stage. Returns the final status once COMPLETED or *_FAILED, or
+        the last status seen when deadline_s runs out. If the service cannot be
+        reached the status is "UNKNOWN"; the job itself may still be running.
+        """
+        if self.use_dummy_data:
+            return {"job_id": job_id, "status": "COMPLETED", "progress_percent": 100.0, "notes": "Mock job finished."}
+
+        endpoint = f"{self.api_base_url}/job-status/{job_id}"
+        deadline = time.monotonic() + deadline_s
+        job_status = {"job_id": job_id, "status": "UNKNOWN", "notes": "No status received."}
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return job_status
+            if not self.breaker.allow_request():
+                print(f"CRITICAL ERROR: FFMPEG API at {self.api_base_url} is unavailable (circuit open).")
+                return {"job_id": job_id, "status": "UNKNOWN", "notes": "circuit open"}
+            wait = min(STATUS_LONG_POLL_SECONDS, remaining)
+            previous_status = job_status.get("status")
+            started = time.monotonic()
             try:
-                # Use POST to submit the job
-                response = requests.post(endpoint, json=payload)
-                response.raise_for_status() # Raise an HTTPError for bad status codes
-                
-                return response.json()
+                response = request_with_retry(
+                    self.session.get, endpoint, params={"wait": wait},
+                    deadline_s=wait + STATUS_LONG_POLL_GRACE_SECONDS,
+                )
+                response.raise_for_status()
+                job_status = decode_json(response.content)
+                self.breaker.record_success()
             except requests.exceptions.RequestException as e:
-                print(f"CRITICAL ERROR: Failed to connect to FFMPEG API at {endpoint}. Error: {e}")
-                return {"status": "FAILED", "job_id": "none", "notes": str(e)}
+                self.breaker.record_error(e)
+                print(f"ERROR: Failed to poll job {job_id} at {endpoint}. Error: {e}")
+                return {"job_id": job_id, "status": "UNKNOWN", "notes": str(e)}
+            status = job_status.get("status", "")
+            if status == "COMPLETED" or status.endswith("FAILED"):
+                return job_status
+            if status == previous_status and time.monotonic() - started < wait / 2:
+                # Answered early without a change: the service does not hold
+                # requests, so fall back to its Retry-After polling hint.
+                time.sleep(min(float(response.headers.get("Retry-After", 1)), max(deadline - time.monotonic(), 0)))
 
 # --- No __main__ block needed here ---
\ No newline at end of file
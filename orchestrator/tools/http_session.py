@@ -0,0 +1,115 @@
+# orchestrator/tools/http_session.py
+
+import json
+import random
+import time
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # orjson is optional; the stdlib parser reads the same bodies
+    _loads = json.loads
+
+# Connections kept alive per API client.
+HTTP_POOL_SIZE = 16
+
+# Default end-to-end deadline for one API call (all attempts included), and the
+# cap on the connect phase of each attempt, in seconds.
+DEFAULT_DEADLINE_SECONDS = 30.0
+CONNECT_TIMEOUT_SECONDS = 5.0
+
+# Response-level retries (request_with_retry): attempts and the full-jitter
+# backoff bounds, in seconds.
+RETRY_ATTEMPTS = 5
+RETRY_BASE_DELAY = 0.2
+RETRY_MAX_DELAY = 20.0
+# Overloaded or unavailable: the request was not (fully) handled, try again later.
+RETRYABLE_STATUSES = frozenset({429, 502, 503, 504})
+# For requests that must not run twice, only statuses meaning "not processed".
+RETRYABLE_STATUSES_UNSAFE = frozenset({429, 503})
+
+
+def create_session() -> requests.Session:
+    """
+    Builds the keep-alive session shared by one API client's calls. Repeated
+    requests reuse pooled connections instead of opening a new one each time.
+    Failed connection attempts are retried with a short backoff; a request that
+    reached the server is only retried for idempotent methods (urllib3's default),
+    so a POST /submit-job is never sent twice.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=HTTP_POOL_SIZE,
+        max_retries=Retry(total=3, backoff_factor=0.1),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def decode_json(body: bytes) -> Any:
+    """
+    Parses a JSON response body (or one NDJSON line) straight from bytes.
+    A body that is not JSON (a proxy error page, a truncated response) raises
+    requests' InvalidJSONError, a RequestException, as response.json() would,
+    so the callers' existing RequestException handlers still catch it.
+    """
+    try:
+        return _loads(body)
+    except ValueError as e:  # orjson.JSONDecodeError and json.JSONDecodeError
+        raise requests.exceptions.InvalidJSONError(f"Invalid JSON in response body: {e}") from e
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Full jitter: uniform over [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt)))
+
+
+def _retry_after(response: requests.Response) -> float:
+    """The Retry-After header in seconds (delta-seconds form only), capped; 0 if absent."""
+    try:
+        return min(RETRY_MAX_DELAY, max(0.0, float(response.headers.get("Retry-After", 0))))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def request_with_retry(send, url: str, *, idempotent: bool = True,
+                       deadline_s: float = DEFAULT_DEADLINE_SECONDS, **kwargs) -> requests.Response:
+    """
+    Calls send(url, **kwargs) (e.g. session.get or session.post) and retries
+    429/502/503/504 responses and, for idempotent requests, timeouts, sleeping
+    with full-jitter exponential backoff (or Retry-After, if longer) between
+    attempts. Non-idempotent requests are only retried on 429/503. Other
+    responses, including 4xx validation errors, are returned as-is; the last
+    response or exception is passed through once the attempts run out.
+    Connection failures are retried by the session's adapter (create_session).
+
+    The whole call, retries and backoff included, finishes within deadline_s:
+    each attempt gets the remaining time as its socket timeout, and no retry is
+    started that could not complete in time.
+    """
+    retryable = RETRYABLE_STATUSES if idempotent else RETRYABLE_STATUSES_UNSAFE
+    deadline = time.monotonic() + deadline_s
+    for attempt in range(RETRY_ATTEMPTS):
+        remaining = max(deadline - time.monotonic(), 0.001)
+        last_attempt = attempt == RETRY_ATTEMPTS - 1
+        try:
+            response = send(url, timeout=(min(CONNECT_TIMEOUT_SECONDS, remaining), remaining), **kwargs)
+        except requests.exceptions.Timeout:
+            delay = _backoff_delay(attempt)
+            if last_attempt or not idempotent or time.monotonic() + delay >= deadline:
+                raise
+        else:
+            if response.status_code not in retryable or last_attempt:
+                return response
+            delay = max(_backoff_delay(attempt), _retry_after(response))
+            if time.monotonic() + delay >= deadline:
+                return response
+            response.close()
+        time.sleep(delay)
@@ -1,8 +1,78 @@
 # orchestrator/tools/media_tools.py
 
+import functools
 import json
+import re
+import threading
+import time
 import requests
-from typing import List, Dict, Any
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+
+from orchestrator.tools.circuit_breaker import get_breaker
+from orchestrator.tools.http_session import DEFAULT_DEADLINE_SECONDS, create_session, decode_json, request_with_retry
+
+# Dummy-data classification: one compiled pattern tags a path in a single scan,
+# most specific keyword first. Tags map to canned metadata templates.
+_CLASSIFIER = re.compile(r"(?P<uhd>2160p_hevc_8ch)|(?P<hd>1080p_hevc)|(?P<sd>720p_avc)", re.ASCII)
+_DUMMY_METADATA = {
+    "uhd": {"video_codec": "HEVC", "resolution": "3840x2160", "audio_channels": 8},
+    "hd": {"video_codec": "HEVC", "resolution": "1920x1080", "audio_channels": 8},
+    "sd": {"video_codec": "AVC", "resolution": "1280x720", "audio_channels": 2},
+    "other": {"video_codec": "AVC", "resolution": "1280x720", "audio_channels": 2},
+}
+
+# Paths per /get-metadata-batch request, and how many such requests run at once.
+# The service probes each batch concurrently, so a few in-flight chunks keep it
+# busy without one request carrying an unbounded payload.
+METADATA_BATCH_SIZE = 256
+METADATA_BATCH_CONCURRENCY = 4
+
+# Streaming /scan-files format, requested via the Accept header.
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Client-side metadata cache: short-lived, since a file can be re-encoded in
+# place; it only spares repeat lookups within one planning pass.
+METADATA_CACHE_SIZE = 4096
+METADATA_CACHE_TTL_SECONDS = 30.0
+
+
+class _MetadataCache:
+    """
+    Thread-safe LRU of metadata responses keyed by file path, each entry
+    expiring ttl seconds after it was stored. Copies go in and out, so callers
+    cannot mutate a cached entry.
+    """
+
+    def __init__(self, maxsize: int = METADATA_CACHE_SIZE, ttl: float = METADATA_CACHE_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, file_path: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(file_path)
+            if entry is None:
+                return None
+            if time.monotonic() >= entry[0]:
+                del self._entries[file_path]
+                return None
+            self._entries.move_to_end(file_path)
+            return dict(entry[1])
+
+    def put(self, file_path: str, metadata: Dict[str, Any]):
+        with self._lock:
+            self._entries[file_path] = (time.monotonic() + self.ttl, dict(metadata))
+            self._entries.move_to_end(file_path)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
 
 class MediaTools:
     """
@@ -10,15 +80,37 @@ class MediaTools:
     remote Media Tools service (Unix Machine) via REST API calls.
     """
 
-    def __init__(self, api_base_url, use_dummy_data=False):
+    def __init__(self, api_base_url, use_dummy_data=False, deadline_s=None):
         """Initializes the tool client with the base URL of the remote API."""
         self.api_base_url = api_base_url
         self.use_dummy_data = use_dummy_data
+        # Default time limit for each API call, retries included; per-call deadline_s overrides it
+        self.deadline_s = float(deadline_s) if deadline_s else DEFAULT_DEADLINE_SECONDS
+        # One keep-alive session per client (see http_session.create_session)
+        self.session = create_session()
+        # Shared by every client of this URL: fails fast while the service is down
+        self.breaker = get_breaker(api_base_url)
+        self._metadata_cache = _MetadataCache()
         print(f"MediaTools initialized. Use dummy data: {self.use_dummy_data}")
 
-    def list_media_files(self, location: str = "") -> List[str]:
+    def close(self):
+        """Closes the pooled HTTP connections."""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def clear_metadata_cache(self):
+        """Forgets every cached metadata response."""
+        self._metadata_cache.clear()
+
+    def list_media_files(self, location: str = "", deadline_s: Optional[float] = None) -> List[str]:
         """
         Tool: Fetches a list of media files from the remote service.
+        The call gives up after deadline_s seconds (default: the client's deadline_s).
         NOTE: The location parameter is now deprecated/ignored in the API call, 
               but kept in the function signature for compatibility.
         """
@@ -35,38 +127,121 @@ class MediaTools:
         else:
             # FIX: Use the correct live API endpoint: /scan-files
             endpoint = f"{self.api_base_url}/scan-files"
+            if not self.breaker.allow_request():
+                print(f"ERROR: Media Tools API at {self.api_base_url} is unavailable (circuit open).")
+                return []
             try:
-                response = requests.get(endpoint)
-                response.raise_for_status()  # Raise an HTTPError for bad status codes
-                
-                # Check for a 404 (Not Found) or 405 (Method Not Allowed) from the API
-                if response.status_code == 404:
-                    print(f"ERROR: Endpoint not found. Check if Media Tools service is running at {endpoint}")
-                    return []
-                
-                return response.json()
+                # NDJSON is parsed line by line as it arrives, instead of
+                # buffering the whole body for one large json parse.
+                response = request_with_retry(self.session.get, endpoint, deadline_s=deadline_s or self.deadline_s,
+                                              headers={"Accept": NDJSON_MEDIA_TYPE}, stream=True)
+                with response:
+                    response.raise_for_status()  # Raise an HTTPError for bad status codes
+                    
+                    # Check for a 404 (Not Found) or 405 (Method Not Allowed) from the API
+                    if response.status_code == 404:
+                        print(f"ERROR: Endpoint not found. Check if Media Tools service is running at {endpoint}")
+                        return []
+                    
+                    if NDJSON_MEDIA_TYPE in response.headers.get("Content-Type", ""):
+                        files = [decode_json(line) for line in response.iter_lines() if line]
+                    else:
+                        files = decode_json(response.content)  # Services that only send the JSON array
+                self.breaker.record_success()
+                return files
             except requests.exceptions.RequestException as e:
+                self.breaker.record_error(e)
                 print(f"ERROR: Failed to connect to Media Tools API at {endpoint}. Error: {e}")
                 return []
 
-    def get_file_metadata(self, file_path: str) -> Dict[str, Any]:
+    def get_file_metadata(self, file_path: str, cache_bypass: bool = False,
+                          deadline_s: Optional[float] = None) -> Dict[str, Any]:
         """
         Tool: Retrieves detailed metadata for a specific media file from the remote service.
+        Responses are reused for METADATA_CACHE_TTL_SECONDS unless cache_bypass is set.
         """
         if self.use_dummy_data:
             print(f"MOCK: Returning hardcoded metadata for file: {file_path}")
             # Mocked metadata remains for testing purposes
-            if "1080p_hevc" in file_path:
-                return {"video_codec": "HEVC", "resolution": "1920x1080", "audio_channels": 8}
-            else:
-                return {"video_codec": "AVC", "resolution": "1280x720", "audio_channels": 2}
+            match = _CLASSIFIER.search(file_path)
+            return dict(_DUMMY_METADATA[match.lastgroup if match else "other"])
         
         else:
+            if not cache_bypass:
+                cached = self._metadata_cache.get(file_path)
+                if cached is not None:
+                    return cached
             endpoint = f"{self.api_base_url}/get-metadata"
+            if not self.breaker.allow_request():
+                print(f"ERROR: Media Tools API at {self.api_base_url} is unavailable (circuit open).")
+                return {}
             try:
-                response = requests.post(endpoint, json={"file_path": file_path})
+                response = request_with_retry(self.session.post, endpoint, json={"file_path": file_path},
+                                              deadline_s=deadline_s or self.deadline_s)
                 response.raise_for_status()
-                return response.json()
+                metadata = decode_json(response.content)
+                self.breaker.record_success()
+                if metadata:
+                    self._metadata_cache.put(file_path, metadata)
+                return metadata
             except requests.exceptions.RequestException as e:
+                self.breaker.record_error(e)
                 print(f"ERROR: Failed to fetch metadata from {endpoint}. Error: {e}")
-                return {}
\ No newline at end of file
+                return {}
+
+    def get_metadata_batch(self, file_paths: List[str], cache_bypass: bool = False,
+                           deadline_s: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Tool: Retrieves metadata for many files in as few round-trips as possible.
+        Cached responses are used unless cache_bypass is set; the remaining paths
+        are split into METADATA_BATCH_SIZE chunks that are requested concurrently
+        over the pooled session. Returns a dict keyed by file path; files the
+        service could not probe map to {}.
+        """
+        if self.use_dummy_data:
+            print(f"MOCK: Returning hardcoded metadata for {len(file_paths)} files.")
+            return {file_path: self.get_file_metadata(file_path) for file_path in file_paths}
+
+        else:
+            results = {}
+            misses = []
+            for file_path in dict.fromkeys(file_paths):
+                cached = None if cache_bypass else self._metadata_cache.get(file_path)
+                if cached is not None:
+                    results[file_path] = cached
+                else:
+                    misses.append(file_path)
+            if not misses:
+                return results
+
+            chunks = [misses[i:i + METADATA_BATCH_SIZE] for i in range(0, len(misses), METADATA_BATCH_SIZE)]
+            fetch = functools.partial(self._fetch_metadata_chunk, deadline_s=deadline_s or self.deadline_s)
+            if len(chunks) <= 1:
+                fetched = [fetch(misses)]
+            else:
+                with ThreadPoolExecutor(max_workers=min(len(chunks), METADATA_BATCH_CONCURRENCY)) as executor:
+                    fetched = list(executor.map(fetch, chunks))
+            for chunk_result in fetched:
+                for file_path, metadata in chunk_result.items():
+                    if metadata:
+                        self._metadata_cache.put(file_path, metadata)
+                results.update(chunk_result)
+            return results
+
+    def _fetch_metadata_chunk(self, file_paths: List[str], deadline_s: float) -> Dict[str, Dict[str, Any]]:
+        """One /get-metadata-batch request; on failure every path maps to {}."""
+        endpoint = f"{self.api_base_url}/get-metadata-batch"
+        if not self.breaker.allow_request():
+            print(f"ERROR: Media Tools API at {self.api_base_url} is unavailable (circuit open).")
+            return {file_path: {} for file_path in file_paths}
+        try:
+            response = request_with_retry(self.session.post, endpoint, json={"file_paths": file_paths},
+                                          deadline_s=deadline_s)
+            response.raise_for_status()
+            chunk_result = decode_json(response.content)
+            self.breaker.record_success()
+            return chunk_result
+        except requests.exceptions.RequestException as e:
+            self.breaker.record_error(e)
+            print(f"ERROR: Failed to fetch batch metadata from {endpoint}. Error: {e}")
+            return {file_path: {} for file_path in file_paths}
@@ -4,13 +4,17 @@ import pytest
 import os
 import json
 import sqlite3
+import uuid
+from types import SimpleNamespace
 
-@pytest.fixture(scope="function")
-def test_config_files(tmp_path):
+@pytest.fixture(scope="session")
+def test_config_files(tmp_path_factory):
     """
-    Fixture to create temporary config.json and .env files for a test.
+    Fixture to create temporary config.json and .env files, written once per
+    session. Tests must not modify them; copy them to tmp_path to do so.
+    Yields the directory and both file paths (as str, joined once here).
     """
-    orchestrator_dir = tmp_path / "orchestrator"
+    orchestrator_dir = tmp_path_factory.mktemp("config") / "orchestrator"
     orchestrator_dir.mkdir()
     
     config_path = orchestrator_dir / "config.json"
@@ -31,19 +35,15 @@ def test_config_files(tmp_path):
     with open(env_path, "w") as f:
         f.write(env_content)
     
-    # Yield the path to the temporary directory
-    yield orchestrator_dir
+    yield SimpleNamespace(dir=orchestrator_dir, config_path=str(config_path), env_path=str(env_path))
     
-    # Pytest's tmp_path fixture automatically handles cleanup.
+    # Pytest's tmp_path_factory fixture automatically handles cleanup.
 
 @pytest.fixture(scope="function")
-def test_db(tmp_path):
+def test_db():
     """
-    Fixture to create a temporary SQLite database file for a test.
+    Fixture providing a private shared-cache in-memory SQLite database URI for a
+    test. The database lives while a connection to it is open, so nothing is
+    written to disk and nothing is left to clean up.
     """
-    db_path = tmp_path / "test.db"
-    
-    # Yield the database path to the test
-    yield str(db_path)
-    
-    # Pytest's tmp_path fixture automatically handles cleanup.
\ No newline at end of file
+    yield f"file:cinchro_test_{uuid.uuid4().hex}?mode=memory&cache=shared"
@@ -1,21 +1,17 @@
 # tests/ffmpeg_tools/conftest.py (CORRECTED SCOPE)
 
 import pytest
-import os
 import json
+import uuid
 from pathlib import Path
-import sys
-
-# Ensure imports work by adding project root to sys.path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
 # --- Fixtures for Configuration ---
 
-@pytest.fixture(scope="module") # FIX: Changing scope to module
+@pytest.fixture(scope="session") # Written once; every test only reads these files
 def ffmpeg_config_files(tmp_path_factory) -> Path:
     """
     Creates temporary config.json and .env files for the FFMPEG Tools service
-    in a module-level directory and returns the path to that directory.
+    in a session-level directory and returns the path to that directory.
     """
     # FIX: Using tmp_path_factory to create the directory manually
     tmp_path = tmp_path_factory.mktemp("ffmpeg_config")
@@ -54,7 +50,7 @@ def ffmpeg_config_files(tmp_path_factory) -> Path:
     return tmp_path
 
 # --- Fixture for Database Path ---
-@pytest.fixture(scope="module") # FIX: Must match the scope of ffmpeg_config_files
+@pytest.fixture(scope="session") # Must match the scope of ffmpeg_config_files
 def ffmpeg_db_path(ffmpeg_config_files) -> str:
     """
     Returns the temporary database path injected into the config.json fixture.
@@ -64,4 +60,12 @@ def ffmpeg_db_path(ffmpeg_config_files) -> str:
     with open(config_path, 'r') as f:
         config = json.load(f)
     
-    return config['database_path']
\ No newline at end of file
+    return config['database_path']
+
+@pytest.fixture
+def fast_db_uri() -> str:
+    """
+    Returns a URI for a private shared-cache in-memory SQLite database. It lives
+    as long as a connection to it is open, so no file is created or removed.
+    """
+    return f"file:cinchro_test_{uuid.uuid4().hex}?mode=memory&cache=shared"
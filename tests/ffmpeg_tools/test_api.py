@@ -1,19 +1,14 @@
 # tests/ffmpeg_tools/test_api.py
 
 import pytest
-import os
-import sys
 import json
 import time
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, AsyncMock, patch
 from datetime import datetime
 from typing import Dict, Any
 
-# Adjust path for internal imports
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
-
 # Import modules needed for testing
-from ffmpeg_tools.api import app
+from ffmpeg_tools.api import app, get_config, get_db, get_job_manager
 from ffmpeg_tools.job_manager import JobManager
 from ffmpeg_tools.database import JobDatabaseManager
 from ffmpeg_tools.config import ConfigManager
@@ -35,7 +30,7 @@ def mock_db_manager():
     db_manager = MagicMock(spec=JobDatabaseManager)
     
     # Define a default mock job entry for polling tests
-    NOW_STR = datetime.now().strftime("%Y-%m-%dT%H:%M:%S.%f")
+    NOW_TS = time.time()
     
     db_manager.get_job.side_effect = lambda job_id: {
         # This mocks the COMPLETED job status after synchronous execution
@@ -43,7 +38,7 @@ def mock_db_manager():
             "job_id": "mock-job-1234",
             "status": "COMPLETED",
             "progress_percent": 100.0,
-            "last_updated": NOW_STR,
+            "last_updated": NOW_TS,
             "notes": "All stages successful."
         },
         # This mocks a RUNNING job status for the status polling test
@@ -51,7 +46,7 @@ def mock_db_manager():
             "job_id": "running-job-5678",
             "status": "PROCESSING",
             "progress_percent": 50.0,
-            "last_updated": NOW_STR,
+            "last_updated": NOW_TS,
             "notes": "FFMPEG processing in progress."
         }
     }.get(job_id, {})
@@ -59,25 +54,36 @@ def mock_db_manager():
     return db_manager
 
 @pytest.fixture
-def ffmpeg_api_client(monkeypatch, mock_job_manager, mock_db_manager, ffmpeg_config_files):
-    # 1. Patch the global instances in the API module
-    # These assignments now work because the variables exist as globals in api.py
-    monkeypatch.setattr(sys.modules['ffmpeg_tools.api'], 'job_manager', mock_job_manager)
-    monkeypatch.setattr(sys.modules['ffmpeg_tools.api'], 'db_manager', mock_db_manager)
-    from fastapi.testclient import TestClient
+def mock_arq_pool():
+    """Mocks the ARQ Redis pool normally opened by the app lifespan."""
+    return AsyncMock()
+
+@pytest.fixture(scope="module")
+def api_config_manager(ffmpeg_config_files):
+    """Parses the fixture config.json/.env once per module."""
+    return ConfigManager(
+        config_path=str(ffmpeg_config_files / 'config.json'),
+        env_path=str(ffmpeg_config_files / '.env')
+    )
 
-    # 2. Mock the ConfigManager instance creation itself to use our fixture files
-    def mock_config_init(*args, **kwargs):
-        return ConfigManager(
-            config_path=str(ffmpeg_config_files / 'config.json'),
-            env_path=str(ffmpeg_config_files / '.env')
-        )
-    
-    monkeypatch.setattr(sys.modules['ffmpeg_tools.api'], 'config_manager', mock_config_init())
-    
-    # 3. Return the client
+@pytest.fixture(scope="module")
+def api_test_client():
+    """One TestClient for the module; the per-test mocks are bound via dependency overrides."""
+    from fastapi.testclient import TestClient
     return TestClient(app)
 
+@pytest.fixture
+def ffmpeg_api_client(monkeypatch, api_test_client, api_config_manager, mock_job_manager, mock_db_manager, mock_arq_pool):
+    # 1. Override the injected dependencies with this test's mocks / fixture-backed config
+    app.dependency_overrides[get_config] = lambda: api_config_manager
+    app.dependency_overrides[get_db] = lambda: mock_db_manager
+    app.dependency_overrides[get_job_manager] = lambda: mock_job_manager
+    monkeypatch.setattr(app.state, 'arq', mock_arq_pool, raising=False)
+
+    # 2. Return the shared client
+    yield api_test_client
+    app.dependency_overrides.clear()
+
 # --- TESTS ---
 
 def test_status_endpoint_ok(ffmpeg_api_client):
@@ -88,10 +94,10 @@ def test_status_endpoint_ok(ffmpeg_api_client):
     assert response.json()["status"] == "ok"
     assert response.json()["service"] == "Cinchro FFMPEG Tools"
 
-def test_submit_job_success(ffmpeg_api_client, mock_job_manager):
+def test_submit_job_success(ffmpeg_api_client, mock_job_manager, mock_arq_pool):
     """
-    Tests job submission. Asserts the JobManager is called and the API returns 
-    the final 'COMPLETED' status (due to synchronous execution mock).
+    Tests job submission. Asserts the JobManager persists the job, the pipeline is
+    enqueued on ARQ, and the API returns 202 with the initial 'SUBMITTED' status.
     """
     # Test Payload
     payload = {
@@ -102,11 +108,11 @@ def test_submit_job_success(ffmpeg_api_client, mock_job_manager):
     response = ffmpeg_api_client.post("/submit-job", json=payload)
     response_data: Dict[str, Any] = response.json()
     
-    # 1. Assert API Response (Assertions remain the same)
-    assert response.status_code == 200
-    assert response_data["status"] == "COMPLETED"
+    # 1. Assert API Response
+    assert response.status_code == 202
+    assert response_data["status"] == "SUBMITTED"
     assert response_data["job_id"] == "mock-job-1234"
-    assert response_data["progress_percent"] == 100.0
+    assert response_data["progress_percent"] == 0.0
 
     # 2. Assert JobManager was called correctly
     # FIX: Using POSITIONAL arguments to match the actual API call style.
@@ -115,6 +121,22 @@ def test_submit_job_success(ffmpeg_api_client, mock_job_manager):
         payload['ffmpeg_command'] # positional argument 2
     )
 
+    # 3. Assert the pipeline was handed off to the worker
+    mock_arq_pool.enqueue_job.assert_awaited_once_with("run_ffmpeg_task", "mock-job-1234")
+
+
+def test_submit_job_accepts_argv_list(ffmpeg_api_client, mock_job_manager, mock_arq_pool):
+    """Tests an ffmpeg_command sent as a JSON argv list reaches the JobManager unchanged."""
+    payload = {
+        "input_file": "/remote/media/Test_File_1080p.mkv",
+        "ffmpeg_command": ["-c:v", "libx265", "-metadata", "title=It's here"]
+    }
+
+    response = ffmpeg_api_client.post("/submit-job", json=payload)
+
+    assert response.status_code == 202
+    mock_job_manager.create_new_job.assert_called_once_with(payload['input_file'], payload['ffmpeg_command'])
+
 
 def test_job_status_poll_completed(ffmpeg_api_client):
     """Tests the /job-status endpoint for a completed job."""
@@ -127,6 +149,7 @@ def test_job_status_poll_completed(ffmpeg_api_client):
     assert response_data["status"] == "COMPLETED"
     assert response_data["current_stage"] == "COMPLETED"
     assert response_data["progress_percent"] == 100.0
+    assert response.headers["Retry-After"] == "30"
 
 def test_job_status_poll_running(ffmpeg_api_client):
     """Tests the /job-status endpoint for a job currently in progress."""
@@ -137,9 +160,63 @@ def test_job_status_poll_running(ffmpeg_api_client):
     assert response.status_code == 200
     assert response_data["status"] == "PROCESSING"
     assert response_data["progress_percent"] == 50.0
+    assert response.headers["Retry-After"] in ("1", "2")
 
 def test_job_status_not_found(ffmpeg_api_client):
     """Tests the /job-status endpoint returns 404 for an invalid ID."""
     response = ffmpeg_api_client.get("/job-status/invalid-uuid-000")
     assert response.status_code == 404
-    assert "Job ID not found" in response.json()["detail"]
\ No newline at end of file
+    assert "Job ID not found" in response.json()["detail"]
+
+@pytest.mark.parametrize("legacy_last_updated", [
+    lambda ts: datetime.fromtimestamp(ts).isoformat(),  # written before unix timestamps
+    lambda ts: str(ts),  # unix timestamp read back from a TEXT-declared column
+], ids=["iso-8601", "numeric-string"])
+def test_job_status_accepts_legacy_text_timestamps(ffmpeg_api_client, mock_db_manager, legacy_last_updated):
+    """Tests rows whose last_updated comes back as text still report elapsed time."""
+    mock_db_manager.get_job.side_effect = lambda job_id: {
+        "job_id": job_id,
+        "status": "PROCESSING",
+        "progress_percent": 10.0,
+        "last_updated": legacy_last_updated(time.time() - 120),
+        "notes": "Legacy row."
+    }
+    response = ffmpeg_api_client.get("/job-status/legacy-job")
+
+    assert response.status_code == 200
+    assert response.json()["time_elapsed_seconds"] >= 119
+    assert response.headers["Retry-After"] == "5"
+
+def test_job_status_batch(ffmpeg_api_client, mock_db_manager):
+    """Tests the batch endpoint returns statuses keyed by job ID, omitting unknown IDs."""
+    mock_db_manager.get_jobs.side_effect = lambda job_ids: {
+        job_id: mock_db_manager.get_job(job_id) for job_id in job_ids if mock_db_manager.get_job(job_id)
+    }
+    response = ffmpeg_api_client.post(
+        "/job-status/batch",
+        json={"job_ids": ["mock-job-1234", "running-job-5678", "invalid-uuid-000"]}
+    )
+    response_data: Dict[str, Any] = response.json()
+
+    assert response.status_code == 200
+    assert set(response_data) == {"mock-job-1234", "running-job-5678"}
+    assert response_data["running-job-5678"]["progress_percent"] == 50.0
+
+def test_job_status_long_poll_returns_on_status_change(ffmpeg_api_client, mock_db_manager, monkeypatch):
+    """Tests ?wait=N holds the request until the job's status changes, then answers."""
+    from ffmpeg_tools import api as ffmpeg_api
+    monkeypatch.setattr(ffmpeg_api, "STATUS_WAIT_POLL_SECONDS", 0.01)
+    statuses = iter(["PROCESSING", "PROCESSING", "TRANSFERRING_OUT"])
+    mock_db_manager.get_job.side_effect = lambda job_id: {
+        "job_id": job_id,
+        "status": next(statuses),
+        "progress_percent": 100.0,
+        "last_updated": time.time(),
+        "notes": None
+    }
+
+    response = ffmpeg_api_client.get("/job-status/waiting-job", params={"wait": 5})
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "TRANSFERRING_OUT"
+    assert mock_db_manager.get_job.call_count == 3
@@ -0,0 +1,56 @@
+# tests/ffmpeg_tools/test_config.py
+
+import pytest
+from ffmpeg_tools.config import ConfigManager
+
+# Note: ffmpeg_config_files fixture is auto-discovered from conftest.py
+
+@pytest.fixture
+def config_manager(ffmpeg_config_files):
+    """Provides a ConfigManager loaded from the temporary config files."""
+    return ConfigManager(
+        config_path=str(ffmpeg_config_files / 'config.json'),
+        env_path=str(ffmpeg_config_files / '.env')
+    )
+
+def test_get_top_level_and_dotted_keys(config_manager):
+    """Verifies flat and nested (dotted) keys resolve from config.json."""
+    assert config_manager.get("rsync_path") == "/usr/bin/rsync"
+    assert config_manager.get("media_machine_config.storage_host") == "192.168.0.112"
+    assert config_manager.get("transfer_paths")["local_temp_dir"] == "/home/sayang/Videos/Archive"
+
+def test_get_missing_key_returns_default(config_manager):
+    """Verifies unknown keys (flat or dotted) fall back to the default."""
+    assert config_manager.get("does_not_exist", "fallback") == "fallback"
+    assert config_manager.get("media_machine_config.missing") is None
+
+def test_env_variables_take_precedence(ffmpeg_config_files, monkeypatch):
+    """Verifies environment variables override config.json values."""
+    monkeypatch.setenv("rsync_path", "/opt/bin/rsync")
+    config_manager = ConfigManager(
+        config_path=str(ffmpeg_config_files / 'config.json'),
+        env_path=str(ffmpeg_config_files / '.env')
+    )
+    assert config_manager.get("rsync_path") == "/opt/bin/rsync"
+
+def test_shared_instance_reloads_only_when_config_changes(ffmpeg_config_files):
+    """Verifies shared() reuses one instance until config.json's mtime changes."""
+    import os
+    config_path = str(ffmpeg_config_files / 'config.json')
+    env_path = str(ffmpeg_config_files / '.env')
+
+    first = ConfigManager.shared(config_path, env_path)
+    assert ConfigManager.shared(config_path, env_path) is first
+
+    stat = os.stat(config_path)
+    os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert ConfigManager.shared(config_path, env_path) is not first
+
+def test_from_dict_needs_no_files(monkeypatch):
+    """Verifies from_dict resolves dotted keys in memory and still lets the environment win."""
+    config_manager = ConfigManager.from_dict({"rsync_path": "/bin/rsync", "transfer_paths": {"local_temp_dir": "/t"}})
+    assert config_manager.get("transfer_paths.local_temp_dir") == "/t"
+    assert config_manager.get("missing", "fallback") == "fallback"
+
+    monkeypatch.setenv("rsync_path", "/opt/bin/rsync")
+    assert ConfigManager.from_dict({"rsync_path": "/bin/rsync"}).get("rsync_path") == "/opt/bin/rsync"
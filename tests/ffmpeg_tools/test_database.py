@@ -5,24 +5,28 @@ from ffmpeg_tools.database import JobDatabaseManager
 import os
 import time
 
-# Note: ffmpeg_db_path fixture is auto-discovered from conftest.py
+# Note: the fast_db_uri fixture is are auto-discovered from conftest.py
 
 @pytest.fixture
-def db_manager(ffmpeg_db_path):
-    """Provides a clean instance of JobDatabaseManager for each test."""
-    # Ensure the database file is clean/removed before starting (though tmp_path should handle this)
-    if os.path.exists(ffmpeg_db_path):
-        os.remove(ffmpeg_db_path)
-        
-    manager = JobDatabaseManager(ffmpeg_db_path)
+def db_manager(fast_db_uri):
+    """Provides a clean, in-memory instance of JobDatabaseManager for each test."""
+    manager = JobDatabaseManager(fast_db_uri)
     yield manager
     manager.close()
 
-def test_db_creation_and_check(db_manager, ffmpeg_db_path):
+@pytest.fixture
+def file_db_manager(tmp_path):
+    """Provides a clean file-backed JobDatabaseManager, for tests of on-disk behaviour."""
+    # A private file: the session-wide ffmpeg_db_path is held open by other modules' managers
+    manager = JobDatabaseManager(str(tmp_path / "ffmpeg_jobs.db"))
+    yield manager
+    manager.close()
+
+def test_db_creation_and_check(file_db_manager):
     """Verifies that the database file and table are created."""
-    assert os.path.exists(ffmpeg_db_path)
+    assert os.path.exists(file_db_manager.db_path)
     # Attempt to query a column to ensure the table structure is correct
-    job = db_manager.get_job('non_existent_id')
+    job = file_db_manager.get_job('non_existent_id')
     assert job == {}
 
 def test_create_and_get_job(db_manager):
@@ -42,6 +46,7 @@ def test_create_and_get_job(db_manager):
     assert job['output_file'] == output_file
     assert job['ffmpeg_command'] == command
     assert job['progress_percent'] == 0.0
+    assert isinstance(job['last_updated'], float)
 
 def test_update_job_status_and_progress(db_manager):
     """Tests updating multiple fields on an existing job."""
@@ -61,4 +66,159 @@ def test_update_job_status_and_progress(db_manager):
     job_2 = db_manager.get_job(job_id)
     
     assert job_2['status'] == 'COMPLETED'
-    assert job_2['progress_percent'] == 100.0
\ No newline at end of file
+    assert job_2['progress_percent'] == 100.0
+
+def test_pooled_connections_use_wal_and_are_thread_safe(file_db_manager):
+    """Verifies the pool runs in WAL mode and serves concurrent readers from threads."""
+    from concurrent.futures import ThreadPoolExecutor
+    db_manager = file_db_manager
+
+    with db_manager._borrow() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    job_id = "test-job-pool"
+    db_manager.create_job(job_id, "/in/f.mkv", "/out/f.mp4", "-c:v copy")
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        jobs = list(executor.map(db_manager.get_job, [job_id] * 64))
+
+    assert all(job['status'] == 'SUBMITTED' for job in jobs)
+
+
+def test_get_job_is_cached_until_updated(db_manager):
+    """Verifies polling reads are served from cache and invalidated by updates."""
+    job_id = "test-job-cache"
+    db_manager.create_job(job_id, "/in/f.mkv", "/out/f.mp4", "-c:v copy")
+    assert db_manager.get_job(job_id)['status'] == 'SUBMITTED'
+
+    # A write from another process (e.g. the worker) is hidden until the TTL expires...
+    with db_manager._borrow() as conn:
+        conn.execute("UPDATE conversion_jobs SET status = 'PROCESSING' WHERE job_id = ?", (job_id,))
+        conn.commit()
+    assert db_manager.get_job(job_id)['status'] == 'SUBMITTED'
+
+    # ...while a write through the manager invalidates the entry immediately.
+    db_manager.update_job_status(job_id, "COMPLETED", progress=100.0)
+    assert db_manager.get_job(job_id)['status'] == 'COMPLETED'
+
+def test_job_cache_evicts_expired_and_oldest_entries(db_manager, monkeypatch):
+    """Verifies expired rows are dropped on read and the cache never exceeds CACHE_MAX_ENTRIES."""
+    from ffmpeg_tools import database
+    now = [1000.0]
+    monkeypatch.setattr(database.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(db_manager, "CACHE_MAX_ENTRIES", 2)
+    for job_id in ("job-1", "job-2", "job-3"):
+        db_manager.create_job(job_id, "/in/f.mkv", "/out/f.mp4", "-c:v copy")
+        db_manager.get_job(job_id)
+    assert list(db_manager._cache) == ["job-2", "job-3"]
+
+    now[0] += db_manager.CACHE_TTL_SECONDS
+    db_manager.get_jobs(["job-2"])
+    assert list(db_manager._cache) == ["job-3", "job-2"]
+    # The expired entry goes on read even when the row is no longer there to re-cache
+    with db_manager._borrow() as conn:
+        conn.execute("DELETE FROM conversion_jobs WHERE job_id = 'job-3'")
+        conn.commit()
+    assert db_manager.get_job("job-3") == {}
+    assert list(db_manager._cache) == ["job-2"]
+
+def test_stale_reads_are_not_cached_and_finished_jobs_drop_their_generation(db_manager):
+    """
+    Verifies a row read before a concurrent update is not published to the
+    cache, and that a finished job leaves nothing behind in _generations.
+    """
+    db_manager.create_job("job-race", "/in/f.mkv", "/out/f.mp4", "-c:v copy")
+    db_manager.update_job_status("job-race", "PROCESSING", progress=10.0)
+    read_seq = db_manager._write_seq
+    stale_row = db_manager.get_job("job-race")
+    db_manager._cache.clear()
+
+    db_manager.update_job_status("job-race", "PROCESSING", progress=20.0)
+    with db_manager._cache_lock:
+        db_manager._publish(stale_row, read_seq)
+    assert "job-race" not in db_manager._cache
+
+    db_manager.update_job_status("job-race", "COMPLETED", progress=100.0)
+    assert "job-race" not in db_manager._generations
+    # Still stale after the generation is gone: the floor rejects the old read
+    with db_manager._cache_lock:
+        db_manager._publish(stale_row, read_seq)
+    assert "job-race" not in db_manager._cache
+    assert db_manager.get_job("job-race")['status'] == "COMPLETED"
+    assert db_manager._generations == {}
+
+def test_progress_batch_only_updates_jobs_still_in_that_stage(db_manager):
+    """Verifies batched progress writes land in one go and never roll back a status."""
+    db_manager.create_job("job-running", "/in/a.mkv", "/out/a.mp4", "-c:v copy")
+    db_manager.create_job("job-done", "/in/b.mkv", "/out/b.mp4", "-c:v copy")
+    db_manager.update_job_status("job-running", "PROCESSING", progress=0.0)
+    db_manager.update_job_status("job-done", "COMPLETED", progress=100.0)
+
+    db_manager.update_job_progress_batch([
+        ("job-running", "PROCESSING", 42.0),
+        ("job-done", "PROCESSING", 99.0),
+    ])
+
+    assert db_manager.get_job("job-running")['progress_percent'] == 42.0
+    assert db_manager.get_job("job-done")['status'] == "COMPLETED"
+    assert db_manager.get_job("job-done")['progress_percent'] == 100.0
+
+def test_get_jobs_returns_known_jobs_keyed_by_id(db_manager):
+    """Verifies the batch lookup returns every known job once and skips unknown IDs."""
+    db_manager.create_job("job-a", "/in/a.mkv", "/out/a.mp4", "-c:v copy")
+    db_manager.create_job("job-b", "/in/b.mkv", "/out/b.mp4", "-c:v copy")
+    db_manager.get_job("job-a")  # served from cache in the batch below
+
+    jobs = db_manager.get_jobs(["job-a", "job-b", "job-b", "missing"])
+
+    assert set(jobs) == {"job-a", "job-b"}
+    assert jobs["job-b"]['input_file'] == "/in/b.mkv"
+
+def test_update_job_statuses_applies_batch_in_order(db_manager):
+    """Verifies several status updates land in one transaction, last one winning."""
+    db_manager.create_job("job-batch", "/in/a.mkv", "/out/a.mp4", "-c:v copy")
+
+    db_manager.update_job_statuses([
+        ("job-batch", "PROCESSING_COMPLETE", 100.0, "FFMPEG finished successfully."),
+        ("job-batch", "TRANSFERRING_OUT", None, "Starting TRANSFERRING_OUT transfer."),
+    ])
+
+    job = db_manager.get_job("job-batch")
+    assert job['status'] == "TRANSFERRING_OUT"
+    assert job['progress_percent'] == 100.0
+    assert job['notes'] == "Starting TRANSFERRING_OUT transfer."
+
+def test_text_last_updated_column_is_migrated_to_real(tmp_path):
+    """
+    Verifies a database created with the old TEXT last_updated column is rebuilt
+    as REAL: ISO-8601 rows and numeric strings both come back as unix floats.
+    """
+    import sqlite3
+    from datetime import datetime
+    db_path = str(tmp_path / "legacy_jobs.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE conversion_jobs (
+            job_id TEXT PRIMARY KEY, status TEXT NOT NULL, input_file TEXT NOT NULL,
+            output_file TEXT NOT NULL, ffmpeg_command TEXT, rsync_user_host TEXT,
+            progress_percent REAL, last_updated TEXT, notes TEXT
+        )
+    """)
+    iso_time = datetime(2024, 5, 1, 12, 30, 0, 500000)
+    conn.executemany(
+        "INSERT INTO conversion_jobs (job_id, status, input_file, output_file, last_updated) VALUES (?, ?, ?, ?, ?)",
+        [("job-iso", "COMPLETED", "/in/a.mkv", "/out/a.mp4", iso_time.isoformat()),
+         ("job-num", "PROCESSING", "/in/b.mkv", "/out/b.mp4", 1792102345.5)],
+    )
+    conn.commit()
+    conn.close()
+
+    manager = JobDatabaseManager(db_path)
+    try:
+        assert manager.get_job("job-iso")['last_updated'] == pytest.approx(iso_time.timestamp())
+        assert manager.get_job("job-num")['last_updated'] == 1792102345.5
+
+        manager.create_job("job-new", "/in/c.mkv", "/out/c.mp4", "-c:v copy")
+        assert isinstance(manager.get_job("job-new")['last_updated'], float)
+    finally:
+        manager.close()
@@ -2,12 +2,9 @@
 
 import pytest
 import os
-import subprocess
-import time
-import shutil
+import asyncio
 import uuid 
-from unittest.mock import MagicMock, patch
-from subprocess import CalledProcessError, CompletedProcess
+from pathlib import Path, PurePosixPath
 
 # Import necessary modules
 from ffmpeg_tools.job_manager import JobManager
@@ -21,6 +18,12 @@ pytestmark = pytest.mark.skipif(
     reason="Requires RUN_FFMPEG_INTEGRATION_TESTS=true environment variable to run shell commands."
 )
 
+# Encode settings for the live tests: the assertions only check that an output
+# file is produced, so the fastest x265 preset at a tiny size is enough.
+# Production jobs use the orchestrator's CONVERSION_ARGS (x265 default preset).
+# Still libx265, so CINCHRO_HWACCEL can move it to a hardware encoder.
+TEST_FFMPEG_CMD = "-c:v libx265 -preset ultrafast -crf 35 -s 320x180 -y"
+
 # --- FIXTURES ---
 
 # FIX: Removed monkeypatch from module scope
@@ -42,13 +45,6 @@ def setup_job_manager(ffmpeg_config_files, ffmpeg_db_path):
     manager = JobManager(config_manager, db_manager)
     return manager
 
-# FIX: New fixture to handle time mocking ONLY where needed (function scope)
-@pytest.fixture
-def mock_time_sleep():
-    """Mocks time.sleep globally to speed up FFMPEG simulation steps."""
-    with patch('time.sleep', MagicMock()) as mock_sleep:
-        yield mock_sleep
-
 # --- LIVE END-TO-END PIPELINE TEST ---
 
 def test_03_full_live_pipeline(setup_job_manager): # NOTE: test is renamed to 03 for sequence
@@ -62,16 +58,16 @@ def test_03_full_live_pipeline(setup_job_manager): # NOTE: test is renamed to 03
         pytest.skip("Skipping live pipeline test: CINCHRO_TEST_PULL_FILE environment variable not set.")
 
     job_id = str(uuid.uuid4())
-    ffmpeg_command = "-c:v libx265 -crf 28 -s 640x360 -y" 
+    ffmpeg_command = TEST_FFMPEG_CMD
     
-    # Define file paths for manual cleanup
-    base_filename = os.path.basename(remote_source_file)
-    local_input_file = os.path.join(manager.LOCAL_TEMP_DIR, base_filename)
-    local_output_file_final = os.path.join(manager.LOCAL_OUTPUT_DIR, base_filename)
+    # Define file paths for manual cleanup (the source is a remote POSIX path)
+    base_filename = PurePosixPath(remote_source_file).name
+    local_input_file = Path(manager.LOCAL_TEMP_DIR) / base_filename
+    local_output_file_final = Path(manager.LOCAL_OUTPUT_DIR) / base_filename
 
     # 1. Execution: Call the pipeline, telling it to SKIP the final cleanup
-    manager.db.create_job(job_id, remote_source_file, local_output_file_final, ffmpeg_command)
-    manager.run_job_pipeline(job_id, skip_cleanup=True) # PASS THE FLAG HERE
+    manager.db.create_job(job_id, remote_source_file, str(local_output_file_final), ffmpeg_command)
+    asyncio.run(manager.run_job_pipeline(job_id, skip_cleanup=True)) # PASS THE FLAG HERE
     
     # --- 2. Assertions (Occur BEFORE Manual Cleanup) ---
     final_job = manager.db.get_job(job_id)
@@ -80,16 +76,11 @@ def test_03_full_live_pipeline(setup_job_manager): # NOTE: test is renamed to 03
     assert final_job['status'] == "COMPLETED", f"Pipeline failed! Final status: {final_job['status']}. Notes: {final_job.get('notes')}"
     
     # B. CRITICAL ASSERTION: Check that the final output file exists locally
-    assert os.path.exists(local_output_file_final), "Local processed output file missing after conversion."
+    assert local_output_file_final.exists(), "Local processed output file missing after conversion."
 
     # --- 3. Mandatory Manual Cleanup ---
     # Delete local Linux files (must be done or the next test will fail)
-    if os.path.exists(local_input_file): os.remove(local_input_file)
-    if os.path.exists(local_output_file_final): os.remove(local_output_file_final)
+    local_input_file.unlink(missing_ok=True)
+    local_output_file_final.unlink(missing_ok=True)
     
     # WARNING: Remote cleanup (deleting the file pushed to Unix) is omitted for simplicity.
-    
-# --- The rest of the file (tests 01 and 02) must also be checked for 'monkeypatch' in the function signature, 
-# and if it exists, it should be removed as it's no longer needed, and the fixture is not used in this file.
-# The code below is not for user display, but internal note
-# The previous definition of test_01 and test_02 also used monkeypatch. The user should check those functions.
\ No newline at end of file
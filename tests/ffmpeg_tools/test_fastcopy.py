@@ -0,0 +1,32 @@
+# tests/ffmpeg_tools/test_fastcopy.py
+
+import os
+from ffmpeg_tools.fastcopy import copy_file
+
+
+def test_copy_into_directory_keeps_source_and_mtime(tmp_path):
+    """Verifies a copy into a directory lands under the source name, like rsync -a."""
+    src = tmp_path / "movie.mkv"
+    src.write_bytes(os.urandom(256 * 1024))
+    os.utime(src, (1_000_000_000, 1_000_000_000))
+    dest_dir = tmp_path / "temp"
+    dest_dir.mkdir()
+
+    dest = copy_file(str(src), str(dest_dir))
+
+    assert dest == str(dest_dir / "movie.mkv")
+    assert (dest_dir / "movie.mkv").read_bytes() == src.read_bytes()
+    assert os.stat(dest).st_mtime == 1_000_000_000
+    assert src.exists()
+
+def test_copy_with_remove_source_moves_the_file(tmp_path):
+    """Verifies remove_source behaves like rsync --remove-source-files."""
+    src = tmp_path / "movie.mp4"
+    src.write_bytes(b"converted")
+    dest_dir = tmp_path / "out"
+    dest_dir.mkdir()
+
+    copy_file(str(src), str(dest_dir), remove_source=True)
+
+    assert not src.exists()
+    assert (dest_dir / "movie.mp4").read_bytes() == b"converted"
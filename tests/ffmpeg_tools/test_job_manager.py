@@ -2,44 +2,117 @@
 
 import pytest
 import os
-import subprocess
-import uuid
-from unittest.mock import MagicMock, call
-import time
-from ffmpeg_tools.job_manager import JobManager
+import asyncio
+import shlex
+from unittest.mock import MagicMock, AsyncMock, call
+from ffmpeg_tools.job_manager import JobManager, resolve_executable
 from ffmpeg_tools.config import ConfigManager
 from ffmpeg_tools.database import JobDatabaseManager
-from subprocess import CalledProcessError, CompletedProcess # Import specifically for mocks
 
 
 # --- FIXTURES ---
 
-@pytest.fixture
-def mock_config(ffmpeg_config_files):
-    """Provides a configured ConfigManager instance using temporary files."""
-    # Instantiating ConfigManager directly with explicit paths
-    return ConfigManager(
-        config_path=str(ffmpeg_config_files / 'config.json'),
-        env_path=str(ffmpeg_config_files / '.env')
-    )
+@pytest.fixture(scope="session")
+def base_config(tmp_path_factory):
+    """The config dict behind mock_config: mock tool paths and private work directories."""
+    work_dir = tmp_path_factory.mktemp("job_manager")
+    return {
+        "ffmpeg_path": "/mock/bin/ffmpeg",
+        "rsync_path": "/mock/bin/rsync",
+        "media_machine_config": {
+            "rsync_user": "test_user",
+            "storage_host": "192.168.0.1",
+            "archive_root_dir": "/mock/archive",
+        },
+        "transfer_paths": {
+            "local_temp_dir": str(work_dir / "temp"),
+            "local_output_dir": str(work_dir / "output"),
+        },
+    }
+
+@pytest.fixture(scope="session")
+def mock_config(base_config):
+    """Provides an in-memory ConfigManager (no config.json/.env reads) with mock tool paths."""
+    return ConfigManager.from_dict(base_config)
 
 @pytest.fixture
+def make_manager(base_config, ffmpeg_db_path):
+    """
+    Builds JobManagers for config variants: base_config with top-level keys
+    replaced by the keyword overrides. They share one DB pool, closed on teardown.
+    """
+    db_manager = JobDatabaseManager(ffmpeg_db_path)
+
+    def make(**overrides):
+        return JobManager(ConfigManager.from_dict({**base_config, **overrides}), db_manager)
+
+    yield make
+    db_manager.close()
+
+@pytest.fixture(scope="module")
 def mock_manager(mock_config, ffmpeg_db_path):
-    """Provides a JobManager instance initialized with necessary components."""
+    """
+    Provides one JobManager (and one pool of DB connections) for the whole module.
+    Tests must patch its attributes through monkeypatch so they are undone.
+    """
     db_manager = JobDatabaseManager(ffmpeg_db_path)
-    return JobManager(mock_config, db_manager)
+    yield JobManager(mock_config, db_manager)
+    db_manager.close()
+
+@pytest.fixture(autouse=True)
+def clean_job_table(request):
+    """Empties the shared manager's jobs table (and read cache) before each test that uses it."""
+    if 'mock_manager' in request.fixturenames:
+        db_manager = request.getfixturevalue('mock_manager').db
+        with db_manager._borrow() as conn:
+            conn.execute("DELETE FROM conversion_jobs")
+            conn.commit()
+        db_manager._cache.clear()
 
 @pytest.fixture
-def mock_subprocess_run(monkeypatch):
-    """Fixture to mock subprocess.run for faking shell command execution."""
-    
-    # We define a mock function that always returns success unless instructed otherwise
-    def mock_run(*args, **kwargs):
-        # Return a mock CompletedProcess object indicating success
-        return CompletedProcess(args[0], 0, stdout="Mock command output", stderr="")
+def mock_subprocess_exec(monkeypatch):
+    """
+    Fixture to mock asyncio.create_subprocess_exec for every pipeline stage.
+    `mock.result_for(cmd)` returns each fake process's (returncode, stdout, stderr);
+    by default every command succeeds, ffprobe reports a 20s duration, the backup
+    checksums match and ffmpeg
+    emits `-progress` lines on stderr and "writes" its output file.
+    """
+    progress_lines = b"out_time_us=5000000\nprogress=continue\nout_time_us=10000000\nprogress=end\n"
+
+    def default_result(cmd):
+        if '-progress' in cmd:
+            open(cmd[-1], 'w').close()
+            return 0, b"", progress_lines
+        if 'format=duration' in cmd:
+            return 0, b"20.0\n", b""
+        if cmd[0] == 'ssh' and 'sha256sum' in cmd[-1]:
+            return 0, b"ab12  /remote/source.mkv\nab12  /archive/source.mkv\n", b""
+        return 0, b"Mock command output", b""
+
+    class FakeProcess:
+        def __init__(self, returncode, stdout, stderr):
+            self.returncode = returncode
+            self.stdout = self._stream(stdout)
+            self.stderr = self._stream(stderr)
+
+        @staticmethod
+        def _stream(data):
+            reader = asyncio.StreamReader()
+            reader.feed_data(data)
+            reader.feed_eof()
+            return reader
+
+        async def wait(self):
+            return self.returncode
+
+    async def create_process(*cmd, **kwargs):
+        return FakeProcess(*mock.result_for(cmd))
 
-    mock = MagicMock(side_effect=mock_run)
-    monkeypatch.setattr(subprocess, 'run', mock)
+    mock = AsyncMock(side_effect=create_process)
+    mock.default_result = default_result
+    mock.result_for = default_result
+    monkeypatch.setattr(asyncio, 'create_subprocess_exec', mock)
     return mock
 
 # --- TESTS ---
@@ -65,75 +138,405 @@ def test_02_rsync_command_structure(mock_manager):
     
     expected_cmd_start = [
         "/mock/bin/rsync",  # FIX: Asserting against the MOCK path
-        "-az",
+        "-a",
         "--partial",
-        "--progress"
+        "--inplace",
+        "--whole-file"
     ]
     
     actual_cmd = manager._build_rsync_cmd(remote_src, local_dest)
     
     # Assert only the command and flags
-    assert actual_cmd[:4] == expected_cmd_start
+    assert actual_cmd[:5] == expected_cmd_start
+    assert "-z" not in actual_cmd
     # Assert the transfer destination is correct
     assert actual_cmd[-1] == local_dest
     
 # --- Pipeline Tests ---
 
-def test_03_full_pipeline_success_mocked(mock_manager, mock_subprocess_run, monkeypatch):
+def test_03_full_pipeline_success_mocked(mock_manager, mock_subprocess_exec):
     """
     Tests a complete pipeline run where all subprocess calls succeed,
     verifying status updates are correctly persisted in the DB.
     """
     manager = mock_manager
     
-    # Mock the time.sleep calls to speed up the simulated conversion loop
-    mock_sleep = MagicMock()
-    monkeypatch.setattr(time, 'sleep', mock_sleep)
-    
-    # 1. Create Job (This should also trigger run_job_pipeline)
+    # 1. Create Job and run the pipeline (normally done by the ARQ worker)
     job_id = manager.create_new_job(
         input_file="/remote/media/file.mkv",
         ffmpeg_command="-c:v libx265 -crf 28"
     )
+    asyncio.run(manager.run_job_pipeline(job_id))
 
-    # 2. Assert Subprocess calls were made for the 3 Rsync stages
-    assert mock_subprocess_run.call_count >= 3  # PULL, BACKUP, PUSH
+    # 2. Assert Subprocess calls were made for every stage
+    assert mock_subprocess_exec.call_count == 5  # PULL, BACKUP, FFPROBE, FFMPEG, PUSH
 
     # 3. Assert final status is COMPLETED
     final_job = manager.db.get_job(job_id)
     assert final_job['status'] == "COMPLETED"
     assert final_job['progress_percent'] == 100.0
     
-    # 4. Assert local temp directory name was used in the transfer
+    # 4. Assert local temp directory name was used in the PULL transfer
     local_temp = manager.LOCAL_TEMP_DIR
-    assert mock_subprocess_run.call_args_list[0].args[0][-1] == local_temp
+    rsync_calls = [c.args for c in mock_subprocess_exec.call_args_list if c.args[0] == manager.RSYNC_PATH]
+    assert rsync_calls[0][-1] == local_temp
+    # 5. Assert the PUSH hands local output cleanup to rsync
+    assert "--remove-source-files" in rsync_calls[-1]
+    assert "--remove-source-files" not in rsync_calls[0]
 
 
-def test_04_pipeline_fails_on_transfer(mock_manager, mock_subprocess_run):
+def test_04_pipeline_fails_on_transfer(mock_manager, mock_subprocess_exec):
     """
     Tests that the pipeline exits immediately when the PULL transfer fails (Stage 1).
     """
     manager = mock_manager
     
-    # 1. Configure mock_subprocess_run to fail ONLY on the first call (PULL)
-    def failing_rsync(*args, **kwargs):
-        if mock_subprocess_run.call_count == 1:
+    # 1. Configure the mock to fail ONLY the rsync call (PULL)
+    def failing_rsync(cmd):
+        if cmd[0] == manager.RSYNC_PATH:
             # Simulate rsync failure (Stage 1: TRANSFERRING_IN)
-            raise CalledProcessError(1, args[0], stderr="Connection Refused")
+            return 1, b"", b"Connection Refused"
         
         # All other subsequent calls should not run because the pipeline should halt
-        return CompletedProcess(args[0], 0, stdout="Mock command output", stderr="")
+        return mock_subprocess_exec.default_result(cmd)
     
-    mock_subprocess_run.side_effect = failing_rsync
+    mock_subprocess_exec.result_for = failing_rsync
 
-    # 2. Create Job (This triggers run_job_pipeline)
+    # 2. Create Job and run the pipeline (normally done by the ARQ worker)
     job_id = manager.create_new_job(
         input_file="/remote/media/fail_file.mkv",
         ffmpeg_command="-c:v libx265 -crf 28"
     )
+    asyncio.run(manager.run_job_pipeline(job_id))
 
     # 3. Assert final status is FAILED and pipeline halted
     final_job = manager.db.get_job(job_id)
     
     assert final_job['status'] == "TRANSFERRING_IN_FAILED"
-    assert "Connection Refused" in final_job['notes']
\ No newline at end of file
+    assert "Connection Refused" in final_job['notes']
+    assert mock_subprocess_exec.call_count == 2  # PULL and the concurrent BACKUP only
+
+def test_05_backup_failure_blocks_push(mock_manager, mock_subprocess_exec):
+    """
+    Tests that a failed remote backup (run alongside FFMPEG) is recorded and the
+    converted file is not pushed over the un-archived source.
+    """
+    manager = mock_manager
+
+    def ssh_fails(cmd):
+        if cmd[0] == 'ssh':
+            return 0, b"", b"cp: cannot create regular file"
+        return mock_subprocess_exec.default_result(cmd)
+
+    mock_subprocess_exec.result_for = ssh_fails
+
+    job_id = manager.create_new_job(
+        input_file="/remote/media/backup_fail.mkv",
+        ffmpeg_command="-c:v libx265 -crf 28"
+    )
+    asyncio.run(manager.run_job_pipeline(job_id))
+
+    final_job = manager.db.get_job(job_id)
+    assert final_job['status'] == "BACKUP_SOURCE_FAILED"
+    assert "cp: cannot create regular file" in final_job['notes']
+    # PULL, BACKUP, FFPROBE and FFMPEG ran; the PUSH did not.
+    assert mock_subprocess_exec.call_count == 4
+
+    if os.path.exists(final_job['output_file']):
+        os.remove(final_job['output_file'])
+
+
+def test_06_ffmpeg_progress_is_parsed_from_progress_stream(mock_manager, mock_subprocess_exec, tmp_path, monkeypatch):
+    """Tests `-progress` key=value lines are turned into percent updates against the probed duration."""
+    manager = mock_manager
+    monkeypatch.setattr(manager, 'report_progress', MagicMock())
+
+    job_id = manager.create_new_job(input_file="/remote/media/clip.mkv", ffmpeg_command="-c:v libx265")
+    output = str(tmp_path / "out.mp4")
+
+    assert asyncio.run(manager._run_ffmpeg_conversion(job_id, "/tmp/clip.mkv", output, "-c:v libx265 -vf 'scale=1280:-2'"))
+
+    ffmpeg_cmd = mock_subprocess_exec.call_args.args
+    assert ffmpeg_cmd[ffmpeg_cmd.index('-vf') + 1] == "scale=1280:-2"
+    assert ffmpeg_cmd[ffmpeg_cmd.index('-progress') + 1] == "pipe:2"
+    assert ffmpeg_cmd[ffmpeg_cmd.index('-threads') + 1] == str(manager.FFMPEG_THREADS)
+    # libx265 ignores -threads, so its pool is capped to the same share explicitly
+    assert ffmpeg_cmd[ffmpeg_cmd.index('-x265-params') + 1] == f"pools={manager.FFMPEG_THREADS}"
+    assert manager.report_progress.call_args_list == [
+        call(job_id, "PROCESSING", 25.0),
+        call(job_id, "PROCESSING", 50.0),
+    ]
+    # The completion is queued and committed with the job's next status write
+    assert manager.db.get_job(job_id)['status'] == "PROCESSING"
+    asyncio.run(manager._flush_status(job_id))
+    assert manager.db.get_job(job_id)['status'] == "PROCESSING_COMPLETE"
+    # FFMPEG wrote a .part file that was renamed into place on success
+    assert ffmpeg_cmd[-1] == str(tmp_path / "out.part.mp4")
+    assert os.path.exists(output) and not os.path.exists(ffmpeg_cmd[-1])
+
+
+def test_07_ffmpeg_threads_override_is_clamped(make_manager, monkeypatch):
+    """Tests CINCHRO_FFMPEG_THREADS overrides the per-core share and is clamped to [1, 64]."""
+    def manager_with_threads(value):
+        monkeypatch.setenv("CINCHRO_FFMPEG_THREADS", value)
+        return make_manager()
+
+    assert manager_with_threads("500").FFMPEG_THREADS == 64
+    assert manager_with_threads("0").FFMPEG_THREADS == 1
+    assert manager_with_threads("6").FFMPEG_THREADS == 6
+
+
+def test_08_transfers_share_one_ssh_control_connection(mock_manager):
+    """Verifies rsync and the backup ssh use the same ControlMaster socket."""
+    manager = mock_manager
+
+    rsync_cmd = manager._build_rsync_cmd("/local/out.mp4", "user@host:/remote/")
+    rsync_ssh = shlex.split(rsync_cmd[rsync_cmd.index("-e") + 1])
+
+    assert rsync_ssh == manager._build_ssh_cmd()
+    assert "ControlMaster=auto" in rsync_ssh
+    assert any(opt.startswith("ControlPath=") for opt in rsync_ssh)
+
+@pytest.mark.parametrize("inside_running_loop", [False, True], ids=["before-loop", "in-worker-startup"])
+def test_09_pidfd_child_watcher_reaps_subprocesses(inside_running_loop):
+    """
+    Verifies subprocess exit codes still arrive once the pidfd watcher is
+    installed, both before the loop starts (Celery) and from inside a running
+    loop, as ARQ calls tasks.startup.
+    """
+    import sys
+    from ffmpeg_tools.job_manager import use_pidfd_child_watcher
+
+    previous = asyncio.get_child_watcher() if sys.version_info < (3, 12) else None
+    try:
+        async def run():
+            if inside_running_loop and not use_pidfd_child_watcher():
+                pytest.skip("pidfd_open is not available on this platform/kernel")
+            process = await asyncio.create_subprocess_exec(sys.executable, "-c", "raise SystemExit(3)")
+            return await process.wait()
+
+        if not inside_running_loop and not use_pidfd_child_watcher():
+            pytest.skip("pidfd_open is not available on this platform/kernel")
+        assert asyncio.run(run()) == 3
+    finally:
+        if previous is not None:
+            asyncio.set_child_watcher(previous)
+
+def test_10_ffmpeg_command_is_parsed_and_validated_at_creation(mock_manager):
+    """Tests the command is stored as a JSON argv list and bad commands are rejected up front."""
+    import json
+    manager = mock_manager
+
+    job_id = manager.create_new_job("/remote/media/clip.mkv", "-c:v libx265 -vf 'scale=1280:720,fps=30'")
+    stored = manager.db.get_job(job_id)['ffmpeg_command']
+    assert json.loads(stored) == ["-c:v", "libx265", "-vf", "scale=1280:720,fps=30"]
+    assert manager._stored_ffmpeg_args(stored) == json.loads(stored)
+    # Rows created before the change hold the raw string
+    assert manager._stored_ffmpeg_args("-c:v copy") == ["-c:v", "copy"]
+    # An argv list is stored as-is, without another round of shell-style splitting
+    job_id = manager.create_new_job("/remote/media/clip.mkv", ["-metadata", "title=It's here"])
+    assert json.loads(manager.db.get_job(job_id)['ffmpeg_command']) == ["-metadata", "title=It's here"]
+
+    for bad_command in ("-vf 'unbalanced", "-i /etc/passwd -c copy", "-c:v copy && rm -rf /", ["-i", "/etc/passwd"]):
+        with pytest.raises(ValueError):
+            manager.create_new_job("/remote/media/clip.mkv", bad_command)
+
+def test_11_backup_checksum_mismatch_is_retried_then_fails(mock_manager, mock_subprocess_exec):
+    """Tests the backup is verified by hashing both copies and redone once on a mismatch."""
+    manager = mock_manager
+
+    def mismatched_hashes(cmd):
+        if cmd[0] == 'ssh':
+            return 0, b"ab12  /remote/source.mkv\nff00  /archive/source.mkv\n", b""
+        return mock_subprocess_exec.default_result(cmd)
+
+    mock_subprocess_exec.result_for = mismatched_hashes
+
+    error = asyncio.run(manager._run_remote_backup("job-x", "/remote/media/it's.mkv"))
+
+    assert "does not match" in error
+    assert mock_subprocess_exec.call_count == 2
+    remote_command = mock_subprocess_exec.call_args.args[-1]
+    assert shlex.split(remote_command)[-2:] == ["/remote/media/it's.mkv", f"{manager.ARCHIVE_ROOT_DIR}/it's.mkv"]
+
+def test_12_localhost_storage_copies_without_rsync(base_config, make_manager, mock_subprocess_exec, tmp_path):
+    """Tests a localhost storage_host turns PULL into a local copy with no rsync/ssh process."""
+    manager = make_manager(media_machine_config={**base_config["media_machine_config"], "storage_host": "localhost"})
+    source = tmp_path / "clip.mkv"
+    source.write_bytes(b"source media")
+
+    job_id = manager.create_new_job(str(source), "-c:v libx265")
+    assert manager._storage_target(str(source)) == str(source)
+    assert asyncio.run(manager._run_rsync_transfer(job_id, str(source), manager.LOCAL_TEMP_DIR, "TRANSFERRING_IN"))
+
+    pulled = os.path.join(manager.LOCAL_TEMP_DIR, "clip.mkv")
+    assert open(pulled, 'rb').read() == b"source media"
+    assert mock_subprocess_exec.call_count == 0
+    os.remove(pulled)
+
+@pytest.mark.parametrize("path", ["/m/Trials720.mkv", "/m/x.tar.gz", "/m/.hidden", "/m/noext", "/m/..mkv", "rel.mkv"])
+def test_13_split_base_matches_os_path(path):
+    """Tests the rpartition-based path split agrees with os.path.basename/splitext."""
+    base_name = os.path.basename(path)
+    assert JobManager._split_base(path) == (base_name, os.path.splitext(base_name)[0])
+
+def test_14_queue_logging_writes_from_listener_thread(capsys):
+    """Tests pipeline log records are enqueued and written by the listener on stop()."""
+    import logging
+    from ffmpeg_tools.job_manager import logger, start_queue_logging
+
+    cinchro_logger = logging.getLogger("cinchro")
+    saved = (cinchro_logger.handlers[:], cinchro_logger.level, cinchro_logger.propagate)
+    try:
+        listener = start_queue_logging()
+        logger.info("Job %s starting pipeline.", "job-log")
+        listener.stop()
+        assert "Job job-log starting pipeline." in capsys.readouterr().err
+    finally:
+        cinchro_logger.handlers, cinchro_logger.level, cinchro_logger.propagate = saved
+
+def test_15_fused_pull_and_backup_reads_source_once(make_manager, mock_subprocess_exec):
+    """Tests fuse_pull_and_backup replaces the PULL rsync and backup cp with one ssh tee stream."""
+    import hashlib
+    manager = make_manager(fuse_pull_and_backup=True)
+    # The fake ssh writes nothing, so the pulled file is empty on both sides.
+    empty_digest = hashlib.sha256(b"").hexdigest().encode()
+
+    def remote(cmd):
+        if cmd[0] == 'ssh' and 'sha256sum' in cmd[-1]:
+            return 0, empty_digest + b"  /archive/fused.mkv\n", b""
+        return mock_subprocess_exec.default_result(cmd)
+
+    mock_subprocess_exec.result_for = remote
+
+    job_id = manager.create_new_job("/remote/media/fused.mkv", "-c:v libx265")
+    asyncio.run(manager.run_job_pipeline(job_id))
+
+    assert manager.db.get_job(job_id)['status'] == "COMPLETED"
+    commands = [c.args for c in mock_subprocess_exec.call_args_list]
+    assert shlex.split(commands[0][-1])[:3] == ["tee", "--", f"{manager.ARCHIVE_ROOT_DIR}/fused.mkv"]
+    # Only the PUSH still uses rsync; no separate backup cp was issued.
+    assert [c[0] for c in commands].count(manager.RSYNC_PATH) == 1
+    assert not any(c[0] == 'ssh' and c[-1].startswith('cp ') for c in commands)
+
+def test_16_large_push_is_split_across_parallel_ssh_streams(make_manager, mock_subprocess_exec, tmp_path):
+    """Tests a PUSH above the threshold is sent as contiguous ranges over N ssh streams."""
+    manager = make_manager(parallel_transfer_streams=4, parallel_transfer_threshold_mb=1)
+    output = tmp_path / "big.mp4"
+    with open(output, 'wb') as f:
+        f.truncate(3 * 1024 * 1024 + 1)  # 4 one-MiB ranges, the last one a single byte
+
+    job_id = manager.create_new_job("/remote/media/big.mkv", "-c:v libx265")
+    assert asyncio.run(manager._run_rsync_transfer(job_id, str(output), "user@host:/remote/media", "TRANSFERRING_OUT",
+                                                   remove_source_files=True))
+
+    remote_commands = [c.args[-1] for c in mock_subprocess_exec.call_args_list]
+    assert remote_commands[0] == ": > /remote/media/big.mp4"
+    assert sorted(remote_commands[1:]) == [
+        "head -c 1 | dd of=/remote/media/big.mp4 bs=1048576 seek=3 conv=notrunc",
+    ] + [f"head -c 1048576 | dd of=/remote/media/big.mp4 bs=1048576 seek={i} conv=notrunc" for i in range(3)]
+    assert not any(c.args[0] == manager.RSYNC_PATH for c in mock_subprocess_exec.call_args_list)
+    assert not output.exists()
+    range_ssh = mock_subprocess_exec.call_args_list[-1].args
+    assert "ControlPath=none" in range_ssh and "ControlMaster=auto" not in range_ssh
+    assert any(opt.startswith("Ciphers=") for opt in range_ssh)
+
+
+def test_17_libx265_is_moved_to_a_detected_hardware_encoder(make_manager, mock_subprocess_exec, tmp_path, monkeypatch):
+    """Tests auto-detection picks the first encoder that passes a test encode and rewrites libx265 jobs for it."""
+    from ffmpeg_tools.job_manager import apply_hw_encoder
+
+    assert apply_hw_encoder(['-c:v', 'libx265', '-crf', '28', '-preset', 'slow', '-s', '640x360'], 'nvenc') == (
+        [], ['-c:v', 'hevc_nvenc', '-cq', '28', '-s', '640x360'])
+    assert apply_hw_encoder(['-c:v', 'libx264', '-crf', '23'], 'nvenc') == ([], ['-c:v', 'libx264', '-crf', '23'])
+
+    monkeypatch.setenv("CINCHRO_HWACCEL", "auto")
+    manager = make_manager()
+
+    def result_for(cmd):
+        if '-encoders' in cmd:
+            return 0, b" V....D hevc_nvenc  NVIDIA NVENC hevc encoder\n V....D hevc_vaapi  H.265/HEVC (VAAPI)\n", b""
+        if 'hevc_nvenc' in cmd and 'lavfi' in cmd:
+            return 1, b"", b"Cannot load libcuda.so.1\n"  # listed, but no NVIDIA driver here
+        return mock_subprocess_exec.default_result(cmd)
+
+    mock_subprocess_exec.result_for = result_for
+    job_id = manager.create_new_job("/remote/media/clip.mkv", "-c:v libx265 -crf 28 -s 640x360")
+    output = str(tmp_path / "out.mp4")
+
+    assert asyncio.run(manager._run_ffmpeg_conversion(job_id, "/tmp/clip.mkv", output, "-c:v libx265 -crf 28 -s 640x360"))
+    assert asyncio.run(manager._select_hw_backend()) == "vaapi"
+
+    ffmpeg_cmd = list(mock_subprocess_exec.call_args.args)
+    assert ffmpeg_cmd[ffmpeg_cmd.index('-vaapi_device') + 1] == "/dev/dri/renderD128"
+    assert ffmpeg_cmd.index('-vaapi_device') < ffmpeg_cmd.index('-i')
+    assert ffmpeg_cmd[ffmpeg_cmd.index('-c:v') + 1] == "hevc_vaapi"
+    assert ffmpeg_cmd[ffmpeg_cmd.index('-qp') + 1] == "28"
+    assert ffmpeg_cmd[ffmpeg_cmd.index('-vf') + 1] == "scale=640:360,format=nv12,hwupload"
+    assert '-s' not in ffmpeg_cmd
+    # Detection ran once: one -encoders listing across both calls
+    assert sum('-encoders' in c.args for c in mock_subprocess_exec.call_args_list) == 1
+
+def test_18_tool_paths_are_resolved_once_at_startup(make_manager, tmp_path, monkeypatch):
+    """Tests bare tool names are resolved against PATH when the manager is built, not on every spawn."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    for tool in ("ffmpeg", "ffprobe"):
+        (bin_dir / tool).write_text("#!/bin/sh\n")
+        (bin_dir / tool).chmod(0o755)
+    monkeypatch.setenv("PATH", str(bin_dir))
+
+    manager = make_manager(ffmpeg_path="ffmpeg", ffprobe_path="ffprobe")
+
+    assert manager.FFMPEG_PATH == str(bin_dir / "ffmpeg")
+    assert manager.FFPROBE_PATH == str(bin_dir / "ffprobe")
+    # Unresolvable names are kept as configured
+    assert resolve_executable("no-such-tool") == "no-such-tool"
+
+def test_19_rsync_progress2_updates_are_published(mock_manager, mock_subprocess_exec, monkeypatch):
+    """Tests rsync's carriage-return separated --info=progress2 updates become stage progress."""
+    manager = mock_manager
+    monkeypatch.setattr(manager, 'report_progress', MagicMock())
+
+    def rsync_with_progress(cmd):
+        if cmd[0] == manager.RSYNC_PATH:
+            return 0, (b"     32,768   0%    0.00kB/s    0:00:00\r"
+                       b"  5,242,880  50%   10.00MB/s    0:00:01\r"
+                       b"  5,275,648  50%   10.01MB/s    0:00:01\r"
+                       b" 10,485,760 100%   10.00MB/s    0:00:01 (xfr#1, to-chk=0/1)\n"), b""
+        return mock_subprocess_exec.default_result(cmd)
+
+    mock_subprocess_exec.result_for = rsync_with_progress
+    job_id = manager.create_new_job("/remote/media/clip.mkv", "-c:v libx265")
+
+    assert asyncio.run(manager._run_rsync_transfer(job_id, "user@host:/remote/media/clip.mkv",
+                                                   manager.LOCAL_TEMP_DIR, "TRANSFERRING_IN"))
+    assert '--info=progress2' in mock_subprocess_exec.call_args.args
+    # Repeated percentages are published once
+    assert manager.report_progress.call_args_list == [
+        call(job_id, "TRANSFERRING_IN", 0.0),
+        call(job_id, "TRANSFERRING_IN", 50.0),
+        call(job_id, "TRANSFERRING_IN", 100.0),
+    ]
+
+def test_20_same_named_sources_get_separate_local_outputs(mock_manager, mock_subprocess_exec):
+    """
+    Tests that jobs for sources sharing a basename encode into separate per-job
+    directories, while the PUSH still delivers the clean <name>.mp4.
+    """
+    manager = mock_manager
+    first = manager.create_new_job("/remote/media/a/Episode.mkv", "-c:v libx265")
+    second = manager.create_new_job("/remote/media/b/Episode.mkv", "-c:v libx265")
+
+    first_output = manager.db.get_job(first)['output_file']
+    second_output = manager.db.get_job(second)['output_file']
+    assert first_output != second_output
+    assert first_output == os.path.join(manager.LOCAL_OUTPUT_DIR, first, "Episode.mp4")
+
+    asyncio.run(manager.run_job_pipeline(first))
+
+    assert manager.db.get_job(first)['status'] == "COMPLETED"
+    push = [c.args for c in mock_subprocess_exec.call_args_list if c.args[0] == manager.RSYNC_PATH][-1]
+    # rsync keeps the source basename inside the destination directory
+    assert push[-2] == first_output
+    assert push[-1] == "test_user@192.168.0.1:/remote/media/a"
@@ -0,0 +1,68 @@
+# tests/ffmpeg_tools/test_ringbuf.py
+
+import pytest
+import threading
+from unittest.mock import MagicMock
+from ffmpeg_tools.ringbuf import ProgressRing, ProgressFlusher
+
+
+def test_ring_requires_power_of_two_capacity():
+    """Verifies the ring rejects capacities that cannot be masked."""
+    with pytest.raises(ValueError):
+        ProgressRing(capacity=1000)
+
+def test_ring_drains_in_publish_order():
+    """Verifies updates are returned once, in the order they were pushed."""
+    ring = ProgressRing(capacity=8)
+    ring.push("job-a", "PROCESSING", 10.0)
+    ring.push("job-b", "PROCESSING", 20.0)
+
+    assert ring.drain() == [("job-a", "PROCESSING", 10.0), ("job-b", "PROCESSING", 20.0)]
+    assert ring.drain() == []
+
+def test_ring_skips_updates_overwritten_by_lapping_producers():
+    """Verifies a lapped consumer keeps only the newest capacity-worth of updates."""
+    ring = ProgressRing(capacity=4)
+    for pct in range(10):
+        ring.push("job-a", "PROCESSING", float(pct))
+
+    assert [update[2] for update in ring.drain()] == [6.0, 7.0, 8.0, 9.0]
+
+def test_ring_accepts_concurrent_producers():
+    """Verifies no update is lost when several threads push concurrently."""
+    ring = ProgressRing(capacity=4096)
+
+    def produce(job_id):
+        for pct in range(500):
+            ring.push(job_id, "PROCESSING", float(pct))
+
+    threads = [threading.Thread(target=produce, args=(f"job-{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(ring.drain()) == 2000
+
+def test_flusher_writes_latest_update_per_job():
+    """Verifies one DB write per job per batch, carrying the latest progress."""
+    ring = ProgressRing(capacity=16)
+    db_manager = MagicMock()
+    flusher = ProgressFlusher(ring, db_manager)
+
+    ring.push("job-a", "PROCESSING", 10.0)
+    ring.push("job-a", "PROCESSING", 55.0)
+    ring.push("job-b", "TRANSFERRING_IN", 5.0)
+    flusher.flush()
+
+    db_manager.update_job_progress_batch.assert_called_once_with([
+        ("job-a", "PROCESSING", 55.0),
+        ("job-b", "TRANSFERRING_IN", 5.0),
+    ])
+
+def test_flusher_skips_empty_batches():
+    """Verifies an idle flush does not touch the database."""
+    db_manager = MagicMock()
+    ProgressFlusher(ProgressRing(capacity=16), db_manager).flush()
+
+    db_manager.update_job_progress_batch.assert_not_called()
@@ -1,30 +1,20 @@
 # tests/media_tools/conftest.py
 
 import pytest
-import os
 import json
 from unittest.mock import MagicMock
 from pathlib import Path
-import sys
 import httpx # Required by FastAPI TestClient
 
-# Ensure local imports work by adjusting sys.path 
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+# The project root is put on sys.path by pytest.ini (pythonpath = .)
 
-
-@pytest.fixture(scope="session", autouse=True)
-def setup_path():
-    """Ensures the project root is on sys.path for absolute imports during testing."""
-    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
-    if project_root not in sys.path:
-        sys.path.insert(0, project_root)
-
-@pytest.fixture
-def media_config_files(tmp_path) -> Path:
+@pytest.fixture(scope="session")
+def media_config_files(tmp_path_factory) -> Path:
     """
     Creates temporary config.json and .env files for the Media Tools service
-    in a unique directory and returns the path to that directory.
+    in a session-level directory and returns the path to that directory.
     """
+    tmp_path = tmp_path_factory.mktemp("media_config")
     # Define the mock monitored paths
     MONITORED_PATHS = [
         "/mnt/media/Movies",
@@ -51,11 +41,12 @@ def media_config_files(tmp_path) -> Path:
     return tmp_path
 
 
-@pytest.fixture
-def api_client(monkeypatch, media_config_files):
+@pytest.fixture(scope="session")
+def api_client(media_config_files):
     """
     Creates a FastAPI TestClient, overriding the ConfigManager path to use the
-    temporary media_config_files directory.
+    temporary media_config_files directory. Built once for the session; tests
+    undo their own changes to the app's state through monkeypatch.
     """
     # 1. Import modules we need to patch/access
     from media_tools import api as media_api
@@ -78,13 +69,15 @@ def api_client(monkeypatch, media_config_files):
                 env_path=str(temp_env_path)
             )
 
-    # 2. Patch the module to use our MockedConfigManager
-    monkeypatch.setattr(media_config, 'ConfigManager', MockedConfigManager)
+    # 2. Patch the module to use our MockedConfigManager (the session-scoped
+    # fixture cannot use the function-scoped monkeypatch)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(media_config, 'ConfigManager', MockedConfigManager)
+
+        # 3. Re-instantiate the global config_manager object in the API module
+        # This forces media_api.config_manager to use the patched class
+        # and load the correct temporary configuration files.
+        mp.setattr(media_api, 'config_manager', MockedConfigManager())
 
-    # 3. Re-instantiate the global config_manager object in the API module
-    # This forces media_api.config_manager to use the patched class
-    # and load the correct temporary configuration files.
-    media_api.config_manager = MockedConfigManager()
-    
-    # 4. Create the client against the re-configured app
-    return TestClient(media_api.app)
+        # 4. Create the client against the re-configured app
+        yield TestClient(media_api.app)
@@ -1,6 +1,8 @@
 # tests/media_tools/test_api.py
 
+import os
 import pytest
+import json
 from typing import Dict, Any
 
 # Note: The api_client fixture is automatically available from conftest.py
@@ -60,3 +62,139 @@ def test_get_metadata_low_res_file(api_client):
     assert metadata["file_path"] == test_file
     assert metadata["resolution"] == "640x480"
     assert metadata["video_codec"] == "MPEG"
+
+def test_scan_files_streams_media_from_real_directories(api_client, tmp_path, monkeypatch):
+    """
+    Verifies /scan-files walks real directories, keeps only media files and
+    skips missing paths, returning a JSON array.
+    """
+    from media_tools import api as media_api
+
+    movies = tmp_path / "Movies"
+    movies.mkdir()
+    (movies / "Film.MKV").write_bytes(b"")
+    (movies / "notes.txt").write_bytes(b"")
+    (movies / "README").write_bytes(b"")
+    (movies / "._Film.MKV").write_bytes(b"")
+    (movies / "clip.mkv.part").write_bytes(b"")
+    (movies / "Extras.mp4").mkdir()
+    monkeypatch.setitem(
+        media_api.config_manager.config_data,
+        "monitored_paths",
+        [str(movies), str(tmp_path / "missing")],
+    )
+
+    response = api_client.get("/scan-files")
+
+    assert response.status_code == 200
+    assert response.json() == [str(movies / "Film.MKV")]
+
+    response = api_client.get("/scan-files", headers={"Accept": "application/x-ndjson"})
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.text.splitlines() == [json.dumps(str(movies / "Film.MKV"))]
+
+def test_get_metadata_is_cached_until_file_changes(api_client, tmp_path, monkeypatch):
+    """
+    Verifies repeated /get-metadata calls reuse the probe result and that a
+    change to the file's size/mtime triggers a fresh probe.
+    """
+    from media_tools import api as media_api
+
+    media_file = tmp_path / "Film.mkv"
+    media_file.write_bytes(b"v1")
+    calls = []
+
+    async def fake_probe(file_path):
+        calls.append(file_path)
+        return {"file_path": file_path, "video_codec": "HEVC", "resolution": "1920x1080"}
+
+    monkeypatch.setattr(media_api, "_get_live_ffprobe_metadata", fake_probe)
+    media_api._probe_cache.clear()
+
+    for _ in range(2):
+        response = api_client.post("/get-metadata", json={"file_path": str(media_file)})
+        assert response.status_code == 200
+    assert len(calls) == 1
+    assert api_client.get("/debug/cache").json()["hits"] == 1
+
+    media_file.write_bytes(b"version 2")
+    api_client.post("/get-metadata", json={"file_path": str(media_file)})
+    assert len(calls) == 2
+
+def test_get_metadata_batch_returns_results_keyed_by_path(api_client, tmp_path, monkeypatch):
+    """Verifies the batch endpoint probes each distinct file once and reports failures as {}."""
+    from media_tools import api as media_api
+
+    good = tmp_path / "Film.mkv"
+    good.write_bytes(b"data")
+    missing = tmp_path / "missing.mkv"
+    async def fake_probe(file_path):
+        return {"file_path": file_path, "video_codec": "HEVC"}
+
+    monkeypatch.setattr(media_api, "_get_live_ffprobe_metadata", fake_probe)
+    media_api._probe_cache.clear()
+
+    response = api_client.post(
+        "/get-metadata-batch",
+        json={"file_paths": [str(good), str(missing), str(good)]},
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        str(good): {"file_path": str(good), "video_codec": "HEVC"},
+        str(missing): {},
+    }
+
+def test_get_metadata_runs_ffprobe_asynchronously(api_client, tmp_path, monkeypatch):
+    """Verifies the async ffprobe call parses the JSON printed by the ffprobe executable on PATH."""
+    from media_tools import api as media_api
+
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    fake_ffprobe = bin_dir / "ffprobe"
+    fake_ffprobe.write_text(
+        "#!/bin/sh\n"
+        "echo '{\"streams\": [{\"codec_name\": \"hevc\", \"width\": 1920, \"height\": 1080},"
+        " {\"channels\": 6, \"bit_rate\": \"640000\"}]}'\n"
+    )
+    fake_ffprobe.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    media_file = tmp_path / "Film.mkv"
+    media_file.write_bytes(b"")
+    media_api._probe_cache.clear()
+
+    response = api_client.post("/get-metadata", json={"file_path": str(media_file)})
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "file_path": str(media_file), "video_codec": "HEVC", "resolution": "1920x1080",
+        "audio_channels": 6, "bitrate_kbps": 640,
+    }
+
+def test_probe_sidecar_cache_survives_a_cleared_memory_cache(api_client, tmp_path, monkeypatch):
+    """Verifies probe_sidecar_cache persists results next to the file and reuses them per file version."""
+    from media_tools import api as media_api
+
+    media_file = tmp_path / "Film.mkv"
+    media_file.write_bytes(b"v1")
+    calls = []
+
+    async def fake_probe(file_path):
+        calls.append(file_path)
+        return {"file_path": file_path, "video_codec": "HEVC"}
+
+    monkeypatch.setattr(media_api, "_get_live_ffprobe_metadata", fake_probe)
+    monkeypatch.setitem(media_api.config_manager.config_data, "probe_sidecar_cache", True)
+
+    for _ in range(2):
+        media_api._probe_cache.clear()  # e.g. a service restart
+        response = api_client.post("/get-metadata", json={"file_path": str(media_file)})
+        assert response.json()["video_codec"] == "HEVC"
+    assert len(calls) == 1
+    assert (tmp_path / ".Film.mkv.cinchro-probe.json").exists()
+
+    media_file.write_bytes(b"version 2")
+    media_api._probe_cache.clear()
+    api_client.post("/get-metadata", json={"file_path": str(media_file)})
+    assert len(calls) == 2
@@ -0,0 +1,31 @@
+# tests/media_tools/test_config.py
+
+import os
+
+from media_tools.config import ConfigManager
+
+# Note: media_config_files fixture is auto-discovered from conftest.py
+
+def test_env_lookup_is_cached_per_key(media_config_files, monkeypatch):
+    """Verifies an environment override is read once and then served from the cache."""
+    monkeypatch.setenv("api_port", "6000")
+    config_manager = ConfigManager(
+        config_path=str(media_config_files / 'config.json'),
+        env_path=str(media_config_files / '.env')
+    )
+    assert config_manager.get("api_port") == "6000"
+    monkeypatch.setenv("api_port", "7000")
+    assert config_manager.get("api_port") == "6000"
+    assert config_manager.get("monitored_paths")[0] == "/mnt/media/Movies"
+
+def test_shared_instance_reloads_only_when_config_changes(media_config_files):
+    """Verifies shared() reuses one instance until config.json's mtime changes."""
+    config_path = str(media_config_files / 'config.json')
+    env_path = str(media_config_files / '.env')
+
+    first = ConfigManager.shared(config_path, env_path)
+    assert ConfigManager.shared(config_path, env_path) is first
+
+    stat = os.stat(config_path)
+    os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert ConfigManager.shared(config_path, env_path) is not first
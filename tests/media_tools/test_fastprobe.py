@@ -0,0 +1,60 @@
+# tests/media_tools/test_fastprobe.py
+
+import struct
+import pytest
+from media_tools.fastprobe import FastProbeError, probe
+
+
+def _box(box_type: bytes, payload: bytes) -> bytes:
+    return struct.pack('>I4s', 8 + len(payload), box_type) + payload
+
+def _trak(handler: bytes, sample_entry: bytes) -> bytes:
+    hdlr = _box(b'hdlr', b'\0' * 8 + handler + b'\0' * 13)
+    stsd = _box(b'stsd', b'\0' * 4 + struct.pack('>I', 1) + sample_entry)
+    return _box(b'trak', _box(b'mdia', hdlr + _box(b'minf', _box(b'stbl', stsd))))
+
+def _ebml(element_id: int, payload: bytes) -> bytes:
+    id_bytes = element_id.to_bytes((element_id.bit_length() + 7) // 8, 'big')
+    return id_bytes + b'\x01' + len(payload).to_bytes(7, 'big') + payload
+
+def _uint(element_id: int, value: int) -> bytes:
+    return _ebml(element_id, value.to_bytes(4, 'big'))
+
+
+def test_probe_mp4_reads_moov_after_mdat(tmp_path):
+    """Verifies the MP4 walker skips mdat, then decodes mvhd and the video/audio sample entries."""
+    mvhd = _box(b'mvhd', b'\0' * 12 + struct.pack('>II', 1000, 10_000) + b'\0' * 80)
+    video = _trak(b'vide', _box(b'hvc1', b'\0' * 6 + b'\0\x01' + b'\0' * 16 + struct.pack('>HH', 1920, 1080) + b'\0' * 50))
+    audio = _trak(b'soun', _box(b'mp4a', b'\0' * 6 + b'\0\x01' + b'\0' * 8 + struct.pack('>H', 6) + b'\0' * 10))
+    data = _box(b'ftyp', b'isom' + b'\0' * 4) + _box(b'mdat', b'\0' * 100_000) + _box(b'moov', mvhd + video + audio)
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(data)
+
+    assert probe(str(path)) == {
+        "file_path": str(path), "video_codec": "HEVC", "resolution": "1920x1080",
+        "audio_channels": 6, "bitrate_kbps": int(len(data) * 8 / 10) // 1000,
+    }
+
+def test_probe_mkv_reads_info_and_tracks(tmp_path):
+    """Verifies the EBML reader finds Segment/Info and Segment/Tracks before the first Cluster."""
+    info = _ebml(0x1549A966, _uint(0x2AD7B1, 1_000_000) + _ebml(0x4489, struct.pack('>d', 10_000.0)))
+    video = _ebml(0xAE, _uint(0x83, 1) + _ebml(0x86, b'V_MPEGH/ISO/HEVC')
+                  + _ebml(0xE0, _uint(0xB0, 3840) + _uint(0xBA, 2160)))
+    audio = _ebml(0xAE, _uint(0x83, 2) + _ebml(0x86, b'A_EAC3') + _ebml(0xE1, _uint(0x9F, 8)))
+    segment = _ebml(0x18538067, info + _ebml(0x1654AE6B, video + audio) + _ebml(0x1F43B675, b'\0' * 50_000))
+    data = _ebml(0x1A45DFA3, _ebml(0x4282, b'matroska')) + segment
+    path = tmp_path / "clip.mkv"
+    path.write_bytes(data)
+
+    assert probe(str(path)) == {
+        "file_path": str(path), "video_codec": "HEVC", "resolution": "3840x2160",
+        "audio_channels": 8, "bitrate_kbps": int(len(data) * 8 / 10) // 1000,
+    }
+
+@pytest.mark.parametrize("name, content", [("clip.avi", b"RIFF"), ("clip.mkv", b"not ebml"), ("clip.mp4", b"")])
+def test_probe_rejects_what_it_cannot_read(tmp_path, name, content):
+    """Verifies unsupported or corrupt files raise FastProbeError so callers use ffprobe."""
+    path = tmp_path / name
+    path.write_bytes(content)
+    with pytest.raises(FastProbeError):
+        probe(str(path))
@@ -0,0 +1,119 @@
+# tests/orchestrator/chaos_transport.py
+
+import json
+import random
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Tuple
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+# Fault kinds a FaultRule can inject.
+NETWORK_TIMEOUT = "timeout"
+CONNECTION_ERROR = "connection_error"
+HTTP_5XX = "http_5xx"
+HTTP_429 = "http_429"
+SLOW_RESPONSE = "slow"
+
+
+@dataclass
+class FaultRule:
+    """
+    One kind of injected failure. Each request draws once per rule (in order)
+    from the adapter's seeded RNG; the first rule that fires decides the fault.
+    times limits how often the rule may fire (None = unlimited).
+    """
+    kind: str
+    probability: float = 1.0
+    times: Optional[int] = None
+    status: int = 503
+    retry_after: Optional[float] = None
+    delay: float = 0.0
+
+
+class FakeClock:
+    """Stands in for time.monotonic/time.sleep: sleeping only advances the clock."""
+
+    def __init__(self, start: float = 1000.0):
+        self.now = start
+        self.sleeps: List[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class ChaosAdapter(BaseAdapter):
+    """
+    A requests transport that never touches the network. Requests are answered
+    by handler(request) -> (status, json_body) unless a FaultRule fires, so the
+    retry, deadline and circuit-breaker code above it runs unmodified. The
+    fault sequence is fully determined by the seed.
+    """
+
+    def __init__(self, rules: List[FaultRule],
+                 handler: Callable[[requests.PreparedRequest], Tuple[int, Any]] = lambda request: (200, {}),
+                 seed: int = 42, clock: Optional[FakeClock] = None):
+        super().__init__()
+        self.rules = rules
+        self.handler = handler
+        self.clock = clock
+        self.requests: List[requests.PreparedRequest] = []
+        self.faults: List[Optional[str]] = []
+        self._rng = random.Random(seed)
+        self._fired = [0] * len(rules)
+
+    def _pick_fault(self) -> Optional[FaultRule]:
+        for i, rule in enumerate(self.rules):
+            if rule.times is not None and self._fired[i] >= rule.times:
+                continue
+            if self._rng.random() < rule.probability:
+                self._fired[i] += 1
+                return rule
+        return None
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        self.requests.append(request)
+        rule = self._pick_fault()
+        self.faults.append(rule.kind if rule else None)
+        if rule is None:
+            return self._response(request, *self.handler(request))
+        if rule.kind == NETWORK_TIMEOUT:
+            raise requests.exceptions.ReadTimeout("chaos: read timed out", request=request)
+        if rule.kind == CONNECTION_ERROR:
+            raise requests.exceptions.ConnectionError("chaos: connection reset", request=request)
+        if rule.kind == SLOW_RESPONSE:
+            read_timeout = timeout[1] if isinstance(timeout, tuple) else timeout
+            if self.clock is not None:
+                self.clock.now += min(rule.delay, read_timeout or rule.delay)
+            if read_timeout is not None and rule.delay >= read_timeout:
+                raise requests.exceptions.ReadTimeout("chaos: slow response timed out", request=request)
+            return self._response(request, *self.handler(request))
+        status = 429 if rule.kind == HTTP_429 else rule.status
+        headers = {"Retry-After": str(rule.retry_after)} if rule.retry_after is not None else {}
+        return self._response(request, status, {"detail": f"chaos: {rule.kind}"}, headers)
+
+    @staticmethod
+    def _response(request, status: int, body: Any, headers=None) -> requests.Response:
+        response = requests.Response()
+        response.status_code = status
+        response._content = json.dumps(body).encode()
+        response.headers = CaseInsensitiveDict({"Content-Type": "application/json", **(headers or {})})
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def install_chaos(tools, adapter: ChaosAdapter) -> ChaosAdapter:
+    """Routes every request of an API client (MediaTools/FFMPEGGTools) through adapter."""
+    tools.session.mount("http://", adapter)
+    tools.session.mount("https://", adapter)
+    return adapter
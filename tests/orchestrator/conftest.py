@@ -0,0 +1,36 @@
+# tests/orchestrator/conftest.py
+
+import functools
+
+import pytest
+
+from orchestrator.config import ConfigManager
+from orchestrator.tools import http_session
+from tests.orchestrator.chaos_transport import FakeClock
+
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    """
+    Replaces the clock used by the retry/deadline helper, so backoff sleeps
+    are recorded instantly instead of slept.
+    """
+    clock = FakeClock()
+    monkeypatch.setattr(http_session.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(http_session.time, "sleep", clock.sleep)
+    return clock
+
+
+@functools.lru_cache(maxsize=None)
+def _load_config_manager(config_path, env_path):
+    return ConfigManager(config_path=config_path, env_path=env_path)
+
+
+@pytest.fixture
+def load_config_manager():
+    """
+    Returns a factory that loads each (config_path, env_path) pair once per
+    session. Tests that depend on a fresh instance (e.g. its env cache being
+    empty) construct ConfigManager themselves.
+    """
+    return _load_config_manager
@@ -0,0 +1,64 @@
+# tests/orchestrator/test_chaos.py
+
+import json
+
+from orchestrator.tools import circuit_breaker, http_session
+from orchestrator.tools.ffmpeg_tools import FFMPEGGTools
+from orchestrator.tools.media_tools import MediaTools
+from tests.orchestrator.chaos_transport import (CONNECTION_ERROR, HTTP_429, HTTP_5XX, NETWORK_TIMEOUT,
+                                                SLOW_RESPONSE, ChaosAdapter, FaultRule, install_chaos)
+
+
+def _metadata_handler(request):
+    paths = json.loads(request.body)["file_paths"]
+    return 200, {path: {"video_codec": "HEVC"} for path in paths}
+
+
+def test_metadata_batch_rides_out_transient_faults(fake_clock):
+    """
+    Tests that 503, 429 (with Retry-After) and a read timeout are retried with
+    backoff, without real sleeps, before the batch succeeds.
+    """
+    tools = MediaTools(api_base_url="http://chaos-media")
+    adapter = install_chaos(tools, ChaosAdapter([
+        FaultRule(HTTP_5XX, times=1, status=503),
+        FaultRule(HTTP_429, times=1, retry_after=2),
+        FaultRule(NETWORK_TIMEOUT, times=1),
+    ], handler=_metadata_handler, clock=fake_clock))
+
+    result = tools.get_metadata_batch(["/media/a.mkv"])
+
+    assert result == {"/media/a.mkv": {"video_codec": "HEVC"}}
+    assert adapter.faults == [HTTP_5XX, HTTP_429, NETWORK_TIMEOUT, None]
+    assert len(fake_clock.sleeps) == 3 and fake_clock.sleeps[1] >= 2
+    assert tools.breaker.state == circuit_breaker.CLOSED
+
+
+def test_slow_backend_is_cut_off_by_the_deadline(fake_clock):
+    """Tests that a response slower than the deadline surfaces as a failure in bounded time."""
+    tools = MediaTools(api_base_url="http://chaos-slow-media", deadline_s=10)
+    install_chaos(tools, ChaosAdapter([FaultRule(SLOW_RESPONSE, delay=60)], clock=fake_clock))
+    started = fake_clock.now
+
+    assert tools.get_file_metadata("/media/a.mkv") == {}
+    assert fake_clock.now - started <= 10 + http_session.RETRY_MAX_DELAY
+
+
+def test_random_faults_are_reproducible_and_trip_the_breaker(fake_clock):
+    """
+    Tests that a seed fixes the fault sequence, and that persistent connection
+    failures open the breaker so later submissions never reach the transport.
+    """
+    def run(seed):
+        adapter = ChaosAdapter([FaultRule(HTTP_5XX, probability=0.5)], seed=seed)
+        return [adapter._pick_fault() is not None for _ in range(20)]
+
+    assert run(7) == run(7)
+    assert run(7) != run(8)
+
+    tools = FFMPEGGTools(api_base_url="http://chaos-ffmpeg")
+    adapter = install_chaos(tools, ChaosAdapter([FaultRule(CONNECTION_ERROR)], clock=fake_clock))
+    results = [tools.run_ffmpeg_command(["-c:v", "libx265"], f"/media/{i}.mkv", "ignored") for i in range(8)]
+
+    assert len(adapter.requests) == circuit_breaker.FAILURE_THRESHOLD
+    assert results[-1]["notes"] == "circuit open"
@@ -0,0 +1,57 @@
+# tests/orchestrator/test_circuit_breaker.py
+
+from unittest.mock import MagicMock
+
+import requests
+
+from orchestrator.tools import circuit_breaker
+from orchestrator.tools.circuit_breaker import CircuitBreaker, get_breaker
+from orchestrator.tools.ffmpeg_tools import FFMPEGGTools
+
+
+def test_breaker_opens_then_lets_one_probe_through_after_recovery(monkeypatch):
+    """
+    Tests CLOSED -> OPEN after the threshold, a single HALF_OPEN probe once the
+    cooldown has passed, and re-opening when that probe fails.
+    """
+    now = [100.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=2, recovery_seconds=30)
+
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == circuit_breaker.OPEN and not breaker.allow_request()
+
+    now[0] += 30
+    assert breaker.allow_request() and breaker.state == circuit_breaker.HALF_OPEN
+    assert not breaker.allow_request()  # only one probe
+    breaker.record_failure()
+    assert breaker.state == circuit_breaker.OPEN and not breaker.allow_request()
+
+    now[0] += 30
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == circuit_breaker.CLOSED and breaker.consecutive_failures == 0
+
+
+def test_ffmpeg_tools_fail_fast_while_backend_is_down():
+    """
+    Tests that after enough connection failures the client stops calling the
+    service, and that 4xx responses do not count against the backend.
+    """
+    tools = FFMPEGGTools(api_base_url="http://breaker-test-ffmpeg")
+    assert get_breaker("http://breaker-test-ffmpeg") is tools.breaker
+    tools.session.post = MagicMock(side_effect=requests.exceptions.ConnectionError("down"))
+
+    for _ in range(circuit_breaker.FAILURE_THRESHOLD):
+        assert tools.run_ffmpeg_command(["-c:v", "libx265"], "/media/a.mkv", "ignored")["status"] == "FAILED"
+    result = tools.run_ffmpeg_command(["-c:v", "libx265"], "/media/a.mkv", "ignored")
+
+    assert result == {"status": "FAILED", "job_id": "none", "notes": "circuit open"}
+    assert tools.session.post.call_count == circuit_breaker.FAILURE_THRESHOLD
+
+    error = requests.exceptions.HTTPError(response=MagicMock(status_code=422))
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.record_error(error)
+    assert breaker.state == circuit_breaker.CLOSED
@@ -1,56 +1,65 @@
 # tests/orchestrator/test_config.py
 
 import os
+import shutil
 import sys
 import pytest
 
 from orchestrator.config import ConfigManager
 
 
-def test_config_manager_loads_both_files(test_config_files):
+@pytest.mark.parametrize("key, default, expected", [
+    ('DATABASE_PATH', None, "{dir}/test.db"),       # from .env
+    ('LLM_MODEL', None, 'test_model'),              # from config.json
+    ('NON_EXISTENT_KEY', 'default', 'default'),     # in neither file
+    ('NON_EXISTENT_KEY', None, None),
+])
+def test_config_manager_loads_both_files(test_config_files, load_config_manager, key, default, expected):
     """
     Tests that the ConfigManager correctly loads values from both
-    config.json and .env files.
+    config.json and .env files, and that get() returns the default
+    when a key is not found. All cases share one loaded ConfigManager.
     """
-    config_manager = ConfigManager(
-        config_path=os.path.join(test_config_files, 'config.json'),
-        env_path=os.path.join(test_config_files, '.env')
-    )
-    
-    # Assert that a value from the .env file is loaded
-    assert config_manager.get('DATABASE_PATH') is not None
-    
-    # Assert that a value from the config.json file is loaded
-    assert config_manager.get('LLM_MODEL') == 'test_model'
+    config_manager = load_config_manager(test_config_files.config_path, test_config_files.env_path)
 
-def test_env_variables_override_json(test_config_files):
+    if expected is not None:
+        expected = expected.format(dir=test_config_files.dir)
+    assert config_manager.get(key, default) == expected
+
+def test_env_variables_override_json(test_config_files, tmp_path, monkeypatch):
     """
     Tests that values in the .env file take precedence over
     values with the same key in config.json.
     """
-    # Overwrite a value in the temporary .env file for this test
-    env_path = os.path.join(test_config_files, '.env')
+    # Override a value in a private copy of the shared .env file
+    env_path = str(tmp_path / '.env')
+    shutil.copyfile(test_config_files.env_path, env_path)
     with open(env_path, 'a') as f:
         f.write("\nLLM_MODEL=env_test_model_override")
-        
+    # load_dotenv writes into os.environ; keep that from leaking into later tests
+    monkeypatch.setattr(os, 'environ', os.environ.copy())
+
     config_manager = ConfigManager(
-        config_path=os.path.join(test_config_files, 'config.json'),
+        config_path=test_config_files.config_path,
         env_path=env_path
     )
     
     # Assert that the value from .env is returned, not the JSON one
     assert config_manager.get('LLM_MODEL') == 'env_test_model_override'
 
-def test_get_method_with_default_value(test_config_files):
+def test_env_lookup_is_resolved_once_per_key(test_config_files, monkeypatch):
     """
-    Tests that the get() method returns the default value
-    when a key is not found.
+    Tests that an environment value is read on first use and then served
+    from the instance cache, while defaults still apply per call.
     """
+    monkeypatch.setenv("media_location", "/mnt/first")
     config_manager = ConfigManager(
-        config_path=os.path.join(test_config_files, 'config.json'),
-        env_path=os.path.join(test_config_files, '.env')
+        config_path=test_config_files.config_path,
+        env_path=test_config_files.env_path
     )
-    
-    # Test with a key that does not exist in either file
-    assert config_manager.get('NON_EXISTENT_KEY', 'default') == 'default'
-    assert config_manager.get('NON_EXISTENT_KEY') is None
\ No newline at end of file
+
+    assert config_manager.get('media_location') == "/mnt/first"
+    monkeypatch.setenv("media_location", "/mnt/second")
+    assert config_manager.get('media_location') == "/mnt/first"
+    assert config_manager.get('NON_EXISTENT_KEY', 'a') == 'a'
+    assert config_manager.get('NON_EXISTENT_KEY', 'b') == 'b'
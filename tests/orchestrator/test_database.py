@@ -3,18 +3,30 @@
 import os
 import sys
 import pytest
-import json
 
 
-from orchestrator.database import DatabaseManager
+from orchestrator.database import DatabaseManager, format_timestamp
 
 
-def test_add_and_get_file(test_db):
+@pytest.fixture(scope="module")
+def shared_db_manager():
+    """One in-memory DatabaseManager (one connection, one statement cache) for the module."""
+    manager = DatabaseManager(":memory:")
+    yield manager
+    manager.close()
+
+@pytest.fixture
+def db_manager(shared_db_manager):
+    """The shared DatabaseManager with its table emptied for this test."""
+    with shared_db_manager.transaction():
+        shared_db_manager.conn.execute("DELETE FROM media_files")
+    return shared_db_manager
+
+def test_add_and_get_file(db_manager):
     """
     Tests that a new file can be added to the database and its
     information can be retrieved correctly.
     """
-    db_manager = DatabaseManager(test_db)
     file_path = "/media/test_file.mkv"
     
     # Add the file
@@ -26,15 +38,12 @@ def test_add_and_get_file(test_db):
     assert info is not None
     assert info['file_path'] == file_path
     assert info['status'] == 'pending_scan'
-    
-    db_manager.close()
 
-def test_add_duplicate_file(test_db):
+def test_add_duplicate_file(db_manager):
     """
     Tests that adding a duplicate file returns False and does not
     create a new row.
     """
-    db_manager = DatabaseManager(test_db)
     file_path = "/media/duplicate_file.mkv"
     
     # Add the file the first time
@@ -50,14 +59,11 @@ def test_add_duplicate_file(test_db):
     cursor.execute("SELECT COUNT(*) FROM media_files WHERE file_path = ?", (file_path,))
     count = cursor.fetchone()[0]
     assert count == 1
-    
-    db_manager.close()
 
-def test_update_file_status(test_db):
+def test_update_file_status(db_manager):
     """
     Tests that the file status and other fields can be updated correctly.
     """
-    db_manager = DatabaseManager(test_db)
     file_path = "/media/update_test_file.mkv"
     
     db_manager.add_file(file_path)
@@ -75,24 +81,19 @@ def test_update_file_status(test_db):
     
     assert info['status'] == new_status
     assert info['processing_file_path'] == processing_path
-    assert json.loads(info['output_files']) == output_files
+    assert info['output_files'] == output_files
     assert info['notes'] == notes
     assert info['last_processed_date'] is not None
-    
-    db_manager.close()
 
-def test_get_files_by_status(test_db):
+def test_get_files_by_status(db_manager):
     """
     Tests that files can be correctly retrieved based on their status.
     """
-    db_manager = DatabaseManager(test_db)
-    
-    # Add files with different statuses
-    db_manager.add_file("/media/file1.mkv")
-    db_manager.add_file("/media/file2.mkv")
-    db_manager.add_file("/media/file3.mkv")
-    db_manager.update_file_status("/media/file2.mkv", 'processed')
-    db_manager.update_file_status("/media/file3.mkv", 'skipped')
+    # Add files with different statuses (one commit for the inserts, one for the updates)
+    db_manager.add_files_bulk(["/media/file1.mkv", "/media/file2.mkv", "/media/file3.mkv"])
+    with db_manager.transaction():
+        db_manager.update_file_status("/media/file2.mkv", 'processed')
+        db_manager.update_file_status("/media/file3.mkv", 'skipped')
     
     pending_files = db_manager.get_files_by_status('pending_scan')
     processed_files = db_manager.get_files_by_status('processed')
@@ -107,4 +108,104 @@ def test_get_files_by_status(test_db):
     assert len(skipped_files) == 1
     assert "/media/file3.mkv" in skipped_files
 
-    db_manager.close()
\ No newline at end of file
+def test_add_files_bulk_skips_existing_files(db_manager):
+    """
+    Tests that a bulk add inserts only new paths and reports which ones were added.
+    """
+    db_manager.add_file("/media/existing.mkv")
+
+    added = db_manager.add_files_bulk(["/media/new1.mkv", "/media/existing.mkv", "/media/new2.mkv"])
+
+    assert added == ["/media/new1.mkv", "/media/new2.mkv"]
+    assert sorted(db_manager.get_files_by_status('pending_scan')) == [
+        "/media/existing.mkv", "/media/new1.mkv", "/media/new2.mkv"
+    ]
+    assert db_manager.add_files_bulk([]) == []
+
+def test_connection_pragmas_default_to_wal_and_can_be_overridden(tmp_path):
+    """
+    Tests that the connection opens in WAL mode and that configured PRAGMAs
+    override the defaults.
+    """
+    # WAL needs a database file; in-memory databases report journal_mode "memory"
+    db_manager = DatabaseManager(str(tmp_path / "test.db"), pragmas={"synchronous": "FULL"})
+
+    assert db_manager.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    # 2 = FULL, 1 = NORMAL
+    assert db_manager.conn.execute("PRAGMA synchronous").fetchone()[0] == 2
+    assert db_manager.conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+
+    db_manager.close()
+
+def test_update_file_statuses_bulk(db_manager):
+    """
+    Tests that a bulk status update changes every listed file.
+    """
+    db_manager.add_files_bulk(["/media/a.mkv", "/media/b.mkv"])
+
+    db_manager.update_file_statuses_bulk([
+        ("/media/a.mkv", "ready_for_conversion", "Nominated."),
+        ("/media/b.mkv", "skipped", "Skipped."),
+    ])
+
+    assert db_manager.get_files_by_status('ready_for_conversion') == ["/media/a.mkv"]
+    assert db_manager.get_file_info("/media/b.mkv")['notes'] == "Skipped."
+
+def test_iso_timestamps_are_migrated_to_epoch_ms(test_db):
+    """
+    Tests that a database with the old TEXT timestamps is converted once and
+    that new writes store integer epoch milliseconds.
+    """
+    import sqlite3
+    # Kept open until DatabaseManager connects: the in-memory database lives only that long
+    conn = sqlite3.connect(test_db, uri=True)
+    conn.execute("""
+        CREATE TABLE media_files (
+            file_path TEXT PRIMARY KEY, status TEXT NOT NULL, last_processed_date TEXT,
+            processing_file_path TEXT, output_files TEXT, notes TEXT
+        )
+    """)
+    conn.execute("INSERT INTO media_files (file_path, status, last_processed_date) VALUES (?, ?, ?)",
+                 ("/media/old.mkv", "skipped", "2024-05-01T12:30:00.123456"))
+    conn.commit()
+
+    db_manager = DatabaseManager(test_db)
+    conn.close()
+    old = db_manager.get_file_info("/media/old.mkv")
+    assert old['status'] == "skipped"
+    assert format_timestamp(old['last_processed_date']) == "2024-05-01T12:30:00"
+
+    db_manager.add_file("/media/new.mkv")
+    assert isinstance(db_manager.get_file_info("/media/new.mkv")['last_processed_date'], int)
+
+    db_manager.close()
+
+def test_status_lookup_uses_covering_index(db_manager):
+    """
+    Tests that the status query is planned as a covering index search.
+    """
+    plan = db_manager.conn.execute(
+        "EXPLAIN QUERY PLAN SELECT file_path FROM media_files WHERE status = ?", ("pending_scan",)
+    ).fetchall()
+    assert "COVERING INDEX idx_media_files_status" in " ".join(row[3] for row in plan)
+
+def test_transaction_commits_once_and_rolls_back_on_error(test_db):
+    """
+    Tests that writes inside transaction() are committed together, and
+    discarded together when the block raises.
+    """
+    with DatabaseManager(test_db) as db_manager:
+        with db_manager.transaction():
+            db_manager.add_file("/media/a.mkv")
+            db_manager.update_file_status("/media/a.mkv", "processing", notes="Job submitted: 1")
+            assert db_manager.conn.in_transaction
+
+        assert not db_manager.conn.in_transaction
+        assert db_manager.get_files_by_status('processing') == ["/media/a.mkv"]
+
+        with pytest.raises(RuntimeError):
+            with db_manager.transaction():
+                db_manager.add_file("/media/b.mkv")
+                raise RuntimeError("boom")
+
+        assert db_manager.get_file_info("/media/b.mkv") is None
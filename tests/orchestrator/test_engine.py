@@ -2,11 +2,6 @@
 
 import pytest
 from unittest.mock import MagicMock
-import sys
-import os
-
-# Adjust the Python path to allow for imports from the project root
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
 from orchestrator.engine import CinchroEngine
 from orchestrator.config import ConfigManager
@@ -15,9 +10,20 @@ from orchestrator.tools.media_tools import MediaTools
 from orchestrator.tools.ffmpeg_tools import FFMPEGGTools
 
 
-@pytest.fixture
+MOCK_CONFIG = {
+    "DATABASE_PATH": "test.db",
+    "media_api_url": "http://mock-media",
+    "ffmpeg_api_url": "http://mock-ffmpeg",
+    "media_location": "/media/library",
+    "use_dummy_tools": True
+}
+
+@pytest.fixture(scope="module")
 def mock_dependencies():
-    """Provides mocked instances of all external dependencies."""
+    """
+    Provides mocked instances of all external dependencies, built once per
+    module (spec= introspects each class); reset_mocks clears them per test.
+    """
     return {
         'config_manager': MagicMock(spec=ConfigManager),
         'db_manager': MagicMock(spec=DatabaseManager),
@@ -25,16 +31,16 @@ def mock_dependencies():
         'ffmpeg_tools': MagicMock(spec=FFMPEGGTools)
     }
 
-@pytest.fixture
+@pytest.fixture(autouse=True)
+def reset_mocks(mock_dependencies):
+    """Clears recorded calls, return values and side effects left by the previous test."""
+    for mock in mock_dependencies.values():
+        mock.reset_mock(return_value=True, side_effect=True)
+    mock_dependencies['config_manager'].get.side_effect = MOCK_CONFIG.get
+
+@pytest.fixture(scope="module")
 def engine(mock_dependencies):
     """Initializes and returns a CinchroEngine instance with mocked dependencies."""
-    mock_dependencies['config_manager'].get.side_effect = lambda key: {
-        "DATABASE_PATH": "test.db",
-        "media_api_url": "http://mock-media",
-        "ffmpeg_api_url": "http://mock-ffmpeg",
-        "use_dummy_tools": True
-    }.get(key)
-    
     # We will override the engine's __init__ to use our mocks directly
     engine_instance = CinchroEngine.__new__(CinchroEngine)
     engine_instance.config_manager = mock_dependencies['config_manager']
@@ -49,71 +55,134 @@ def test_scan_and_add_files_discovers_new_files(engine, mock_dependencies):
     Tests that the engine correctly scans for new files and adds them to the database.
     """
     mock_dependencies['media_tools'].list_media_files.return_value = ["/media/file1.mp4", "/media/file2.mov"]
-    mock_dependencies['db_manager'].add_file.side_effect = [True, False] # Simulate file1 as new, file2 as existing
-    
-    engine.scan_and_add_files("/media/library")
+    mock_dependencies['db_manager'].add_files_bulk.return_value = ["/media/file1.mp4"] # file2 already existed
     
-    # Assert that the list_media_files tool was called once
-    mock_dependencies['media_tools'].list_media_files.assert_called_once_with("/media/library")
+    engine.scan_and_add_files()
     
-    # Assert that add_file was called for both files
-    mock_dependencies['db_manager'].add_file.assert_any_call("/media/file1.mp4")
-    mock_dependencies['db_manager'].add_file.assert_any_call("/media/file2.mov")
+    # Assert that the list_media_files tool was called once for the configured location
+    mock_dependencies['media_tools'].list_media_files.assert_called_once_with(location="/media/library")
     
-    # Assert that add_file was called exactly twice
-    assert mock_dependencies['db_manager'].add_file.call_count == 2
+    # Assert that both files were added in one bulk call, not one add_file each
+    mock_dependencies['db_manager'].add_files_bulk.assert_called_once_with(["/media/file1.mp4", "/media/file2.mov"])
+    mock_dependencies['db_manager'].add_file.assert_not_called()
 
 def test_evaluate_files_updates_status_correctly(engine, mock_dependencies):
     """
     Tests that the engine correctly evaluates files and updates their status.
     """
     mock_dependencies['db_manager'].get_files_by_status.return_value = ["/media/good.mkv", "/media/bad.mp4"]
-    mock_dependencies['media_tools'].get_file_metadata.side_effect = [
-        # Metadata for the 'good' file
-        {"resolution": "1920x1080", "video_codec": "HEVC"},
-        # Metadata for the 'bad' file
-        {"resolution": "1280x720", "video_codec": "AVC"}
-    ]
+    mock_dependencies['media_tools'].get_metadata_batch.return_value = {
+        # Metadata for the 'good' file: high resolution, not yet HEVC
+        "/media/good.mkv": {"resolution": "1920x1080", "video_codec": "AVC"},
+        # Metadata for the 'bad' file: 480p and already HEVC
+        "/media/bad.mp4": {"resolution": "720x480", "video_codec": "HEVC"},
+    }
     
     engine.evaluate_files()
     
-    # Assert that the status for the good file was updated correctly
-    mock_dependencies['db_manager'].update_file_status.assert_any_call(
-        "/media/good.mkv", 'ready_for_conversion', notes="Meets all quality standards."
-    )
-    
-    # Assert that the status for the bad file was updated correctly
-    mock_dependencies['db_manager'].update_file_status.assert_any_call(
-        "/media/bad.mp4", 'skipped', notes="Does not meet quality standards (not high-res or HEVC)."
-    )
+    # Assert that both statuses were written in a single bulk update
+    mock_dependencies['db_manager'].update_file_statuses_bulk.assert_called_once_with([
+        ("/media/good.mkv", 'ready_for_conversion',
+         "Nominated: Resolution 1920x1080 > 480p, and needs HEVC conversion (currently AVC)."),
+        ("/media/bad.mp4", 'skipped',
+         "Skipped: Resolution (720x480) is 480p or lower. Already HEVC codec (no conversion needed)."),
+    ])
+    mock_dependencies['db_manager'].update_file_status.assert_not_called()
 
-def test_process_ready_files_with_confirmation(engine, mock_dependencies):
+@pytest.mark.parametrize("job_info,expect_processing", [
+    ({"job_id": "job_123"}, True),
+    ({"status": "FAILED", "job_id": "none", "notes": "circuit open"}, False),
+])
+def test_process_ready_files(engine, mock_dependencies, job_info, expect_processing):
     """
-    Tests that the engine processes files when user confirmation is provided.
+    Tests that ready files are submitted to the FFMPEG tool and marked
+    'processing' only when the submission actually reached the service.
     """
     mock_dependencies['db_manager'].get_files_by_status.return_value = ["/media/ready.mkv"]
-    mock_dependencies['ffmpeg_tools'].run_ffmpeg_command.return_value = {"job_id": "job_123"}
-    
-    engine.process_ready_files("yes")
-    
-    # Assert that the FFMPEG tool was called
+    mock_dependencies['ffmpeg_tools'].run_ffmpeg_command.return_value = job_info
+
+    engine.process_ready_files()
+
     mock_dependencies['ffmpeg_tools'].run_ffmpeg_command.assert_called_once()
-    
-    # Assert that the database status was updated to 'processing'
-    mock_dependencies['db_manager'].update_file_status.assert_called_once()
-    assert mock_dependencies['db_manager'].update_file_status.call_args[0][1] == 'processing'
-    
-def test_process_ready_files_without_confirmation(engine, mock_dependencies):
+    status_calls = mock_dependencies['db_manager'].update_file_status.call_args_list
+    assert [c.args[1] for c in status_calls] == (['processing'] if expect_processing else [])
+
+def test_evaluate_files_batches_metadata_and_status_updates(engine, mock_dependencies):
     """
-    Tests that the engine does NOT process files if user confirmation is denied.
+    Tests that all pending files are probed with a single batch call and
+    their new statuses written with a single bulk update.
     """
-    mock_dependencies['db_manager'].get_files_by_status.return_value = ["/media/ready.mkv"]
-    
-    engine.process_ready_files("no")
-    
-    # Assert that the FFMPEG tool was never called
-    mock_dependencies['ffmpeg_tools'].run_ffmpeg_command.assert_not_called()
-    
-    # Assert that no database status was updated to 'processing'
-    for call in mock_dependencies['db_manager'].update_file_status.call_args_list:
-        assert call.args[1] != 'processing'
\ No newline at end of file
+    mock_dependencies['db_manager'].get_files_by_status.return_value = ["/media/a.mkv", "/media/b.mkv"]
+    mock_dependencies['media_tools'].get_metadata_batch.return_value = {
+        "/media/a.mkv": {"resolution": "1920x1080", "video_codec": "AVC"},
+        "/media/b.mkv": {},
+    }
+
+    engine.evaluate_files()
+
+    mock_dependencies['media_tools'].get_metadata_batch.assert_called_once_with(["/media/a.mkv", "/media/b.mkv"])
+    mock_dependencies['media_tools'].get_file_metadata.assert_not_called()
+    mock_dependencies['db_manager'].update_file_statuses_bulk.assert_called_once()
+    updates = mock_dependencies['db_manager'].update_file_statuses_bulk.call_args.args[0]
+    assert {path: status for path, status, _ in updates} == {
+        "/media/a.mkv": 'ready_for_conversion', "/media/b.mkv": 'skipped'
+    }
+
+
+def test_full_workflow_submits_backlog_while_scanning(engine, mock_dependencies):
+    """
+    Tests that files left ready by an earlier run are submitted alongside the
+    scan, and files nominated by this run are submitted afterwards.
+    """
+    ready_batches = iter([["/media/old.mkv"], ["/media/new.mkv"]])
+    mock_dependencies['db_manager'].get_files_by_status.side_effect = (
+        lambda status: next(ready_batches) if status == 'ready_for_conversion' else []
+    )
+    mock_dependencies['db_manager'].add_files_bulk.return_value = []
+    mock_dependencies['media_tools'].list_media_files.return_value = []
+    mock_dependencies['ffmpeg_tools'].run_ffmpeg_command.side_effect = lambda command, input_file, output_file: {
+        "job_id": f"job-{input_file}"
+    }
+
+    engine.run_full_workflow()
+
+    submitted = [c.kwargs['input_file'] for c in mock_dependencies['ffmpeg_tools'].run_ffmpeg_command.call_args_list]
+    assert submitted == ["/media/old.mkv", "/media/new.mkv"]
+    recorded = [c.args[:2] for c in mock_dependencies['db_manager'].update_file_status.call_args_list]
+    assert recorded == [("/media/old.mkv", 'processing'), ("/media/new.mkv", 'processing')]
+
+def test_submit_conversions_overlaps_requests_and_keeps_order(engine, mock_dependencies):
+    """
+    Tests that job submissions are in flight concurrently and that results
+    are paired with their files in input order.
+    """
+    import threading
+    files = [f"/media/{i}.mkv" for i in range(4)]
+    barrier = threading.Barrier(len(files), timeout=5)
+
+    def submit(command, input_file, output_file):
+        # Only returns once all four submissions are running at the same time.
+        barrier.wait()
+        return {"job_id": f"job-{input_file}"}
+
+    mock_dependencies['ffmpeg_tools'].run_ffmpeg_command.side_effect = submit
+
+    submissions = engine._submit_conversions(files)
+
+    assert submissions == [(f, {"job_id": f"job-{f}"}) for f in files]
+
+def test_rejected_submissions_stay_ready_for_the_next_run(engine, mock_dependencies):
+    """
+    Tests that files whose job the service did not accept are not marked
+    'processing'.
+    """
+    mock_dependencies['db_manager'].get_files_by_status.return_value = ["/media/ok.mkv", "/media/busy.mkv"]
+    mock_dependencies['ffmpeg_tools'].run_ffmpeg_command.side_effect = lambda command, input_file, output_file: (
+        {"status": "REJECTED", "job_id": "none", "notes": "bulkhead full"} if "busy" in input_file
+        else {"job_id": "job_1"}
+    )
+
+    engine.process_ready_files()
+
+    mock_dependencies['db_manager'].update_file_status.assert_called_once()
+    assert mock_dependencies['db_manager'].update_file_status.call_args[0][:2] == ("/media/ok.mkv", 'processing')
@@ -0,0 +1,129 @@
+# tests/orchestrator/test_ffmpeg_tools.py
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+from orchestrator.tools.ffmpeg_tools import FFMPEGGTools, submission_key
+
+
+def test_bulkhead_caps_in_flight_submissions_and_rejects_overflow():
+    """
+    Tests that at most max_concurrent_jobs submissions reach the service at
+    once, max_queued_jobs more wait, and any further caller is rejected.
+    """
+    tools = FFMPEGGTools(api_base_url="http://bulkhead-test-ffmpeg", max_concurrent_jobs=2, max_queued_jobs=1)
+    release = threading.Event()
+    started = threading.Semaphore(0)
+    in_flight = []
+
+    def fake_post(endpoint, json, timeout):
+        in_flight.append(json["input_file"])
+        started.release()
+        release.wait(5)
+        response = MagicMock(status_code=200)
+        input_file = json["input_file"]
+        response.content = f'{{"job_id": "job-{input_file}"}}'.encode()
+        return response
+
+    tools.session.post = MagicMock(side_effect=fake_post)
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [executor.submit(tools.run_ffmpeg_command, ["-c:v", "libx265"], f"/media/{i}.mkv", "ignored")
+                   for i in range(3)]
+        started.acquire(timeout=5)
+        started.acquire(timeout=5)
+        # Two submissions hold the slots and one is queued: the bulkhead is full.
+        rejected = tools.run_ffmpeg_command(["-c:v", "libx265"], "/media/extra.mkv", "ignored")
+        assert len(in_flight) == 2
+        release.set()
+        results = [f.result(timeout=5) for f in futures]
+
+    assert rejected == {"status": "REJECTED", "job_id": "none", "notes": "bulkhead full"}
+    assert sorted(r["job_id"] for r in results) == [f"job-/media/{i}.mkv" for i in range(3)]
+    assert tools.session.post.call_count == 3
+
+
+def test_wait_for_completion_long_polls_until_a_final_status():
+    """
+    Tests that the client long-polls /job-status with ?wait= and returns the
+    first final status it sees.
+    """
+    tools = FFMPEGGTools(api_base_url="http://long-poll-test-ffmpeg")
+    bodies = iter([b'{"job_id": "j1", "status": "PROCESSING"}', b'{"job_id": "j1", "status": "COMPLETED"}'])
+
+    def fake_get(endpoint, params, timeout):
+        response = MagicMock(status_code=200, headers={})
+        response.content = next(bodies)
+        return response
+
+    tools.session.get = MagicMock(side_effect=fake_get)
+
+    result = tools.wait_for_completion("j1", deadline_s=60)
+
+    assert result == {"job_id": "j1", "status": "COMPLETED"}
+    assert tools.session.get.call_count == 2
+    call = tools.session.get.call_args
+    assert call.args[0] == "http://long-poll-test-ffmpeg/job-status/j1"
+    assert call.kwargs["params"]["wait"] > 0
+
+
+def test_identical_concurrent_submissions_share_one_request():
+    """
+    Tests that a submission made while an identical one is in flight reuses its
+    result, and that the dummy job ID is stable (not salted like hash()).
+    """
+    tools = FFMPEGGTools(api_base_url="http://single-flight-test-ffmpeg")
+    release = threading.Event()
+    entered = threading.Event()
+
+    def fake_post(endpoint, json, timeout):
+        entered.set()
+        release.wait(5)
+        response = MagicMock(status_code=200)
+        response.content = b'{"job_id": "job-1", "status": "SUBMITTED"}'
+        return response
+
+    tools.session.post = MagicMock(side_effect=fake_post)
+    args = (["-c:v", "libx265"], "/media/a.mkv", "ignored")
+
+    class ObservedEvent(threading.Event):
+        def wait(self, timeout=None):
+            follower_waiting.set()
+            return super().wait(timeout)
+
+    follower_waiting = threading.Event()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first = executor.submit(tools.run_ffmpeg_command, *args)
+        entered.wait(5)
+        # The first call is mid-request: make its in-flight record observable.
+        next(iter(tools._in_flight.values())).done = ObservedEvent()
+        second = executor.submit(tools.run_ffmpeg_command, *args)
+        assert follower_waiting.wait(5)
+        release.set()
+        results = [first.result(timeout=5), second.result(timeout=5)]
+
+    assert results == [{"job_id": "job-1", "status": "SUBMITTED"}] * 2
+    assert tools.session.post.call_count == 1
+
+    dummy = FFMPEGGTools(api_base_url="http://single-flight-test-ffmpeg", use_dummy_data=True)
+    assert dummy.run_ffmpeg_command(*args)["job_id"] == "job_" + submission_key(args[0], args[1])
+    assert submission_key(args[0], args[1]) == submission_key(list(args[0]), "/media/a.mkv")
+
+
+def test_non_json_200_body_fails_the_submission():
+    """
+    Tests that a 200 /submit-job response that is not JSON returns a FAILED
+    submission instead of raising, and that a bad status body ends the wait.
+    """
+    tools = FFMPEGGTools(api_base_url="http://bad-body-test-ffmpeg")
+    response = MagicMock(status_code=200, headers={})
+    response.content = b"<html>502 Bad Gateway</html>"
+    tools.session.post = MagicMock(return_value=response)
+    tools.session.get = MagicMock(return_value=response)
+
+    result = tools.run_ffmpeg_command(["-c:v", "libx265"], "/media/a.mkv", "ignored")
+    assert result["status"] == "FAILED" and result["job_id"] == "none"
+    assert "Invalid JSON" in result["notes"]
+
+    assert tools.wait_for_completion("j1", deadline_s=60)["status"] == "UNKNOWN"
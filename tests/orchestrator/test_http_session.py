@@ -0,0 +1,79 @@
+# tests/orchestrator/test_http_session.py
+
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from orchestrator.tools import http_session
+from orchestrator.tools.http_session import request_with_retry
+
+
+def _response(status_code, headers=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    return response
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Records the backoff delays instead of sleeping."""
+    delays = []
+    monkeypatch.setattr(http_session.time, "sleep", delays.append)
+    return delays
+
+
+def test_retries_overload_statuses_with_jittered_backoff(sleeps):
+    """
+    Tests that 503/429 responses are retried with delays bounded by the
+    full-jitter window (or Retry-After), and that a 422 is returned at once.
+    """
+    send = MagicMock(side_effect=[_response(503), _response(429, {"Retry-After": "3"}), _response(200)])
+
+    assert request_with_retry(send, "http://api/x", json={}).status_code == 200
+    assert send.call_count == 3
+    assert 0 <= sleeps[0] <= http_session.RETRY_BASE_DELAY
+    assert sleeps[1] >= 3
+
+    send = MagicMock(return_value=_response(422))
+    assert request_with_retry(send, "http://api/x").status_code == 422
+    assert send.call_count == 1
+
+
+def test_non_idempotent_requests_are_not_retried_on_ambiguous_failures(sleeps):
+    """
+    Tests that a non-idempotent request is not resent after a 502 or a
+    timeout, where the server may already have acted on it.
+    """
+    send = MagicMock(return_value=_response(502))
+    assert request_with_retry(send, "http://api/x", idempotent=False).status_code == 502
+    assert send.call_count == 1
+
+    send = MagicMock(side_effect=requests.exceptions.ReadTimeout("slow"))
+    with pytest.raises(requests.exceptions.Timeout):
+        request_with_retry(send, "http://api/x", idempotent=False)
+    assert send.call_count == 1
+    assert sleeps == []
+
+
+def test_deadline_bounds_each_attempt_and_stops_retries(sleeps, monkeypatch):
+    """
+    Tests that every attempt gets the remaining time as its socket timeout and
+    that no retry is started once the deadline would be exceeded.
+    """
+    now = [0.0]
+    monkeypatch.setattr(http_session.time, "monotonic", lambda: now[0])
+
+    def send(url, timeout):
+        now[0] += 6.0
+        return _response(503, {"Retry-After": "5"})
+
+    send = MagicMock(side_effect=send)
+    response = request_with_retry(send, "http://api/x", deadline_s=10.0)
+
+    assert response.status_code == 503
+    # One attempt fits; a retry after a 5s Retry-After would end past 10s.
+    assert send.call_count == 1
+    assert send.call_args.kwargs["timeout"] == (http_session.CONNECT_TIMEOUT_SECONDS, 10.0)
+    assert sleeps == []
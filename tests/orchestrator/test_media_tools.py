@@ -0,0 +1,113 @@
+# tests/orchestrator/test_media_tools.py
+
+import json
+from unittest.mock import MagicMock
+
+from orchestrator.tools import circuit_breaker, media_tools
+from orchestrator.tools.media_tools import MediaTools
+
+
+def _json_response(body):
+    """A fake 200 response carrying body as its JSON content."""
+    response = MagicMock(status_code=200)
+    response.content = json.dumps(body).encode()
+    return response
+
+
+def test_get_metadata_batch_splits_large_lists_into_chunks(monkeypatch):
+    """
+    Tests that a long path list is fetched as several bounded batch requests
+    whose results are merged, and that a failed chunk maps its paths to {}.
+    """
+    monkeypatch.setattr(media_tools, "METADATA_BATCH_SIZE", 2)
+    tools = MediaTools(api_base_url="http://mock-media")
+
+    def fake_post(endpoint, json, timeout):
+        paths = json["file_paths"]
+        if "/media/2.mkv" in paths:
+            raise media_tools.requests.exceptions.ConnectionError("down")
+        return _json_response({path: {"resolution": "1920x1080"} for path in paths})
+
+    tools.session.post = MagicMock(side_effect=fake_post)
+    paths = [f"/media/{i}.mkv" for i in range(5)]
+
+    result = tools.get_metadata_batch(paths)
+
+    assert tools.session.post.call_count == 3
+    assert all(len(c.kwargs["json"]["file_paths"]) <= 2 for c in tools.session.post.call_args_list)
+    assert result["/media/0.mkv"] == {"resolution": "1920x1080"}
+    assert result["/media/2.mkv"] == {} and result["/media/3.mkv"] == {}
+    assert result["/media/4.mkv"] == {"resolution": "1920x1080"}
+    assert set(result) == set(paths)
+
+
+def test_metadata_is_served_from_the_ttl_cache(monkeypatch):
+    """
+    Tests that repeat lookups within the TTL skip the network, that failed
+    ({}) responses are not cached, and that entries expire or can be bypassed.
+    """
+    now = [1000.0]
+    monkeypatch.setattr(media_tools.time, "monotonic", lambda: now[0])
+    tools = MediaTools(api_base_url="http://cache-test-media")
+
+    def fake_post(endpoint, json, timeout):
+        paths = json["file_paths"]
+        return _json_response({p: ({} if "broken" in p else {"video_codec": "HEVC"}) for p in paths})
+
+    tools.session.post = MagicMock(side_effect=fake_post)
+
+    tools.get_metadata_batch(["/media/a.mkv", "/media/broken.mkv"])
+    result = tools.get_metadata_batch(["/media/a.mkv", "/media/broken.mkv"])
+
+    assert result == {"/media/a.mkv": {"video_codec": "HEVC"}, "/media/broken.mkv": {}}
+    assert tools.session.post.call_args.kwargs["json"] == {"file_paths": ["/media/broken.mkv"]}
+
+    tools.get_metadata_batch(["/media/a.mkv"], cache_bypass=True)
+    assert tools.session.post.call_count == 3
+
+    now[0] += media_tools.METADATA_CACHE_TTL_SECONDS
+    tools.get_metadata_batch(["/media/a.mkv"])
+    assert tools.session.post.call_count == 4
+
+
+def test_list_media_files_parses_ndjson_stream():
+    """
+    Tests that the scan is requested as NDJSON and parsed line by line, and
+    that a plain JSON array from an older service is still accepted.
+    """
+    tools = MediaTools(api_base_url="http://ndjson-test-media")
+    response = MagicMock(status_code=200, headers={"Content-Type": "application/x-ndjson"})
+    response.__enter__.return_value = response
+    response.iter_lines.return_value = [b'"/media/a.mkv"', b'', b'"/media/b \\u00e9.mp4"']
+    tools.session.get = MagicMock(return_value=response)
+
+    assert tools.list_media_files() == ["/media/a.mkv", "/media/b é.mp4"]
+    kwargs = tools.session.get.call_args.kwargs
+    assert kwargs["headers"] == {"Accept": "application/x-ndjson"} and kwargs["stream"] is True
+
+    response.headers = {"Content-Type": "application/json"}
+    response.content = b'["/media/c.mkv"]'
+    assert tools.list_media_files() == ["/media/c.mkv"]
+
+
+def test_non_json_200_body_is_handled_as_a_failed_request():
+    """
+    Tests that a 200 response whose body is not JSON (e.g. a proxy error page)
+    is caught like any other request failure, and that a half-open probe
+    receiving one re-opens the breaker instead of leaving it half-open.
+    """
+    tools = MediaTools(api_base_url="http://bad-body-test-media")
+    response = MagicMock(status_code=200, headers={"Content-Type": "text/html"})
+    response.__enter__.return_value = response
+    response.content = b"<html>502 Bad Gateway</html>"
+    tools.session.post = MagicMock(return_value=response)
+    tools.session.get = MagicMock(return_value=response)
+
+    assert tools.get_file_metadata("/media/a.mkv") == {}
+    assert tools.get_metadata_batch(["/media/a.mkv"]) == {"/media/a.mkv": {}}
+
+    # Cooldown over: the scan below is the breaker's half-open probe.
+    tools.breaker.state = circuit_breaker.OPEN
+    tools.breaker.opened_at = media_tools.time.monotonic() - tools.breaker.recovery_seconds
+    assert tools.list_media_files() == []
+    assert tools.breaker.state == circuit_breaker.OPEN
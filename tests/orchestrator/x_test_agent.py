@@ -1,17 +1,13 @@
 # tests/orchestrator/test_agent.py
 
-import os
-import sys
 import json
 import pytest
+from dataclasses import dataclass, field
 from unittest.mock import MagicMock
 
 # The updated import path based on our findings
+from orchestrator import agent as agent_module
 from orchestrator.agent import CinchroAgent
-from orchestrator.database import DatabaseManager
-
-# Add the project root to the sys.path to allow for relative imports in this test file
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
 
 @pytest.fixture
@@ -21,87 +17,107 @@ def mock_tools():
     mock_ffmpeg_tools = MagicMock()
     return mock_media_tools, mock_ffmpeg_tools
 
+@dataclass
+class FakeDB:
+    """Records the DatabaseManager calls the agent makes, in plain lists."""
+    add_files_bulk_calls: list = field(default_factory=list)
+    update_status_calls: list = field(default_factory=list)
+
+    def add_files_bulk(self, file_paths):
+        # Every path counts as new; the real method returns only the inserted ones.
+        self.add_files_bulk_calls.append(list(file_paths))
+        return list(file_paths)
+
+    def update_file_status(self, file_path, status, notes=None):
+        self.update_status_calls.append((file_path, status, notes))
+
 @pytest.fixture
 def mock_db():
-    """Mocks the database manager."""
-    return MagicMock(spec=DatabaseManager)
+    """Fakes the database manager (the agent's return values come from mock_tools)."""
+    return FakeDB()
 
 @pytest.fixture
-def agent(mock_tools, mock_db):
+def agent(mock_tools, mock_db, monkeypatch):
     """Initializes the CinchroAgent with mocked dependencies."""
     mock_media_tools, mock_ffmpeg_tools = mock_tools
-    return CinchroAgent(
-        database_manager=mock_db,
-        media_tools=mock_media_tools,
-        ffmpeg_tools=mock_ffmpeg_tools
-    )
+    # __init__ would open the real database and build the Ollama-backed executor
+    agent_instance = CinchroAgent.__new__(CinchroAgent)
+    agent_instance.db_manager = mock_db
+    agent_instance.agent = MagicMock()
+    agent_instance.prompt_manager = MagicMock()
+    agent_instance.prompt_manager.get.return_value = "Evaluate this file."
+    agent_instance.evaluation_rules = dict(agent_module.DEFAULT_EVALUATION_RULES)
+    # The nodes reach the services through the module-level tool instances
+    monkeypatch.setattr(agent_module, "media_tools_instance", mock_media_tools)
+    monkeypatch.setattr(agent_module, "ffmpeg_tools_instance", mock_ffmpeg_tools)
+    return agent_instance
 
 def test_scan_media_node(agent, mock_tools, mock_db):
-    """Tests that the scan_media_node correctly lists new files and adds them to the database."""
+    """Tests that the scan_media_node adds the discovered files in bulk and probes them in one batch."""
     mock_media_tools, _ = mock_tools
     
-    # Mock the list_media_files method to return a dummy list
+    # The tool-calling executor reports the files found by list_media_files
     dummy_files = ["/media/file1.mkv", "/media/file2.mkv"]
-    mock_media_tools.list_media_files.return_value = dummy_files
+    agent.agent.invoke.return_value = {"tool_outputs": dummy_files}
+    mock_media_tools.get_metadata_batch.return_value = {path: {} for path in dummy_files}
     
     # Execute the node
     initial_state = {}
     next_state = agent.scan_media_node(initial_state)
 
-    # Assert that the tool was called and the database was updated
-    mock_media_tools.list_media_files.assert_called_once()
-    assert next_state['new_files'] == dummy_files
-    for file_path in dummy_files:
-        mock_db.add_file.assert_any_call(file_path)
+    # Assert that the files were added in one bulk call and probed in one batch
+    assert mock_db.add_files_bulk_calls == [dummy_files]
+    assert next_state['files_to_scan'] == dummy_files
+    mock_media_tools.get_metadata_batch.assert_called_once_with(dummy_files)
 
-def test_evaluate_file_node_positive_case(agent, mock_tools, mock_db):
+def test_evaluate_file_node_positive_case(agent):
     """Tests a positive evaluation case where a file meets the criteria for processing."""
-    mock_media_tools, _ = mock_tools
-    
-    # Mock the get_file_metadata tool to return a "good" file
+    # Metadata as fetched in bulk by scan_media_node, for a "good" file
     mock_metadata = {
         "file_path": "/media/test_good_file.mkv",
         "video_codec": "hevc",
         "resolution": "1920x1080"
     }
-    mock_media_tools.get_file_metadata.return_value = mock_metadata
+    # No audio channel count, so the verdict goes to the LLM
+    initial_state = {
+        "files_to_scan": [mock_metadata['file_path']],
+        "metadata_by_path": {mock_metadata['file_path']: mock_metadata},
+    }
     
     # Mock the LLM decision to be "yes"
-    agent.llm_decision_chain = MagicMock(return_value="yes")
+    agent.agent.invoke.return_value = "yes"
     
     # Execute the node with a file to evaluate
-    initial_state = {"file_to_evaluate": "/media/test_good_file.mkv"}
     next_state = agent.evaluate_file_node(initial_state)
 
-    # Assert the correct return state and database update
-    assert next_state['file_to_evaluate'] == mock_metadata['file_path']
-    assert next_state['next'] == "evaluation_passed"
-    mock_db.update_file_status.assert_called_once_with(
-        mock_metadata['file_path'], 'evaluation_passed'
-    )
+    # Assert the file was taken off the queue with the LLM's verdict
+    assert next_state['current_file'] == mock_metadata['file_path']
+    assert next_state['files_to_scan'] == []
+    assert next_state['status'] == "evaluation_passed"
+    agent.agent.invoke.assert_called_once()
 
-def test_evaluate_file_node_negative_case(agent, mock_tools, mock_db):
+def test_evaluate_file_node_negative_case(agent):
     """Tests a negative evaluation case where a file does not meet the criteria."""
-    mock_media_tools, _ = mock_tools
-    
-    # Mock the get_file_metadata tool to return a "bad" file
+    # Metadata as fetched in bulk by scan_media_node, for a "bad" file
     mock_metadata = {
         "file_path": "/media/test_bad_file.mkv",
         "video_codec": "avc",
         "resolution": "1280x720"
     }
-    mock_media_tools.get_file_metadata.return_value = mock_metadata
+    # No audio channel count, so the verdict goes to the LLM
+    initial_state = {
+        "files_to_scan": [mock_metadata['file_path']],
+        "metadata_by_path": {mock_metadata['file_path']: mock_metadata},
+    }
     
     # Mock the LLM decision to be "no"
-    agent.llm_decision_chain = MagicMock(return_value="no")
+    agent.agent.invoke.return_value = "no"
     
     # Execute the node with a file to evaluate
-    initial_state = {"file_to_evaluate": "/media/test_bad_file.mkv"}
     next_state = agent.evaluate_file_node(initial_state)
-    
-    # Assert the correct return state and database update
-    assert next_state['file_to_evaluate'] == mock_metadata['file_path']
-    assert next_state['next'] == "evaluation_skipped"
-    mock_db.update_file_status.assert_called_once_with(
-        mock_metadata['file_path'], 'skipped', notes="File evaluation resulted in 'no'."
-    )
\ No newline at end of file
+
+    # Assert the file was taken off the queue with the LLM's verdict
+    assert next_state['current_file'] == mock_metadata['file_path']
+    assert next_state['files_to_scan'] == []
+    assert next_state['status'] == "evaluation_skipped"
+    agent.agent.invoke.assert_called_once()